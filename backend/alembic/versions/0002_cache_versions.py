@@ -0,0 +1,30 @@
+"""cache versions for cross-worker invalidation
+
+Revision ID: 0002_cache_versions
+Revises: 0001_init
+Create Date: 2025-09-15 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_cache_versions'
+down_revision = '0001_init'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    cache_versions = op.create_table(
+        'cache_versions',
+        sa.Column('name', sa.String(), primary_key=True),
+        sa.Column('version', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+    )
+    op.bulk_insert(cache_versions, [{'name': 'roles', 'version': 0}])
+
+
+def downgrade() -> None:
+    op.drop_table('cache_versions')
@@ -0,0 +1,28 @@
+"""index reset tokens for chunked cleanup
+
+Revision ID: 0003_reset_token_cleanup_index
+Revises: 0002_cache_versions
+Create Date: 2025-09-22 00:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_reset_token_cleanup_index'
+down_revision = '0002_cache_versions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_password_reset_tokens_active_expires_at',
+        'password_reset_tokens',
+        ['active', 'expires_at'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_password_reset_tokens_active_expires_at', table_name='password_reset_tokens')
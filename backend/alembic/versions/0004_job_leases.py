@@ -0,0 +1,29 @@
+"""job leases for the background scheduler
+
+Revision ID: 0004_job_leases
+Revises: 0003_reset_token_cleanup_index
+Create Date: 2025-09-29 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_job_leases'
+down_revision = '0003_reset_token_cleanup_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'job_leases',
+        sa.Column('name', sa.String(), primary_key=True),
+        sa.Column('owner', sa.String(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('job_leases')
@@ -0,0 +1,28 @@
+"""user token version
+
+Revision ID: 0006_user_token_version
+Revises: 0005_email_outbox
+Create Date: 2025-10-13 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_user_token_version'
+down_revision = '0005_email_outbox'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(
+            sa.Column('token_version', sa.Integer(), nullable=False, server_default=sa.text('0'))
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('token_version')
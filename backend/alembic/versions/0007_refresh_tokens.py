@@ -0,0 +1,39 @@
+"""refresh tokens
+
+Revision ID: 0007_refresh_tokens
+Revises: 0006_user_token_version
+Create Date: 2025-10-20 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_refresh_tokens'
+down_revision = '0006_user_token_version'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'refresh_tokens',
+        sa.Column('jti', sa.String(), primary_key=True),
+        sa.Column('family_id', sa.String(), nullable=False),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('used_at', sa.DateTime(), nullable=True),
+        sa.Column('revoked', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+    )
+    op.create_index('ix_refresh_tokens_family_id', 'refresh_tokens', ['family_id'])
+    op.create_index('ix_refresh_tokens_user_id', 'refresh_tokens', ['user_id'])
+    op.create_index('ix_refresh_tokens_expires_at', 'refresh_tokens', ['expires_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_refresh_tokens_expires_at', table_name='refresh_tokens')
+    op.drop_index('ix_refresh_tokens_user_id', table_name='refresh_tokens')
+    op.drop_index('ix_refresh_tokens_family_id', table_name='refresh_tokens')
+    op.drop_table('refresh_tokens')
@@ -0,0 +1,33 @@
+"""rate limit counters
+
+Revision ID: 0008_rate_limit_counters
+Revises: 0007_refresh_tokens
+Create Date: 2025-10-27 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_rate_limit_counters'
+down_revision = '0007_refresh_tokens'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'rate_limit_counters',
+        sa.Column('key', sa.String(), primary_key=True),
+        sa.Column('window_index', sa.Integer(), nullable=False),
+        sa.Column('hits', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('previous_hits', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_rate_limit_counters_expires_at', 'rate_limit_counters', ['expires_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_rate_limit_counters_expires_at', table_name='rate_limit_counters')
+    op.drop_table('rate_limit_counters')
@@ -0,0 +1,30 @@
+"""index reset tokens for admin keyset pagination
+
+Revision ID: 0009_reset_token_created_at_index
+Revises: 0008_rate_limit_counters
+Create Date: 2025-11-03 00:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0009_reset_token_created_at_index'
+down_revision = '0008_rate_limit_counters'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # SQLite appends the rowid (id) to every index, so this serves
+    # ORDER BY created_at DESC, id DESC seeks; users already has ix_users_created_at
+    op.create_index(
+        'ix_password_reset_tokens_created_at',
+        'password_reset_tokens',
+        ['created_at'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_password_reset_tokens_created_at', table_name='password_reset_tokens')
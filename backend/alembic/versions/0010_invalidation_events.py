@@ -0,0 +1,33 @@
+"""invalidation events
+
+Revision ID: 0010_invalidation_events
+Revises: 0009_reset_token_created_at_index
+Create Date: 2025-11-10 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010_invalidation_events'
+down_revision = '0009_reset_token_created_at_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'invalidation_events',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('channel', sa.String(), nullable=False),
+        sa.Column('key', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sqlite_autoincrement=True,
+    )
+    op.create_index('ix_invalidation_events_created_at', 'invalidation_events', ['created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_invalidation_events_created_at', table_name='invalidation_events')
+    op.drop_table('invalidation_events')
@@ -0,0 +1,28 @@
+"""job lease schedule
+
+Revision ID: 0011_job_lease_schedule
+Revises: 0010_invalidation_events
+Create Date: 2025-11-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0011_job_lease_schedule'
+down_revision = '0010_invalidation_events'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('job_leases') as batch_op:
+        batch_op.add_column(sa.Column('delay_seconds', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('next_run_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('job_leases') as batch_op:
+        batch_op.drop_column('next_run_at')
+        batch_op.drop_column('delay_seconds')
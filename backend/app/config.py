@@ -8,12 +8,101 @@ class Settings(BaseSettings):
     jwt_secret: str = Field(..., env="JWT_SECRET")
     access_token_ttl_minutes: int = Field(15, env="ACCESS_TOKEN_TTL_MINUTES")
     refresh_token_ttl_days: int = Field(30, env="REFRESH_TOKEN_TTL_DAYS")
+    jwt_backend: str = Field("auto", env="JWT_BACKEND")  # auto, jose or pyjwt
+    token_cache_size: int = Field(10000, env="TOKEN_CACHE_SIZE")
     
     # Database
     database_url: str = Field("sqlite:///./data/service.db", env="DATABASE_URL")
+    db_pool_size: int = Field(5, env="DB_POOL_SIZE")
+    db_read_pool_size: int = Field(10, env="DB_READ_POOL_SIZE")
+    db_max_overflow: int = Field(10, env="DB_MAX_OVERFLOW")
+    db_pool_timeout_seconds: float = Field(30.0, env="DB_POOL_TIMEOUT_SECONDS")
+    
+    # SQLite connection profile
+    sqlite_journal_mode: str = Field("WAL", env="SQLITE_JOURNAL_MODE")
+    sqlite_synchronous: str = Field("NORMAL", env="SQLITE_SYNCHRONOUS")
+    sqlite_busy_timeout_ms: int = Field(5000, env="SQLITE_BUSY_TIMEOUT_MS")
+    sqlite_cache_size: int = Field(-64000, env="SQLITE_CACHE_SIZE")  # negative = KiB
+    sqlite_mmap_size: int = Field(268435456, env="SQLITE_MMAP_SIZE")
+    sqlite_temp_store: str = Field("MEMORY", env="SQLITE_TEMP_STORE")
+    sqlite_foreign_keys: bool = Field(True, env="SQLITE_FOREIGN_KEYS")
+    
+    # Password hashing
+    password_hash_workers: int = Field(4, env="PASSWORD_HASH_WORKERS")
+    password_hash_max_queue: int = Field(32, env="PASSWORD_HASH_MAX_QUEUE")
+    
+    # Authenticated user cache (size 0 disables)
+    user_cache_size: int = Field(10000, env="USER_CACHE_SIZE")
+    user_cache_ttl_seconds: float = Field(30.0, env="USER_CACHE_TTL_SECONDS")
+    
+    # Role hierarchy cache
+    role_cache_check_seconds: float = Field(5.0, env="ROLE_CACHE_CHECK_SECONDS")
+    
+    # Stateless access tokens: authorize from signed claims instead of the DB
+    enable_stateless_auth: bool = Field(False, env="ENABLE_STATELESS_AUTH")
+    token_revocation_check_seconds: float = Field(5.0, env="TOKEN_REVOCATION_CHECK_SECONDS")
+    
+    # Refresh-token rotation store
+    refresh_token_filter_capacity: int = Field(1000000, env="REFRESH_TOKEN_FILTER_CAPACITY")
+    refresh_token_filter_error_rate: float = Field(0.01, env="REFRESH_TOKEN_FILTER_ERROR_RATE")
+    refresh_token_filter_rebuild_seconds: float = Field(3600.0, env="REFRESH_TOKEN_FILTER_REBUILD_SECONDS")
+    refresh_token_revoked_cache_size: int = Field(100000, env="REFRESH_TOKEN_REVOKED_CACHE_SIZE")
+    refresh_token_prune_interval_seconds: float = Field(3600.0, env="REFRESH_TOKEN_PRUNE_INTERVAL_SECONDS")
+    refresh_token_prune_batch_size: int = Field(5000, env="REFRESH_TOKEN_PRUNE_BATCH_SIZE")
+    refresh_token_prune_max_batches: int = Field(200, env="REFRESH_TOKEN_PRUNE_MAX_BATCHES")
+    
+    # Multi-worker deployment (workers share state through the database)
+    web_workers: int = Field(1, env="WEB_WORKERS")  # 0 = one per CPU
+    invalidation_poll_seconds: float = Field(1.0, env="INVALIDATION_POLL_SECONDS")
+    invalidation_retention_seconds: float = Field(600.0, env="INVALIDATION_RETENTION_SECONDS")
+    
+    # Bulk user import
+    bulk_import_batch_size: int = Field(500, env="BULK_IMPORT_BATCH_SIZE")
+    bulk_import_hash_workers: int = Field(0, env="BULK_IMPORT_HASH_WORKERS")  # 0 = one per CPU
+    bulk_import_max_errors: int = Field(1000, env="BULK_IMPORT_MAX_ERRORS")
+    # Uploads through the admin API share the server with live traffic
+    bulk_import_api_workers: int = Field(2, env="BULK_IMPORT_API_WORKERS")
+    
+    # Dashboard metrics
+    dashboard_metrics_max_staleness_seconds: float = Field(30.0, env="DASHBOARD_METRICS_MAX_STALENESS_SECONDS")
     
     # Logging
     log_level: str = Field("INFO", env="LOG_LEVEL")
+    log_queue_size: int = Field(10000, env="LOG_QUEUE_SIZE")
+    log_batch_size: int = Field(100, env="LOG_BATCH_SIZE")
+    log_flush_interval_seconds: float = Field(0.5, env="LOG_FLUSH_INTERVAL_SECONDS")
+    log_sample_rate: float = Field(1.0, env="LOG_SAMPLE_RATE")  # successful, fast requests only
+    log_slow_request_ms: float = Field(500.0, env="LOG_SLOW_REQUEST_MS")
+    log_combined_records: bool = Field(True, env="LOG_COMBINED_RECORDS")
+    
+    # Rate limiting (sliding windows; sqlite shares counters across workers)
+    enable_rate_limiting: bool = Field(True, env="ENABLE_RATE_LIMITING")
+    rate_limit_backend: str = Field("auto", env="RATE_LIMIT_BACKEND")  # auto, memory or sqlite
+    rate_limit_trust_forwarded: bool = Field(False, env="RATE_LIMIT_TRUST_FORWARDED")
+    # Proxies in front of the app that each append to X-Forwarded-For
+    rate_limit_trusted_proxy_hops: int = Field(1, env="RATE_LIMIT_TRUSTED_PROXY_HOPS")
+    rate_limit_eviction_seconds: float = Field(60.0, env="RATE_LIMIT_EVICTION_SECONDS")
+    rate_limit_login_ip_limit: int = Field(20, env="RATE_LIMIT_LOGIN_IP_LIMIT")
+    rate_limit_login_ip_window_seconds: float = Field(60.0, env="RATE_LIMIT_LOGIN_IP_WINDOW_SECONDS")
+    rate_limit_login_email_limit: int = Field(5, env="RATE_LIMIT_LOGIN_EMAIL_LIMIT")
+    rate_limit_login_email_window_seconds: float = Field(300.0, env="RATE_LIMIT_LOGIN_EMAIL_WINDOW_SECONDS")
+    rate_limit_reset_ip_limit: int = Field(5, env="RATE_LIMIT_RESET_IP_LIMIT")
+    rate_limit_reset_ip_window_seconds: float = Field(300.0, env="RATE_LIMIT_RESET_IP_WINDOW_SECONDS")
+    rate_limit_reset_email_limit: int = Field(3, env="RATE_LIMIT_RESET_EMAIL_LIMIT")
+    rate_limit_reset_email_window_seconds: float = Field(3600.0, env="RATE_LIMIT_RESET_EMAIL_WINDOW_SECONDS")
+    
+    # Static SPA serving
+    static_memory_max_file_bytes: int = Field(262144, env="STATIC_MEMORY_MAX_FILE_BYTES")
+    static_memory_budget_bytes: int = Field(33554432, env="STATIC_MEMORY_BUDGET_BYTES")
+    static_compress_min_bytes: int = Field(1024, env="STATIC_COMPRESS_MIN_BYTES")
+    static_precompress_on_startup: bool = Field(False, env="STATIC_PRECOMPRESS_ON_STARTUP")
+    
+    # API responses
+    json_backend: str = Field("auto", env="JSON_BACKEND")  # auto, orjson or stdlib
+    enable_response_compression: bool = Field(True, env="ENABLE_RESPONSE_COMPRESSION")
+    compression_min_bytes: int = Field(1024, env="COMPRESSION_MIN_BYTES")
+    compression_gzip_level: int = Field(6, env="COMPRESSION_GZIP_LEVEL")
+    compression_brotli_quality: int = Field(4, env="COMPRESSION_BROTLI_QUALITY")
     
     # CORS
     cors_origins: list[str] = Field(["*"], env="CORS_ORIGINS")
@@ -24,6 +113,42 @@ class Settings(BaseSettings):
     enable_password_reset: bool = Field(True, env="ENABLE_PASSWORD_RESET")
     enable_admin_panel: bool = Field(True, env="ENABLE_ADMIN_PANEL")
     enable_backups: bool = Field(True, env="ENABLE_BACKUPS")
+    enable_metrics: bool = Field(False, env="ENABLE_METRICS")
+    # Bearer token required on /metrics when set
+    metrics_token: str = Field("", env="METRICS_TOKEN")
+    
+    # Per-request SQL profiling (Server-Timing header, N+1 and slow-request reports)
+    enable_query_profiling: bool = Field(False, env="ENABLE_QUERY_PROFILING")
+    query_profiling_sample_rate: float = Field(1.0, env="QUERY_PROFILING_SAMPLE_RATE")
+    query_profiling_n_plus_one_threshold: int = Field(5, env="QUERY_PROFILING_N_PLUS_ONE_THRESHOLD")
+    query_profiling_slow_ms: float = Field(200.0, env="QUERY_PROFILING_SLOW_MS")
+    
+    # Background scheduler
+    scheduler_max_workers: int = Field(2, env="SCHEDULER_MAX_WORKERS")
+    scheduler_long_max_workers: int = Field(1, env="SCHEDULER_LONG_MAX_WORKERS")
+    scheduler_lease_seconds: float = Field(60.0, env="SCHEDULER_LEASE_SECONDS")
+    scheduler_history_size: int = Field(50, env="SCHEDULER_HISTORY_SIZE")
+    scheduler_shutdown_timeout_seconds: float = Field(30.0, env="SCHEDULER_SHUTDOWN_TIMEOUT_SECONDS")
+    
+    # Local backups
+    backup_cron: str = Field("0 3 * * *", env="BACKUP_CRON")
+    backups_dir: str = Field("./data/backups", env="BACKUPS_DIR")
+    backup_pages_per_step: int = Field(1024, env="BACKUP_PAGES_PER_STEP")
+    backup_step_sleep_seconds: float = Field(0.005, env="BACKUP_STEP_SLEEP_SECONDS")
+    backup_max_restarts: int = Field(3, env="BACKUP_MAX_RESTARTS")
+    backup_compression_level: int = Field(6, env="BACKUP_COMPRESSION_LEVEL")
+    backup_retention_count: int = Field(7, env="BACKUP_RETENTION_COUNT")
+    backup_retention_days: int = Field(30, env="BACKUP_RETENTION_DAYS")
+    enable_incremental_backups: bool = Field(False, env="ENABLE_INCREMENTAL_BACKUPS")
+    backup_incremental_interval_seconds: int = Field(300, env="BACKUP_INCREMENTAL_INTERVAL_SECONDS")
+    backup_incremental_max_deltas: int = Field(288, env="BACKUP_INCREMENTAL_MAX_DELTAS")
+    
+    # Reset token maintenance
+    token_retention_hours: int = Field(24, env="TOKEN_RETENTION_HOURS")
+    token_cleanup_batch_size: int = Field(1000, env="TOKEN_CLEANUP_BATCH_SIZE")
+    token_cleanup_max_batches: int = Field(50, env="TOKEN_CLEANUP_MAX_BATCHES")
+    token_cleanup_min_interval_seconds: float = Field(60.0, env="TOKEN_CLEANUP_MIN_INTERVAL_SECONDS")
+    token_cleanup_max_interval_seconds: float = Field(3600.0, env="TOKEN_CLEANUP_MAX_INTERVAL_SECONDS")
     
     # R2 Backup (optional)
     enable_r2_backup: bool = Field(False, env="ENABLE_R2_BACKUP")
@@ -31,6 +156,10 @@ class Settings(BaseSettings):
     r2_access_key_id: str = Field("", env="R2_ACCESS_KEY_ID")
     r2_secret_access_key: str = Field("", env="R2_SECRET_ACCESS_KEY")
     r2_bucket: str = Field("", env="R2_BUCKET")
+    r2_prefix: str = Field("", env="R2_PREFIX")
+    r2_endpoint_url: str = Field("", env="R2_ENDPOINT_URL")  # override for S3-compatible stand-ins
+    r2_multipart_chunk_mb: int = Field(16, env="R2_MULTIPART_CHUNK_MB")
+    r2_max_concurrency: int = Field(4, env="R2_MAX_CONCURRENCY")
     
     # Email (SES)
     ses_from_email: str = Field("", env="SES_FROM_EMAIL")
@@ -38,6 +167,20 @@ class Settings(BaseSettings):
     aws_secret_access_key: str = Field("", env="AWS_SECRET_ACCESS_KEY")
     aws_default_region: str = Field("us-east-1", env="AWS_DEFAULT_REGION")
     frontend_url: str = Field("http://localhost:8000", env="FRONTEND_URL")
+    ses_max_send_rate: float = Field(14.0, env="SES_MAX_SEND_RATE")  # messages/second
+    email_dispatch_concurrency: int = Field(4, env="EMAIL_DISPATCH_CONCURRENCY")
+    email_batch_size: int = Field(50, env="EMAIL_BATCH_SIZE")
+    email_poll_interval_seconds: float = Field(5.0, env="EMAIL_POLL_INTERVAL_SECONDS")
+    email_max_attempts: int = Field(6, env="EMAIL_MAX_ATTEMPTS")
+    email_retry_base_seconds: float = Field(30.0, env="EMAIL_RETRY_BASE_SECONDS")
+    email_claim_timeout_seconds: float = Field(300.0, env="EMAIL_CLAIM_TIMEOUT_SECONDS")
+    email_outbox_retention_hours: int = Field(72, env="EMAIL_OUTBOX_RETENTION_HOURS")
+    email_outbox_prune_interval_seconds: float = Field(3600.0, env="EMAIL_OUTBOX_PRUNE_INTERVAL_SECONDS")
+
+    @property
+    def resolved_web_workers(self) -> int:
+        """Worker processes the server runs (WEB_WORKERS=0 means one per CPU)"""
+        return self.web_workers or os.cpu_count() or 1
 
     # Always use .env in project root
     model_config = SettingsConfigDict(
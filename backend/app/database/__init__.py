@@ -1,12 +1,124 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
-from contextlib import contextmanager
+from contextlib import contextmanager, asynccontextmanager
 from .models import Base
 from ..config import settings
 
-engine = create_engine(settings.database_url, connect_args={"check_same_thread": False})
+
+def is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def is_memory_sqlite(url: str) -> bool:
+    parsed = make_url(url)
+    return is_sqlite(url) and parsed.database in (None, "", ":memory:")
+
+
+def async_database_url(url: str) -> str:
+    """Map a sync SQLite URL onto the aiosqlite driver"""
+    parsed = make_url(url)
+    if parsed.drivername == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    return parsed.render_as_string(hide_password=False)
+
+
+def sqlite_pragmas(read_only: bool = False) -> list[str]:
+    """PRAGMA statements applied to every new SQLite connection"""
+    pragmas = [
+        f"busy_timeout = {settings.sqlite_busy_timeout_ms}",
+        f"cache_size = {settings.sqlite_cache_size}",
+        f"mmap_size = {settings.sqlite_mmap_size}",
+        f"temp_store = {settings.sqlite_temp_store}",
+        f"foreign_keys = {'ON' if settings.sqlite_foreign_keys else 'OFF'}",
+        f"synchronous = {settings.sqlite_synchronous}",
+    ]
+    if not is_memory_sqlite(settings.database_url):
+        # journal_mode is persistent in the file; setting it first lets the
+        # remaining pragmas apply under WAL.
+        pragmas.insert(0, f"journal_mode = {settings.sqlite_journal_mode}")
+    if read_only:
+        pragmas.append("query_only = ON")
+    return pragmas
+
+
+def install_sqlite_pragmas(sync_engine, read_only: bool = False) -> None:
+    pragmas = sqlite_pragmas(read_only)
+
+    @event.listens_for(sync_engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(f"PRAGMA {pragma}")
+        finally:
+            cursor.close()
+
+
+def engine_options(url: str, pool_size: int) -> dict:
+    """Connection and pool arguments for a sync or async engine"""
+    options = {}
+    if is_sqlite(url):
+        options["connect_args"] = {"check_same_thread": False}
+        if is_memory_sqlite(url):
+            return options
+    options.update(
+        pool_size=pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout_seconds,
+    )
+    return options
+
+
+def _make_engine(url: str, pool_size: int, read_only: bool = False):
+    engine = create_engine(url, **engine_options(url, pool_size))
+    if is_sqlite(url):
+        install_sqlite_pragmas(engine, read_only)
+    return engine
+
+
+def _make_async_engine(url: str, pool_size: int, read_only: bool = False):
+    async_url = async_database_url(url)
+    engine = create_async_engine(async_url, **engine_options(async_url, pool_size))
+    if is_sqlite(url):
+        install_sqlite_pragmas(engine.sync_engine, read_only)
+    return engine
+
+
+engine = _make_engine(settings.database_url, settings.db_pool_size)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = _make_async_engine(settings.database_url, settings.db_pool_size)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
+# Separate pools for pure reads. Under WAL, readers never block the writer,
+# so these can be sized independently of the write pool.
+if is_sqlite(settings.database_url) and not is_memory_sqlite(settings.database_url):
+    read_engine = _make_engine(settings.database_url, settings.db_read_pool_size, read_only=True)
+    async_read_engine = _make_async_engine(
+        settings.database_url, settings.db_read_pool_size, read_only=True
+    )
+else:
+    read_engine = engine
+    async_read_engine = async_engine
+
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=async_read_engine, autoflush=False, expire_on_commit=False
+)
+
+
+def sync_engines() -> dict:
+    """Every distinct engine by name, as sync engines for event hooks"""
+    engines = {"write": engine, "async_write": async_engine.sync_engine}
+    if read_engine is not engine:
+        engines["read"] = read_engine
+        engines["async_read"] = async_read_engine.sync_engine
+    return engines
+
 
 @contextmanager
 def get_db_session():
@@ -17,9 +129,44 @@ def get_db_session():
         db.close()
 
 
+@contextmanager
+def get_read_db_session():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@asynccontextmanager
+async def get_async_db_session():
+    db = AsyncSessionLocal()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+@asynccontextmanager
+async def get_async_read_db_session():
+    db = AsyncReadSessionLocal()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+async def dispose_engines() -> None:
+    """Close all pooled connections"""
+    for eng in {async_engine, async_read_engine}:
+        await eng.dispose()
+    for eng in {engine, read_engine}:
+        eng.dispose()
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -0,0 +1,172 @@
+import base64
+import json
+from datetime import datetime
+from typing import AsyncIterator
+
+from sqlalchemy import and_, select, tuple_
+
+from . import get_async_read_db_session
+from .models import User, Role, PasswordResetToken
+
+# Keyset ("seek") pagination: each page continues strictly after the last row
+# of the previous one, so page N costs the same as page 1. Newest-first
+# listings order by (created_at, id); SQLite appends the rowid to every
+# index, so ix_users_created_at already covers that order for users.
+
+
+class InvalidCursor(ValueError):
+    """The pagination cursor is malformed (callers may catch ValueError)"""
+
+
+def encode_cursor(values: list) -> str:
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception as e:
+        raise InvalidCursor("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor("Invalid cursor")
+    return values
+
+
+def _before(created_col, id_col, cursor: list):
+    """Rows after ``cursor`` in (created_at DESC, id DESC) order"""
+    created_at, row_id = datetime.fromisoformat(cursor[0]), int(cursor[1])
+    # The plain bound lets the planner seek on the leading index column
+    return and_(created_col <= created_at, tuple_(created_col, id_col) < (created_at, row_id))
+
+
+def prefix_range(column, prefix: str):
+    """``column LIKE 'prefix%'`` as a range so the column's index is used"""
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return and_(column >= prefix, column < upper)
+
+
+# Users
+
+def _users_query(email_prefix: str | None, is_active: bool | None, cursor: list | None):
+    stmt = select(User.id, User.email, User.is_active, User.created_at)
+    if is_active is not None:
+        stmt = stmt.where(User.is_active == is_active)
+    if email_prefix:
+        # Prefix search walks ix_users_email, so it pages in email order
+        stmt = stmt.where(prefix_range(User.email, email_prefix)).order_by(User.email)
+        if cursor:
+            stmt = stmt.where(User.email > cursor[0])
+    else:
+        stmt = stmt.order_by(User.created_at.desc(), User.id.desc())
+        if cursor:
+            stmt = stmt.where(_before(User.created_at, User.id, cursor))
+    return stmt
+
+
+def _user_cursor(row, email_prefix: str | None) -> list:
+    return [row.email] if email_prefix else [row.created_at, row.id]
+
+
+async def list_users_page_async(
+    limit: int,
+    cursor: str | None = None,
+    email_prefix: str | None = None,
+    is_active: bool | None = None,
+) -> tuple[list, str | None]:
+    """One page of users and the cursor for the next page (None at the end)"""
+    values = decode_cursor(cursor, 1 if email_prefix else 2) if cursor else None
+    stmt = _users_query(email_prefix, is_active, values).limit(limit + 1)
+    async with get_async_read_db_session() as db:
+        rows = (await db.execute(stmt)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(_user_cursor(rows[-1], email_prefix))
+    return rows, next_cursor
+
+
+async def iter_users_async(
+    email_prefix: str | None = None,
+    is_active: bool | None = None,
+    batch_size: int = 1000,
+) -> AsyncIterator:
+    """Every matching user, fetched one short keyset query at a time"""
+    values = None
+    while True:
+        stmt = _users_query(email_prefix, is_active, values).limit(batch_size)
+        async with get_async_read_db_session() as db:
+            rows = (await db.execute(stmt)).all()
+        for row in rows:
+            yield row
+        if len(rows) < batch_size:
+            return
+        values = [v.isoformat() if isinstance(v, datetime) else v for v in _user_cursor(rows[-1], email_prefix)]
+
+
+# Roles
+
+async def list_roles_page_async(limit: int, cursor: str | None = None) -> tuple[list, str | None]:
+    """One page of roles in id order"""
+    stmt = select(Role.id, Role.name, Role.parent_role_id, Role.created_at).order_by(Role.id)
+    if cursor:
+        stmt = stmt.where(Role.id > int(decode_cursor(cursor, 1)[0]))
+    async with get_async_read_db_session() as db:
+        rows = (await db.execute(stmt.limit(limit + 1))).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1].id])
+    return rows, next_cursor
+
+
+# Password reset tokens (the token secret itself is never selected)
+
+def _tokens_query(user_id: int | None, active: bool | None, cursor: list | None):
+    prt = PasswordResetToken
+    stmt = select(
+        prt.id, prt.user_id, prt.expires_at, prt.used, prt.active, prt.created_at
+    ).order_by(prt.created_at.desc(), prt.id.desc())
+    if user_id is not None:
+        stmt = stmt.where(prt.user_id == user_id)
+    if active is not None:
+        stmt = stmt.where(prt.active == active)
+    if cursor:
+        stmt = stmt.where(_before(prt.created_at, prt.id, cursor))
+    return stmt
+
+
+async def list_reset_tokens_page_async(
+    limit: int,
+    cursor: str | None = None,
+    user_id: int | None = None,
+    active: bool | None = None,
+) -> tuple[list, str | None]:
+    """One page of reset tokens, newest first"""
+    values = decode_cursor(cursor, 2) if cursor else None
+    stmt = _tokens_query(user_id, active, values).limit(limit + 1)
+    async with get_async_read_db_session() as db:
+        rows = (await db.execute(stmt)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1].created_at, rows[-1].id])
+    return rows, next_cursor
+
+
+async def iter_reset_tokens_async(
+    user_id: int | None = None,
+    active: bool | None = None,
+    batch_size: int = 1000,
+) -> AsyncIterator:
+    """Every matching reset token, fetched one short keyset query at a time"""
+    values = None
+    while True:
+        stmt = _tokens_query(user_id, active, values).limit(batch_size)
+        async with get_async_read_db_session() as db:
+            rows = (await db.execute(stmt)).all()
+        for row in rows:
+            yield row
+        if len(rows) < batch_size:
+            return
+        values = [rows[-1].created_at.isoformat(), rows[-1].id]
@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+
+from ..config import settings
+from .invalidation import invalidation_bus, USERS_CHANNEL
+from .models import User
+
+
+@dataclass(frozen=True, slots=True)
+class UserSnapshot:
+    """Compact, immutable view of a user for the authenticated request path"""
+    id: int
+    email: str
+    is_active: bool
+    created_at: datetime
+    token_version: int
+    # Set only when authorized from access-token claims (stateless mode)
+    roles: frozenset[str] | None = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            email=user.email,
+            is_active=bool(user.is_active),
+            created_at=user.created_at,
+            token_version=user.token_version or 0,
+        )
+
+
+class UserCache:
+    """Thread-safe LRU cache of user snapshots with a per-entry TTL"""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[int, tuple[float, UserSnapshot]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # Bumped by every invalidation so loads that raced one are not cached
+        self._generation = 0
+        self.stale_puts = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    def get(self, user_id: int) -> UserSnapshot | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, snapshot = entry
+            if expires_at <= now:
+                del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return snapshot
+
+    def generation(self) -> int:
+        """Read before loading a user from the DB and pass to put()"""
+        return self._generation
+
+    def put(self, snapshot: UserSnapshot, generation: int | None = None) -> None:
+        if not self.enabled:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                # An invalidation ran while this snapshot was loading; it may be stale
+                self.stale_puts += 1
+                return
+            self._entries[snapshot.id] = (expires_at, snapshot)
+            self._entries.move_to_end(snapshot.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self.invalidations += 1
+            self._generation += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "stale_puts": self.stale_puts,
+            }
+
+
+user_cache = UserCache(
+    max_size=settings.user_cache_size,
+    ttl_seconds=settings.user_cache_ttl_seconds,
+)
+
+
+def _on_users_invalidated(key: str | None) -> None:
+    if key is None:
+        user_cache.clear()
+    else:
+        user_cache.invalidate(int(key))
+
+
+invalidation_bus.subscribe(USERS_CHANNEL, _on_users_invalidated)
@@ -0,0 +1,132 @@
+import asyncio
+import threading
+import time
+from datetime import datetime
+
+import structlog
+from sqlalchemy import select, func
+from .models import User, PasswordResetToken
+from . import get_async_read_db_session
+from ..config import settings
+
+logger = structlog.get_logger("app")
+
+
+class DashboardCounters:
+    """In-memory dashboard counters kept current by write hooks.
+
+    Writes in this process adjust the counters immediately; a reconciliation
+    against the real tables runs at most every ``max_staleness`` seconds to
+    pick up writes from other workers and correct any drift. Pending resets
+    are tracked as ``token id -> expires_at`` so expiry needs no event.
+    """
+
+    def __init__(self, max_staleness: float):
+        self.max_staleness = max_staleness
+        self.total_users = 0
+        self.active_users = 0
+        self._pending: dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._reconciled_at: float | None = None
+        self._reconcile_task: asyncio.Task | None = None
+        self.reconciliations = 0
+
+    # Write hooks
+
+    def user_created(self, is_active: bool = True) -> None:
+        with self._lock:
+            self.total_users += 1
+            if is_active:
+                self.active_users += 1
+
+    def users_created(self, total: int, active: int) -> None:
+        with self._lock:
+            self.total_users += total
+            self.active_users += active
+
+    def user_deactivated(self) -> None:
+        with self._lock:
+            self.active_users = max(0, self.active_users - 1)
+
+    def reset_token_created(self, token_id: int, expires_at: datetime) -> None:
+        with self._lock:
+            self._pending[token_id] = expires_at
+
+    def reset_token_used(self, token_id: int) -> None:
+        with self._lock:
+            self._pending.pop(token_id, None)
+
+    # Reads
+
+    def _pending_count(self) -> int:
+        now = datetime.utcnow()
+        with self._lock:
+            expired = [tid for tid, exp in self._pending.items() if exp <= now]
+            for tid in expired:
+                del self._pending[tid]
+            return len(self._pending)
+
+    def snapshot(self) -> dict:
+        return {
+            "total_users": self.total_users,
+            "active_users": self.active_users,
+            "pending_resets": self._pending_count(),
+        }
+
+    def is_stale(self) -> bool:
+        return (
+            self._reconciled_at is None
+            or time.monotonic() - self._reconciled_at >= self.max_staleness
+        )
+
+    async def reconcile(self) -> None:
+        """Replace the counters with the true values from the database"""
+        async with get_async_read_db_session() as db:
+            total_users = await db.scalar(select(func.count()).select_from(User))
+            active_users = await db.scalar(
+                select(func.count()).select_from(User).where(User.is_active == True)
+            )
+            result = await db.execute(
+                select(PasswordResetToken.id, PasswordResetToken.expires_at).where(
+                    PasswordResetToken.used == False,
+                    PasswordResetToken.expires_at > datetime.utcnow()
+                )
+            )
+            pending = {token_id: expires_at for token_id, expires_at in result.all()}
+        with self._lock:
+            self.total_users = total_users
+            self.active_users = active_users
+            self._pending = pending
+            self._reconciled_at = time.monotonic()
+            self.reconciliations += 1
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Dashboard counter reconciliation failed", error=str(task.exception()))
+
+    def _start_reconcile(self) -> asyncio.Task:
+        """The in-flight reconcile, starting one only if none is running"""
+        if self._reconcile_task is None or self._reconcile_task.done():
+            self._reconcile_task = asyncio.create_task(self.reconcile())
+            self._reconcile_task.add_done_callback(self._log_failure)
+        return self._reconcile_task
+
+    async def get(self) -> dict:
+        """Current counters (stale-while-revalidate).
+
+        Once the last reconciliation is older than ``max_staleness`` the
+        current values are still served while one background reconcile
+        refreshes them, so a read can lag the database by slightly more than
+        the bound. Only the first load is awaited, and concurrent first
+        callers share it.
+        """
+        if self._reconciled_at is None:
+            # Shielded so a cancelled request does not cancel the shared load
+            await asyncio.shield(self._start_reconcile())
+        elif self.is_stale():
+            self._start_reconcile()
+        return self.snapshot()
+
+
+dashboard_counters = DashboardCounters(max_staleness=settings.dashboard_metrics_max_staleness_seconds)
@@ -0,0 +1,115 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Callable
+
+import structlog
+from sqlalchemy import delete, func, insert, select
+
+from . import get_db_session, get_async_read_db_session
+from .models import InvalidationEvent
+from ..config import settings
+
+logger = structlog.get_logger("app")
+
+USERS_CHANNEL = "users"
+REFRESH_FAMILIES_CHANNEL = "refresh_families"
+
+events_table = InvalidationEvent.__table__
+
+
+class InvalidationBus:
+    """Cross-worker cache invalidation over an append-only table.
+
+    Writers publish ``(channel, key)`` rows in the same transaction as the
+    change they describe; every worker polls for rows past the last id it
+    has seen and runs its local handler for each channel. A key of None
+    means "drop everything on this channel", which is also what a worker
+    does when it has fallen further behind than the retention window.
+    Disabled (publish and poll are no-ops) when running a single worker.
+    """
+
+    def __init__(self, enabled: bool, retention_seconds: float):
+        self.enabled = enabled
+        self.retention_seconds = retention_seconds
+        self._handlers: dict[str, Callable[[str | None], None]] = {}
+        self._last_id: int | None = None
+        self._polled_at = 0.0
+        self._lock = asyncio.Lock()
+        self.stats = {"published": 0, "received": 0, "resyncs": 0}
+
+    def subscribe(self, channel: str, handler: Callable[[str | None], None]) -> None:
+        self._handlers[channel] = handler
+
+    def publish(self, db, channel: str, key=None) -> None:
+        """Record an invalidation inside the caller's transaction (sync Session or Connection)"""
+        if not self.enabled:
+            return
+        db.execute(insert(events_table).values(
+            channel=channel,
+            key=None if key is None else str(key),
+            created_at=datetime.utcnow(),
+        ))
+        self.stats["published"] += 1
+
+    def _dispatch(self, channel: str, key: str | None) -> None:
+        handler = self._handlers.get(channel)
+        if handler is None:
+            return
+        try:
+            handler(key)
+        except Exception as e:
+            logger.error("Invalidation handler failed", channel=channel, key=key, error=str(e))
+
+    def _resync(self) -> None:
+        """Drop every subscribed cache after missing events"""
+        self.stats["resyncs"] += 1
+        for channel in self._handlers:
+            self._dispatch(channel, None)
+
+    async def poll(self) -> int:
+        """Apply events published (by any worker) since the last poll.
+
+        Runs on the event loop with the async read engine, so it never queues
+        behind long jobs in the scheduler's thread pool.
+        """
+        if not self.enabled:
+            return 0
+        async with self._lock:
+            now = time.monotonic()
+            async with get_async_read_db_session() as db:
+                if self._last_id is None:
+                    # Caches start empty, so only later events matter
+                    self._last_id = await db.scalar(select(func.max(events_table.c.id))) or 0
+                    self._polled_at = now
+                    return 0
+                rows = (await db.execute(
+                    select(events_table.c.id, events_table.c.channel, events_table.c.key)
+                    .where(events_table.c.id > self._last_id)
+                    .order_by(events_table.c.id)
+                )).all()
+            if now - self._polled_at > self.retention_seconds:
+                # Events older than the retention window may have been pruned unseen
+                self._resync()
+            else:
+                for _, channel, key in rows:
+                    self._dispatch(channel, key)
+            if rows:
+                self._last_id = rows[-1].id
+            self._polled_at = now
+            self.stats["received"] += len(rows)
+            return len(rows)
+
+    def prune(self) -> int:
+        """Delete events every worker has had ample time to apply"""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.retention_seconds)
+        with get_db_session() as db:
+            deleted = db.execute(delete(events_table).where(events_table.c.created_at < cutoff)).rowcount
+            db.commit()
+        return deleted
+
+
+invalidation_bus = InvalidationBus(
+    enabled=settings.web_workers != 1,
+    retention_seconds=settings.invalidation_retention_seconds,
+)
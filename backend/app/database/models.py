@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, ForeignKey, Index
 from sqlalchemy.orm import declarative_base, relationship
 from datetime import datetime
 
@@ -17,6 +17,8 @@ class User(Base, AuditMixin):
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean, default=True)
+    # Bumped on password reset and deactivation to revoke outstanding access tokens
+    token_version = Column(Integer, default=0, nullable=False)
     
     roles = relationship("UserRole", back_populates="user", cascade="all, delete-orphan")
 
@@ -51,4 +53,80 @@ class PasswordResetToken(Base):
     expires_at = Column(DateTime, index=True)
     used = Column(Boolean, default=False)
     active = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    
+    __table_args__ = (
+        Index("ix_password_reset_tokens_active_expires_at", "active", "expires_at"),
+    )
+
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+    
+    jti = Column(String, primary_key=True)
+    family_id = Column(String, nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    used_at = Column(DateTime, nullable=True)
+    revoked = Column(Boolean, default=False, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class RateLimitCounter(Base):
+    __tablename__ = "rate_limit_counters"
+    
+    key = Column(String, primary_key=True)
+    window_index = Column(Integer, nullable=False)
+    hits = Column(Integer, default=0, nullable=False)
+    previous_hits = Column(Integer, default=0, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class CacheVersion(Base):
+    __tablename__ = "cache_versions"
+    
+    name = Column(String, primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class JobLease(Base):
+    __tablename__ = "job_leases"
+    
+    name = Column(String, primary_key=True)
+    owner = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    delay_seconds = Column(Float, nullable=True)
+    next_run_at = Column(DateTime, nullable=True)
+
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    
+    id = Column(Integer, primary_key=True)
+    to_email = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    html_body = Column(String, nullable=False)
+    status = Column(String, default="pending", nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    sent_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+
+class InvalidationEvent(Base):
+    __tablename__ = "invalidation_events"
+    
+    id = Column(Integer, primary_key=True)
+    channel = Column(String, nullable=False)
+    key = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    
+    # AUTOINCREMENT keeps ids monotonic after pruning, so workers can resume by id
+    __table_args__ = {"sqlite_autoincrement": True}
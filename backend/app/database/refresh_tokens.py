@@ -0,0 +1,266 @@
+import hashlib
+import math
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import structlog
+from sqlalchemy import select, update, delete, insert, or_
+
+from . import get_db_session, get_read_db_session, get_async_db_session, get_async_read_db_session
+from .invalidation import invalidation_bus, REFRESH_FAMILIES_CHANNEL
+from .models import RefreshToken
+from ..config import settings
+
+logger = structlog.get_logger("app")
+
+refresh_tokens_table = RefreshToken.__table__
+
+
+class InvalidRefreshToken(Exception):
+    """The refresh token is unknown to the store or has expired"""
+
+
+class RefreshTokenReuse(Exception):
+    """A rotated or revoked refresh token was presented again"""
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings: false positives possible, false negatives not"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(1, capacity)
+        self.size = max(64, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class RefreshTokenStore:
+    """Rotating refresh tokens in ``refresh_tokens`` with an in-memory revocation front.
+
+    The table is authoritative across workers: rotation is a single
+    conditional UPDATE that only succeeds for an unused, unrevoked token, so
+    no separate lookup is needed. Rotated and revoked keys also go into a
+    Bloom filter and an exact LRU. A filter miss (the common case) goes
+    straight to the UPDATE; an LRU hit is rejected without touching the
+    database; a filter-only hit (keys loaded by ``rebuild_filter`` or evicted
+    from the LRU) is confirmed with a read before any write transaction.
+    Presenting an already-rotated token revokes its whole family.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, cache_size: int):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.cache_size = cache_size
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._revoked: OrderedDict[str, None] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            "issued": 0,
+            "rotated": 0,
+            "reused": 0,
+            "fast_rejects": 0,
+            "filter_rejects": 0,
+            "filter_false_positives": 0,
+            "pruned": 0,
+        }
+
+    # In-memory front
+
+    def _remember(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._bloom.add(key)
+                self._revoked[key] = None
+                self._revoked.move_to_end(key)
+            while len(self._revoked) > self.cache_size:
+                self._revoked.popitem(last=False)
+
+    def remember_revoked_family(self, family_id: str | None) -> None:
+        """Add a family revoked by another worker to the fast-reject front"""
+        if family_id is not None:
+            self._remember(f"f:{family_id}")
+
+    def _known_revoked(self, key: str) -> bool | None:
+        """False if never rotated or revoked, True if known exactly, None if the DB must decide"""
+        if key not in self._bloom:
+            return False
+        if key in self._revoked:
+            return True
+        return None
+
+    async def _confirm_revoked(self, jti: str, family_id: str, user_id: int) -> None:
+        """Resolve a filter-only hit with a read; raises if the token was rotated or revoked"""
+        rt = refresh_tokens_table
+        async with get_async_read_db_session() as db:
+            row = (await db.execute(select(rt.c.used_at, rt.c.revoked).where(rt.c.jti == jti))).first()
+        if row is not None and row.revoked:
+            self.stats["filter_rejects"] += 1
+            self._remember(f"f:{family_id}")
+            raise RefreshTokenReuse()
+        if row is not None and row.used_at is not None:
+            self.stats["filter_rejects"] += 1
+            self._remember(f"j:{jti}")
+            await self._revoke_reused(family_id, user_id)
+            raise RefreshTokenReuse()
+        # Unknown tokens are left to the claim, which reports them as invalid
+        self.stats["filter_false_positives"] += 1
+
+    # Token lifecycle
+
+    async def issue(self, user_id: int, family_id: str | None = None) -> tuple[str, str]:
+        """Record a new refresh token; returns (jti, family_id)"""
+        jti = uuid.uuid4().hex
+        family_id = family_id or uuid.uuid4().hex
+        now = datetime.utcnow()
+        async with get_async_db_session() as db:
+            await db.execute(insert(refresh_tokens_table).values(
+                jti=jti,
+                family_id=family_id,
+                user_id=user_id,
+                expires_at=now + timedelta(days=settings.refresh_token_ttl_days),
+                revoked=False,
+                created_at=now,
+            ))
+            await db.commit()
+        self.stats["issued"] += 1
+        return jti, family_id
+
+    async def rotate(self, jti: str, family_id: str, user_id: int) -> str:
+        """Consume a refresh token and issue its successor in the same family; returns the new jti"""
+        family_revoked = self._known_revoked(f"f:{family_id}")
+        token_used = self._known_revoked(f"j:{jti}")
+        if family_revoked:
+            self.stats["fast_rejects"] += 1
+            raise RefreshTokenReuse()
+        if token_used:
+            self.stats["fast_rejects"] += 1
+            await self._revoke_reused(family_id, user_id)
+            raise RefreshTokenReuse()
+        if family_revoked is None or token_used is None:
+            await self._confirm_revoked(jti, family_id, user_id)
+
+        rt = refresh_tokens_table
+        now = datetime.utcnow()
+        new_jti = uuid.uuid4().hex
+        async with get_async_db_session() as db:
+            claimed = await db.execute(
+                update(rt)
+                .where(rt.c.jti == jti, rt.c.used_at.is_(None), rt.c.revoked == False, rt.c.expires_at > now)
+                .values(used_at=now)
+            )
+            if claimed.rowcount == 0:
+                row = (await db.execute(
+                    select(rt.c.used_at, rt.c.revoked).where(rt.c.jti == jti)
+                )).first()
+                if row is None or (row.used_at is None and not row.revoked):
+                    raise InvalidRefreshToken()
+                await db.rollback()
+            else:
+                await db.execute(insert(rt).values(
+                    jti=new_jti,
+                    family_id=family_id,
+                    user_id=user_id,
+                    expires_at=now + timedelta(days=settings.refresh_token_ttl_days),
+                    revoked=False,
+                    created_at=now,
+                ))
+                await db.commit()
+                self._remember(f"j:{jti}")
+                self.stats["rotated"] += 1
+                return new_jti
+
+        await self._revoke_reused(family_id, user_id)
+        raise RefreshTokenReuse()
+
+    async def _revoke_reused(self, family_id: str, user_id: int) -> None:
+        self.stats["reused"] += 1
+        logger.warning("Refresh token reuse detected; revoking family", user_id=user_id, family_id=family_id)
+        await self.revoke_family(family_id)
+
+    async def revoke_family(self, family_id: str) -> None:
+        """Revoke every token issued from one login (logout, reuse)"""
+        rt = refresh_tokens_table
+        async with get_async_db_session() as db:
+            await db.execute(update(rt).where(rt.c.family_id == family_id).values(revoked=True))
+            await db.run_sync(invalidation_bus.publish, REFRESH_FAMILIES_CHANNEL, family_id)
+            await db.commit()
+        self._remember(f"f:{family_id}")
+
+    # Maintenance (scheduler jobs)
+
+    def prune(self, batch_size: int | None = None, max_batches: int | None = None) -> dict:
+        """Delete expired tokens in bounded chunks"""
+        batch_size = batch_size or settings.refresh_token_prune_batch_size
+        max_batches = max_batches or settings.refresh_token_prune_max_batches
+        rt = refresh_tokens_table
+        start = time.perf_counter()
+        now = datetime.utcnow()
+        deleted, backlog = 0, True
+        with get_db_session() as db:
+            for _ in range(max_batches):
+                ids = select(rt.c.jti).where(rt.c.expires_at < now).limit(batch_size)
+                count = db.execute(delete(rt).where(rt.c.jti.in_(ids))).rowcount
+                db.commit()
+                deleted += count
+                if count < batch_size:
+                    backlog = False
+                    break
+        self.stats["pruned"] += deleted
+        return {"deleted": deleted, "backlog": backlog, "duration_seconds": time.perf_counter() - start}
+
+    def rebuild_filter(self) -> int:
+        """Reload the Bloom filter from live rotated/revoked rows, dropping expired keys"""
+        rt = refresh_tokens_table
+        bloom = BloomFilter(self.capacity, self.error_rate)
+        families = set()
+        with get_read_db_session() as db:
+            rows = db.execute(
+                select(rt.c.jti, rt.c.family_id, rt.c.revoked)
+                .where(or_(rt.c.used_at.is_not(None), rt.c.revoked == True), rt.c.expires_at >= datetime.utcnow())
+                .execution_options(yield_per=10000)
+            )
+            for jti, family_id, revoked in rows:
+                bloom.add(f"j:{jti}")
+                if revoked:
+                    families.add(family_id)
+        for family_id in families:
+            bloom.add(f"f:{family_id}")
+        with self._lock:
+            # Keys remembered while the rebuild was reading
+            for key in self._revoked:
+                bloom.add(key)
+            self._bloom = bloom
+        if bloom.count > self.capacity:
+            logger.warning(
+                "Refresh token filter over capacity; raise REFRESH_TOKEN_FILTER_CAPACITY",
+                keys=bloom.count, capacity=self.capacity,
+            )
+        return bloom.count
+
+
+refresh_tokens = RefreshTokenStore(
+    capacity=settings.refresh_token_filter_capacity,
+    error_rate=settings.refresh_token_filter_error_rate,
+    cache_size=settings.refresh_token_revoked_cache_size,
+)
+
+invalidation_bus.subscribe(REFRESH_FAMILIES_CHANNEL, refresh_tokens.remember_revoked_family)
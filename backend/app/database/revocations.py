@@ -0,0 +1,102 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from .invalidation import invalidation_bus, USERS_CHANNEL
+from .models import User
+from .versions import get_cache_version, bump_cache_version
+from ..config import settings
+
+TOKENS_CACHE = "tokens"
+
+users_table = User.__table__
+
+
+class TokenRevocations:
+    """Minimum accepted access-token version per user, kept only while old tokens can live.
+
+    Password resets and deactivations bump ``users.token_version`` and the
+    shared ``tokens`` cache version. Each worker re-reads recently changed
+    users at most once per ``check_interval`` seconds, so checking a token is
+    normally a dict lookup.
+    """
+
+    def __init__(self, check_interval: float, retention_seconds: float):
+        self.check_interval = check_interval
+        self.retention_seconds = retention_seconds
+        self.version = -1
+        self._min_versions: dict[int, tuple[int, float]] = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def revoke(self, user_id: int, min_version: int) -> None:
+        """Reject this user's access tokens carrying a version below ``min_version``"""
+        now = time.monotonic()
+        with self._lock:
+            current = self._min_versions.get(user_id)
+            if current is None or min_version >= current[0]:
+                self._min_versions[user_id] = (min_version, now)
+
+    def is_current(self, user_id: int, token_version: int) -> bool:
+        entry = self._min_versions.get(user_id)
+        return entry is None or token_version >= entry[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._min_versions.clear()
+        self.version = -1
+
+    def prune(self) -> None:
+        """Forget revocations older than the access-token lifetime"""
+        cutoff = time.monotonic() - self.retention_seconds
+        with self._lock:
+            expired = [uid for uid, (_, at) in self._min_versions.items() if at < cutoff]
+            for uid in expired:
+                del self._min_versions[uid]
+
+    def needs_check(self) -> bool:
+        """Whether ``ensure_fresh`` would query; lets callers skip opening a session"""
+        return time.monotonic() - self._checked_at >= self.check_interval
+
+    def ensure_fresh(self, db) -> None:
+        """Pick up revocations made by other workers since the last check"""
+        if not self.needs_check():
+            return
+        version = get_cache_version(db, TOKENS_CACHE)
+        if version != self.version:
+            cutoff = datetime.utcnow() - timedelta(seconds=self.retention_seconds)
+            rows = db.execute(
+                select(users_table.c.id, users_table.c.token_version).where(
+                    users_table.c.token_version > 0, users_table.c.updated_at >= cutoff
+                )
+            ).all()
+            for user_id, token_version in rows:
+                self.revoke(user_id, token_version)
+            self.version = version
+        self._checked_at = time.monotonic()
+        self.prune()
+
+    def __len__(self) -> int:
+        return len(self._min_versions)
+
+
+token_revocations = TokenRevocations(
+    check_interval=settings.token_revocation_check_seconds,
+    retention_seconds=settings.access_token_ttl_minutes * 60,
+)
+
+
+def bump_token_version(db, user_id: int) -> int:
+    """Increment a user's token version in the caller's transaction; returns the new version"""
+    db.execute(
+        users_table.update()
+        .where(users_table.c.id == user_id)
+        .values(token_version=users_table.c.token_version + 1, updated_at=datetime.utcnow())
+    )
+    version = db.execute(
+        select(users_table.c.token_version).where(users_table.c.id == user_id)
+    ).scalar() or 0
+    bump_cache_version(db, TOKENS_CACHE)
+    # The cached snapshot carries token_version, so other workers must drop it
+    invalidation_bus.publish(db, USERS_CHANNEL, user_id)
+    return version
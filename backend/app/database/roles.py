@@ -0,0 +1,119 @@
+import threading
+import time
+from sqlalchemy import event, select
+from .models import Role
+from .versions import get_cache_version, bump_cache_version
+from ..config import settings
+
+ROLES_CACHE = "roles"
+
+roles_table = Role.__table__
+
+
+class RoleCycleError(ValueError):
+    """Raised when the role parent chain loops back on itself"""
+
+
+def build_role_closure(parents: dict[int, int | None]) -> dict[int, frozenset[int]]:
+    """Map each role id to itself plus all of its ancestors"""
+    closure: dict[int, frozenset[int]] = {}
+    for role_id in parents:
+        if role_id in closure:
+            continue
+        chain = []
+        seen = set()
+        current = role_id
+        while current is not None and current not in closure:
+            if current in seen:
+                raise RoleCycleError(f"Role hierarchy cycle detected at role {current}")
+            seen.add(current)
+            chain.append(current)
+            current = parents.get(current)
+        inherited = closure[current] if current is not None else frozenset()
+        for node in reversed(chain):
+            inherited = inherited | {node}
+            closure[node] = inherited
+    return closure
+
+
+class RoleHierarchy:
+    """In-memory ancestor map for roles, reloaded when the shared version moves.
+
+    Each worker checks the ``cache_versions`` row at most once per
+    ``check_interval`` seconds, so a permission check is normally a pure
+    set operation over the precomputed closure.
+    """
+
+    def __init__(self, check_interval: float):
+        self.check_interval = check_interval
+        self.version = -1
+        self._state: tuple[dict[int, str], dict[int, frozenset[int]]] = ({}, {})
+        self._checked_at = 0.0
+        self._stale = True
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        self._stale = True
+
+    def _needs_check(self) -> bool:
+        return self._stale or time.monotonic() - self._checked_at >= self.check_interval
+
+    def load(self, rows, version: int) -> None:
+        """Rebuild the closure from (id, name, parent_role_id) rows"""
+        rows = list(rows)
+        closure = build_role_closure({row[0]: row[2] for row in rows})
+        with self._lock:
+            self._state = ({row[0]: row[1] for row in rows}, closure)
+            self.version = version
+            self._stale = False
+            self._checked_at = time.monotonic()
+
+    def ensure_fresh(self, db) -> None:
+        """Reload from the DB if invalidated locally or bumped by another worker"""
+        if not self._needs_check():
+            return
+        version = get_cache_version(db, ROLES_CACHE)
+        if self._stale or version != self.version:
+            rows = db.execute(
+                select(roles_table.c.id, roles_table.c.name, roles_table.c.parent_role_id)
+            ).all()
+            self.load(rows, version)
+        else:
+            self._checked_at = time.monotonic()
+
+    def expand(self, role_ids) -> set[str]:
+        """Names of the given roles and every role they inherit from"""
+        names, closure = self._state
+        result = set()
+        for role_id in role_ids:
+            for ancestor in closure.get(role_id, ()):
+                result.add(names[ancestor])
+        return result
+
+
+role_hierarchy = RoleHierarchy(check_interval=settings.role_cache_check_seconds)
+
+
+def _check_parent_cycle(connection, role_id: int | None, parent_id: int | None) -> None:
+    current = parent_id
+    seen = set()
+    while current is not None:
+        if current == role_id or current in seen:
+            raise RoleCycleError(f"Setting parent {parent_id} on role {role_id} creates a cycle")
+        seen.add(current)
+        current = connection.execute(
+            select(roles_table.c.parent_role_id).where(roles_table.c.id == current)
+        ).scalar()
+
+
+@event.listens_for(Role, "before_update")
+def _validate_role_parent(mapper, connection, target):
+    _check_parent_cycle(connection, target.id, target.parent_role_id)
+
+
+@event.listens_for(Role, "after_insert")
+@event.listens_for(Role, "after_update")
+@event.listens_for(Role, "after_delete")
+def _on_role_change(mapper, connection, target):
+    bump_cache_version(connection, ROLES_CACHE)
+    role_hierarchy.invalidate()
@@ -1,12 +1,16 @@
+from sqlalchemy import select, update, func
 from sqlalchemy.orm import Session
 from .models import User, PasswordResetToken
-from . import get_db_session
+from . import get_db_session, get_read_db_session, get_async_db_session, get_async_read_db_session
+from .cache import UserSnapshot, user_cache
+from .counters import dashboard_counters
+from .revocations import token_revocations, bump_token_version
 from datetime import datetime
 
 
 def get_dashboard_metrics() -> dict:
     """Cross-table query for dashboard metrics"""
-    with get_db_session() as db:
+    with get_read_db_session() as db:
         total_users = db.query(User).count()
         active_users = db.query(User).filter(User.is_active == True).count()
         pending_resets = db.query(PasswordResetToken).filter(
@@ -23,13 +27,27 @@ def get_dashboard_metrics() -> dict:
 
 def get_user_by_id(user_id: int) -> User | None:
     """Get user by ID"""
-    with get_db_session() as db:
+    with get_read_db_session() as db:
         return db.query(User).filter(User.id == user_id).first()
 
 
+def get_user_snapshot(user_id: int) -> UserSnapshot | None:
+    """Get a cached snapshot of a user, loading from the DB on a miss"""
+    snapshot = user_cache.get(user_id)
+    if snapshot is not None:
+        return snapshot
+    generation = user_cache.generation()
+    user = get_user_by_id(user_id)
+    if user is None:
+        return None
+    snapshot = UserSnapshot.from_user(user)
+    user_cache.put(snapshot, generation)
+    return snapshot
+
+
 def get_user_by_email(email: str) -> User | None:
     """Get user by email"""
-    with get_db_session() as db:
+    with get_read_db_session() as db:
         return db.query(User).filter(User.email == email).first()
 
 
@@ -40,4 +58,87 @@ def create_user(email: str, hashed_password: str) -> User:
         db.add(user)
         db.commit()
         db.refresh(user)
-        return user
\ No newline at end of file
+        user_cache.invalidate(user.id)
+        dashboard_counters.user_created(bool(user.is_active))
+        return user
+
+
+# Async variants used by the request handlers; the sync versions above remain
+# for Alembic, scripts and background jobs.
+
+async def get_dashboard_metrics_async() -> dict:
+    """Cross-table query for dashboard metrics"""
+    async with get_async_read_db_session() as db:
+        total_users = await db.scalar(select(func.count()).select_from(User))
+        active_users = await db.scalar(
+            select(func.count()).select_from(User).where(User.is_active == True)
+        )
+        pending_resets = await db.scalar(
+            select(func.count()).select_from(PasswordResetToken).where(
+                PasswordResetToken.used == False,
+                PasswordResetToken.expires_at > datetime.utcnow()
+            )
+        )
+        
+        return {
+            "total_users": total_users,
+            "active_users": active_users,
+            "pending_resets": pending_resets
+        }
+
+
+async def get_user_by_id_async(user_id: int) -> User | None:
+    """Get user by ID"""
+    async with get_async_read_db_session() as db:
+        return await db.get(User, user_id)
+
+
+async def get_user_snapshot_async(user_id: int) -> UserSnapshot | None:
+    """Get a cached snapshot of a user, loading from the DB on a miss"""
+    snapshot = user_cache.get(user_id)
+    if snapshot is not None:
+        return snapshot
+    generation = user_cache.generation()
+    user = await get_user_by_id_async(user_id)
+    if user is None:
+        return None
+    snapshot = UserSnapshot.from_user(user)
+    user_cache.put(snapshot, generation)
+    return snapshot
+
+
+async def get_user_by_email_async(email: str) -> User | None:
+    """Get user by email"""
+    async with get_async_read_db_session() as db:
+        result = await db.execute(select(User).where(User.email == email))
+        return result.scalars().first()
+
+
+async def create_user_async(email: str, hashed_password: str) -> User:
+    """Create a new user"""
+    async with get_async_db_session() as db:
+        user = User(email=email, hashed_password=hashed_password)
+        db.add(user)
+        await db.commit()
+        await db.refresh(user)
+        user_cache.invalidate(user.id)
+        dashboard_counters.user_created(bool(user.is_active))
+        return user
+
+
+async def deactivate_user_async(user_id: int) -> bool:
+    """Deactivate a user account"""
+    async with get_async_db_session() as db:
+        result = await db.execute(
+            update(User)
+            .where(User.id == user_id, User.is_active == True)
+            .values(is_active=False)
+        )
+        if result.rowcount > 0:
+            token_version = await db.run_sync(bump_token_version, user_id)
+        await db.commit()
+    user_cache.invalidate(user_id)
+    if result.rowcount > 0:
+        token_revocations.revoke(user_id, token_version)
+        dashboard_counters.user_deactivated()
+    return result.rowcount > 0
@@ -0,0 +1,26 @@
+from datetime import datetime
+from sqlalchemy import select, update, insert
+from .models import CacheVersion
+
+cache_versions = CacheVersion.__table__
+
+
+def get_cache_version(conn, name: str) -> int:
+    """Read the shared version counter for a cache (0 if never bumped)"""
+    version = conn.execute(
+        select(cache_versions.c.version).where(cache_versions.c.name == name)
+    ).scalar()
+    return version or 0
+
+
+def bump_cache_version(conn, name: str) -> None:
+    """Increment a cache's version so every worker reloads it on next check"""
+    result = conn.execute(
+        update(cache_versions)
+        .where(cache_versions.c.name == name)
+        .values(version=cache_versions.c.version + 1, updated_at=datetime.utcnow())
+    )
+    if result.rowcount == 0:
+        conn.execute(
+            insert(cache_versions).values(name=name, version=1, updated_at=datetime.utcnow())
+        )
@@ -1,69 +1,387 @@
 import os
+import gzip
 import shutil
-import asyncio
+import sqlite3
+import time
 from datetime import datetime, timedelta
+from typing import Callable
+from urllib.parse import quote
+
+import structlog
+from sqlalchemy import select, update, delete
+from sqlalchemy.engine import make_url
 from ..database.models import PasswordResetToken
 from ..database import get_db_session
 from ..config import settings
 
+logger = structlog.get_logger("app")
+
+try:
+    import boto3
+    from boto3.s3.transfer import TransferConfig
+    from botocore.config import Config as BotoConfig
+except Exception:  # pragma: no cover - boto3 may not be installed in all envs
+    boto3 = None
+    TransferConfig = None
+    BotoConfig = None
+
+
+class BackupError(Exception):
+    """Raised when a backup cannot be produced or fails verification"""
+
+
+class _BackupRestarted(Exception):
+    pass
+
+
+backup_stats = {
+    "runs": 0,
+    "failures": 0,
+    "last_path": None,
+    "last_finished_at": None,
+    "last_duration_seconds": None,
+    "last_db_bytes": None,
+    "last_compressed_bytes": None,
+}
+
+
+def database_path() -> str:
+    """Filesystem path of the configured SQLite database"""
+    path = make_url(settings.database_url).database
+    if not path or path == ":memory:":
+        raise BackupError("Backups require a file-based SQLite database")
+    return path
+
+
+def _copy_online(db_path: str, dest: str) -> None:
+    """Copy the live database with the SQLite backup API in paged steps.
+
+    Sleeping in the progress callback yields between steps so writers keep
+    going. If concurrent writes restart the copy too often, fall back to a
+    single-step copy, which holds only a read snapshot under WAL.
+    """
+    restarts = 0
+    last_remaining = None
+
+    def progress(status, remaining, total):
+        nonlocal restarts, last_remaining
+        if last_remaining is not None and remaining > last_remaining:
+            restarts += 1
+            if restarts > settings.backup_max_restarts:
+                raise _BackupRestarted()
+        last_remaining = remaining
+        if remaining and settings.backup_step_sleep_seconds > 0:
+            time.sleep(settings.backup_step_sleep_seconds)
+
+    src = sqlite3.connect(f"file:{quote(db_path)}?mode=ro", uri=True)
+    try:
+        dst = sqlite3.connect(dest)
+        try:
+            try:
+                src.backup(dst, pages=settings.backup_pages_per_step, progress=progress)
+            except _BackupRestarted:
+                src.backup(dst, pages=-1)
+            # The copy inherits WAL mode, which makes every later reader
+            # create -wal/-shm files next to it; a snapshot needs neither
+            dst.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            dst.close()
+    finally:
+        src.close()
 
-def local_backup(db_path: str = "./data/service.db", backups_dir: str = "./data/backups") -> str:
-    """Create a local backup of the SQLite database"""
+
+def verify_backup(path: str) -> None:
+    """Run PRAGMA integrity_check against a backup file"""
+    # A read-only connection cannot remove the -wal/-shm files it creates for
+    # a WAL-mode file (older snapshots); drop the ones this check left behind
+    siblings = [path + suffix for suffix in ("-wal", "-shm") if not os.path.exists(path + suffix)]
+    conn = sqlite3.connect(f"file:{quote(path)}?mode=ro", uri=True)
+    try:
+        result = conn.execute("PRAGMA integrity_check").fetchone()[0]
+    finally:
+        conn.close()
+        for sibling in siblings:
+            if os.path.exists(sibling):
+                os.remove(sibling)
+    if result != "ok":
+        raise BackupError(f"Backup integrity check failed: {result}")
+
+
+def compress_file(path: str, dest: str) -> None:
+    with open(path, "rb") as src, gzip.open(dest, "wb", compresslevel=settings.backup_compression_level) as out:
+        shutil.copyfileobj(src, out, length=1024 * 1024)
+
+
+def local_backup(db_path: str | None = None, backups_dir: str | None = None,
+                 on_snapshot: Callable[[str, str], None] | None = None) -> str:
+    """Create a verified, gzip-compressed online backup of the SQLite database.
+
+    ``on_snapshot(snapshot_path, backup_path)`` is called with the verified,
+    uncompressed snapshot before it is removed.
+    """
+    db_path = db_path or database_path()
+    backups_dir = backups_dir or settings.backups_dir
     os.makedirs(backups_dir, exist_ok=True)
+    start = time.perf_counter()
     ts = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
-    dest = os.path.join(backups_dir, f"service-{ts}.db")
-    shutil.copy2(db_path, dest)
+    snapshot = os.path.join(backups_dir, f"service-{ts}.db.tmp")
+    dest = os.path.join(backups_dir, f"service-{ts}.db.gz")
+    backup_stats["runs"] += 1
+    try:
+        _copy_online(db_path, snapshot)
+        verify_backup(snapshot)
+        db_bytes = os.path.getsize(snapshot)
+        compress_file(snapshot, dest + ".tmp")
+        os.replace(dest + ".tmp", dest)
+        if on_snapshot is not None:
+            on_snapshot(snapshot, dest)
+    except Exception:
+        backup_stats["failures"] += 1
+        if os.path.exists(dest + ".tmp"):
+            os.remove(dest + ".tmp")
+        raise
+    finally:
+        if os.path.exists(snapshot):
+            os.remove(snapshot)
+
+    backup_stats.update(
+        last_path=dest,
+        last_finished_at=datetime.utcnow().isoformat(),
+        last_duration_seconds=time.perf_counter() - start,
+        last_db_bytes=db_bytes,
+        last_compressed_bytes=os.path.getsize(dest),
+    )
     return dest
 
 
+def _backup_files(backups_dir: str) -> list[str]:
+    """Completed local backups, newest first"""
+    if not os.path.isdir(backups_dir):
+        return []
+    names = [
+        name for name in os.listdir(backups_dir)
+        if name.startswith("service-") and name.endswith(".db.gz")
+    ]
+    return sorted((os.path.join(backups_dir, name) for name in names), reverse=True)
+
+
+def _expired_by_policy(index: int, modified: datetime, keep: int, max_age_days: int) -> bool:
+    """Retention policy: the newest backup always survives; beyond that keep
+    at most ``keep`` backups and none older than ``max_age_days`` (0 = no age limit)"""
+    if index == 0:
+        return False
+    if keep > 0 and index >= keep:
+        return True
+    return max_age_days > 0 and modified < datetime.utcnow() - timedelta(days=max_age_days)
+
+
+def prune_local_backups(backups_dir: str | None = None, keep: int | None = None,
+                        max_age_days: int | None = None) -> list[str]:
+    """Delete local backups that fall outside the retention policy"""
+    backups_dir = backups_dir or settings.backups_dir
+    keep = settings.backup_retention_count if keep is None else keep
+    max_age_days = settings.backup_retention_days if max_age_days is None else max_age_days
+    removed = []
+    for index, path in enumerate(_backup_files(backups_dir)):
+        modified = datetime.utcfromtimestamp(os.path.getmtime(path))
+        if _expired_by_policy(index, modified, keep, max_age_days):
+            os.remove(path)
+            removed.append(path)
+    return removed
+
+
+class R2Uploader:
+    """Uploads backups to R2 (or any S3-compatible store) with one long-lived client.
+
+    Pass ``client`` to use a stub or a local S3-compatible endpoint in tests.
+    """
+
+    def __init__(self, client=None, bucket: str | None = None, prefix: str | None = None):
+        self._client = client
+        self.bucket = bucket if bucket is not None else settings.r2_bucket
+        self.prefix = prefix if prefix is not None else settings.r2_prefix
+
+    @property
+    def client(self):
+        if self._client is None:
+            if boto3 is None:
+                raise BackupError("boto3 is required for R2 uploads")
+            endpoint = settings.r2_endpoint_url or f"https://{settings.r2_account_id}.r2.cloudflarestorage.com"
+            self._client = boto3.client(
+                "s3",
+                endpoint_url=endpoint,
+                aws_access_key_id=settings.r2_access_key_id,
+                aws_secret_access_key=settings.r2_secret_access_key,
+                config=BotoConfig(
+                    max_pool_connections=max(10, settings.r2_max_concurrency),
+                    retries={"max_attempts": 5, "mode": "adaptive"},
+                ),
+            )
+        return self._client
+
+    def _transfer_config(self):
+        if TransferConfig is None:
+            return None
+        chunk = settings.r2_multipart_chunk_mb * 1024 * 1024
+        return TransferConfig(
+            multipart_threshold=chunk,
+            multipart_chunksize=chunk,
+            max_concurrency=settings.r2_max_concurrency,
+            use_threads=True,
+        )
+
+    def upload(self, filepath: str, key: str | None = None) -> str:
+        """Stream a local (already compressed) backup file to the bucket"""
+        key = key or self.prefix + os.path.basename(filepath)
+        extra = {"Config": self._transfer_config()} if TransferConfig is not None else {}
+        with open(filepath, "rb") as f:
+            self.client.upload_fileobj(f, self.bucket, key, **extra)
+        return key
+
+    def prune(self, keep: int | None = None, max_age_days: int | None = None) -> list[str]:
+        """Delete remote backups that fall outside the retention policy"""
+        keep = settings.backup_retention_count if keep is None else keep
+        max_age_days = settings.backup_retention_days if max_age_days is None else max_age_days
+        objects = []
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix + "service-"):
+            objects.extend(page.get("Contents", []))
+        objects.sort(key=lambda obj: obj["Key"], reverse=True)
+
+        doomed = []
+        for index, obj in enumerate(objects):
+            modified = obj["LastModified"].replace(tzinfo=None)
+            if _expired_by_policy(index, modified, keep, max_age_days):
+                doomed.append(obj["Key"])
+        for start in range(0, len(doomed), 1000):
+            self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={"Objects": [{"Key": key} for key in doomed[start:start + 1000]], "Quiet": True},
+            )
+        return doomed
+
+
+r2_uploader = R2Uploader()
+
+
 def upload_to_r2(filepath: str):
-    """Upload backup to Cloudflare R2"""
+    """Upload backup to Cloudflare R2 and apply remote retention.
+
+    Failures are logged and re-raised so the scheduled job is recorded as
+    failed (and runs again) instead of silently leaving R2 behind.
+    """
     if not settings.enable_r2_backup:
         return
-        
+
     try:
-        import boto3
-        s3 = boto3.client(
-            "s3",
-            endpoint_url=f"https://{settings.r2_account_id}.r2.cloudflarestorage.com",
-            aws_access_key_id=settings.r2_access_key_id,
-            aws_secret_access_key=settings.r2_secret_access_key,
-        )
-        
-        key = os.path.basename(filepath)
-        with open(filepath, "rb") as f:
-            s3.upload_fileobj(f, settings.r2_bucket, key)
+        key = r2_uploader.upload(filepath)
+        removed = r2_uploader.prune()
     except Exception as e:
-        print(f"R2 backup failed: {e}")
+        logger.error("R2 backup failed", path=filepath, error=str(e))
+        raise
+    print(f"Uploaded backup to R2: {key} (pruned {len(removed)})")
 
 
-async def daily_backup_loop():
-    """Run daily backups"""
-    while True:
-        try:
-            backup_path = local_backup()
-            print(f"Created backup: {backup_path}")
-            upload_to_r2(backup_path)
-        except Exception as e:
-            print(f"Backup failed: {e}")
-        
-        await asyncio.sleep(60 * 60 * 24)  # 24 hours
-
-
-async def cleanup_expired_tokens():
-    """Clean up expired password reset tokens"""
-    while True:
-        try:
-            with get_db_session() as db:
-                expired = db.query(PasswordResetToken).filter(
-                    PasswordResetToken.expires_at < datetime.utcnow(),
-                    PasswordResetToken.active == True
-                )
-                count = expired.update({"active": False})
-                db.commit()
-                if count > 0:
-                    print(f"Cleaned up {count} expired tokens")
-        except Exception as e:
-            print(f"Token cleanup failed: {e}")
-        
-        await asyncio.sleep(3600)  # 1 hour
\ No newline at end of file
+def run_daily_backup() -> dict:
+    """Full backup, local/remote retention and upload (one scheduler run)"""
+    on_snapshot = None
+    if settings.enable_incremental_backups:
+        # Each full backup anchors a fresh incremental chain
+        from .incremental_backups import start_chain
+        on_snapshot = start_chain
+    backup_path = local_backup(on_snapshot=on_snapshot)
+    print(
+        f"Created backup: {backup_path} "
+        f"({backup_stats['last_compressed_bytes']} bytes, "
+        f"{backup_stats['last_duration_seconds']:.2f}s)"
+    )
+    removed = prune_local_backups()
+    if settings.enable_incremental_backups:
+        from .incremental_backups import prune_chains
+        removed += prune_chains()
+    if removed:
+        print(f"Pruned {len(removed)} local backups")
+    upload_to_r2(backup_path)
+    return {"path": backup_path, "pruned": len(removed)}
+
+
+token_cleanup_stats = {
+    "runs": 0,
+    "last_deactivated": None,
+    "last_deleted": None,
+    "last_duration_seconds": None,
+    "last_backlog": False,
+}
+
+
+def _chunked(db, statement_for_ids, batch_size: int, max_batches: int) -> tuple[int, bool]:
+    """Apply a statement to id batches; returns (rows, hit_batch_cap)"""
+    total = 0
+    for _ in range(max_batches):
+        count = db.execute(statement_for_ids(batch_size)).rowcount
+        db.commit()
+        total += count
+        if count < batch_size:
+            return total, False
+    return total, True
+
+
+def purge_reset_tokens(batch_size: int | None = None, max_batches: int | None = None) -> dict:
+    """Deactivate expired reset tokens and delete dead ones in bounded chunks"""
+    batch_size = batch_size or settings.token_cleanup_batch_size
+    max_batches = max_batches or settings.token_cleanup_max_batches
+    start = time.perf_counter()
+    now = datetime.utcnow()
+    cutoff = now - timedelta(hours=settings.token_retention_hours)
+    prt = PasswordResetToken
+
+    def deactivate(limit):
+        ids = select(prt.id).where(prt.active == True, prt.expires_at < now).limit(limit)
+        return update(prt).where(prt.id.in_(ids)).values(active=False).execution_options(synchronize_session=False)
+
+    def delete_dead(limit):
+        # Used tokens expire within the hour too, so expiry alone identifies dead rows
+        ids = select(prt.id).where(prt.expires_at < cutoff).limit(limit)
+        return delete(prt).where(prt.id.in_(ids)).execution_options(synchronize_session=False)
+
+    with get_db_session() as db:
+        deactivated, backlog_a = _chunked(db, deactivate, batch_size, max_batches)
+        deleted, backlog_b = _chunked(db, delete_dead, batch_size, max_batches)
+
+    result = {
+        "deactivated": deactivated,
+        "deleted": deleted,
+        "duration_seconds": time.perf_counter() - start,
+        "backlog": backlog_a or backlog_b,
+    }
+    token_cleanup_stats["runs"] += 1
+    token_cleanup_stats.update(
+        last_deactivated=deactivated,
+        last_deleted=deleted,
+        last_duration_seconds=result["duration_seconds"],
+        last_backlog=result["backlog"],
+    )
+    return result
+
+
+def next_cleanup_interval(result: dict, current: float) -> float:
+    """Run again soon while there is a backlog; back off when there is nothing to do"""
+    low = settings.token_cleanup_min_interval_seconds
+    high = settings.token_cleanup_max_interval_seconds
+    if result["backlog"]:
+        return low
+    if result["deactivated"] or result["deleted"]:
+        return max(low, min(high, current))
+    return min(high, current * 2)
+
+
+def cleanup_expired_tokens() -> dict:
+    """Clean up expired password reset tokens (one scheduler run)"""
+    result = purge_reset_tokens()
+    if result["deactivated"] or result["deleted"]:
+        print(
+            f"Token cleanup: deactivated {result['deactivated']}, "
+            f"deleted {result['deleted']} in {result['duration_seconds']:.2f}s"
+            + (" (backlog remains)" if result["backlog"] else "")
+        )
+    return result
@@ -0,0 +1,293 @@
+import csv
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Iterable, Iterator, TextIO
+
+import structlog
+from pydantic import EmailStr, TypeAdapter, ValidationError
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..config import settings
+from ..database import get_db_session, get_read_db_session
+from ..database.cache import user_cache
+from ..database.counters import dashboard_counters
+from ..database.models import Role, User, UserRole
+from ..middleware.auth import get_password_hash
+
+logger = structlog.get_logger("app")
+
+FORMATS = ("csv", "ndjson")
+MIN_PASSWORD_LENGTH = 8
+TRUE_VALUES = {"1", "true", "yes", "y", "on"}
+FALSE_VALUES = {"0", "false", "no", "n", "off"}
+
+_email_adapter = TypeAdapter(EmailStr)
+
+
+@dataclass
+class ImportRow:
+    line: int
+    email: str
+    password: str
+    roles: tuple[str, ...] = ()
+    is_active: bool = True
+
+
+@dataclass
+class RowError:
+    line: int
+    email: str | None
+    error: str
+
+
+@dataclass
+class ImportReport:
+    """Outcome of an import: counts plus the first ``max_errors`` row errors"""
+    created: int = 0
+    failed: int = 0
+    roles_assigned: int = 0
+    seconds: float = 0.0
+    errors: list[RowError] = field(default_factory=list)
+    max_errors: int = 1000
+
+    @property
+    def errors_truncated(self) -> bool:
+        return self.failed > len(self.errors)
+
+    def fail(self, line: int, email: str | None, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append(RowError(line, email, error))
+
+
+def format_for(filename: str | None) -> str | None:
+    """Guess the input format from a file name"""
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return None
+
+
+# Parsing
+
+def read_records(stream: TextIO, fmt: str) -> Iterator[tuple[int, dict | None, str | None]]:
+    """Yield (line, record, error) for each input record without loading the file"""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        if not reader.fieldnames or "email" not in reader.fieldnames:
+            raise ValueError("CSV input needs a header row with at least email and password")
+        for record in reader:
+            yield reader.line_num, record, None
+        return
+    for line, text in enumerate(stream, 1):
+        if not text.strip():
+            continue
+        try:
+            record = json.loads(text)
+        except json.JSONDecodeError as e:
+            yield line, None, f"Invalid JSON: {e.msg}"
+            continue
+        if not isinstance(record, dict):
+            yield line, None, "Expected a JSON object"
+            continue
+        yield line, record, None
+
+
+def _parse_roles(value) -> tuple[str, ...]:
+    if value is None:
+        return ()
+    if isinstance(value, str):
+        # CSV cells list roles separated by ";" (or "," when quoted)
+        value = value.replace(",", ";").split(";")
+    if not isinstance(value, list):
+        raise ValueError("roles must be a list or a ;-separated string")
+    return tuple(str(role).strip() for role in value if str(role).strip())
+
+
+def _parse_bool(value) -> bool:
+    if value is None or value == "":
+        return True
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f"is_active must be true or false, got {value!r}")
+
+
+def parse_row(line: int, record: dict, default_roles: Iterable[str] = ()) -> ImportRow:
+    """Validate one input record, raising ValueError with a per-row message"""
+    try:
+        email = _email_adapter.validate_python(str(record.get("email") or "").strip())
+    except ValidationError:
+        raise ValueError("Invalid email address")
+    password = record.get("password")
+    if not isinstance(password, str) or len(password) < MIN_PASSWORD_LENGTH:
+        raise ValueError(f"Password must be at least {MIN_PASSWORD_LENGTH} characters")
+    roles = tuple(dict.fromkeys((*default_roles, *_parse_roles(record.get("roles")))))
+    return ImportRow(line, email, password, roles, _parse_bool(record.get("is_active")))
+
+
+# Import
+
+def load_role_ids() -> dict[str, int]:
+    with get_read_db_session() as db:
+        return {name: role_id for role_id, name in db.execute(select(Role.id, Role.name))}
+
+
+def _valid_rows(
+    stream: TextIO,
+    fmt: str,
+    default_roles: tuple[str, ...],
+    role_ids: dict[str, int],
+    report: ImportReport,
+) -> Iterator[ImportRow]:
+    seen: set[str] = set()
+    for line, record, error in read_records(stream, fmt):
+        if error is not None:
+            report.fail(line, None, error)
+            continue
+        try:
+            row = parse_row(line, record, default_roles)
+        except ValueError as e:
+            email = record.get("email")
+            report.fail(line, None if email is None else str(email), str(e))
+            continue
+        unknown = [role for role in row.roles if role not in role_ids]
+        if unknown:
+            report.fail(line, row.email, f"Unknown role: {', '.join(unknown)}")
+        elif row.email in seen:
+            report.fail(line, row.email, "Duplicate email in input")
+        else:
+            seen.add(row.email)
+            yield row
+
+
+def _batches(rows: Iterator[ImportRow], size: int) -> Iterator[list[ImportRow]]:
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def _insert(rows: list[ImportRow], hashes: list[str], role_ids: dict[str, int]) -> tuple[dict[str, int], int]:
+    """Insert one batch in a single transaction; returns (email -> id, role rows)"""
+    users = User.__table__
+    stmt = (
+        insert(users)
+        .on_conflict_do_nothing(index_elements=[users.c.email])
+        .returning(users.c.id, users.c.email)
+    )
+    with get_db_session() as db:
+        # executemany with RETURNING: skipped conflicts simply return no row
+        created = {
+            email: user_id
+            for user_id, email in db.execute(stmt, [
+                {"email": row.email, "hashed_password": hashed, "is_active": row.is_active}
+                for row, hashed in zip(rows, hashes)
+            ])
+        }
+        assignments = [
+            {"user_id": created[row.email], "role_id": role_ids[role]}
+            for row in rows if row.email in created
+            for role in row.roles
+        ]
+        if assignments:
+            db.execute(insert(UserRole.__table__), assignments)
+        db.commit()
+    return created, len(assignments)
+
+
+def _store(rows: list[ImportRow], hashes: list[str], role_ids: dict[str, int], report: ImportReport) -> None:
+    try:
+        created, assigned = _insert(rows, hashes, role_ids)
+    except SQLAlchemyError as e:
+        if len(rows) == 1:
+            report.fail(rows[0].line, rows[0].email, f"Database error: {e.__class__.__name__}")
+            return
+        # Retry row by row so one bad row only fails itself
+        for row, hashed in zip(rows, hashes):
+            _store([row], [hashed], role_ids, report)
+        return
+    for row in rows:
+        if row.email not in created:
+            report.fail(row.line, row.email, "Email already registered")
+    for user_id in created.values():
+        user_cache.invalidate(user_id)
+    dashboard_counters.users_created(
+        len(created), sum(1 for row in rows if row.is_active and row.email in created)
+    )
+    report.created += len(created)
+    report.roles_assigned += assigned
+
+
+def _import_batch(
+    batch: list[ImportRow],
+    role_ids: dict[str, int],
+    pool: ProcessPoolExecutor,
+    workers: int,
+    report: ImportReport,
+) -> None:
+    with get_read_db_session() as db:
+        existing = set(db.scalars(select(User.email).where(User.email.in_([row.email for row in batch]))))
+    rows = []
+    for row in batch:
+        if row.email in existing:
+            report.fail(row.line, row.email, "Email already registered")
+        else:
+            rows.append(row)
+    if not rows:
+        return
+    # bcrypt dominates the cost; spread it over every worker process
+    chunksize = max(1, len(rows) // (workers * 4))
+    hashes = list(pool.map(get_password_hash, [row.password for row in rows], chunksize=chunksize))
+    _store(rows, hashes, role_ids, report)
+
+
+def import_users(
+    stream: TextIO,
+    fmt: str,
+    default_roles: Iterable[str] = (),
+    batch_size: int | None = None,
+    workers: int | None = None,
+) -> ImportReport:
+    """Create users (and their role assignments) from CSV or NDJSON input.
+
+    Input is read incrementally and committed in batches; rows that fail
+    validation or insertion are reported in the returned ImportReport
+    instead of aborting the import.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported import format {fmt!r}")
+    start = time.perf_counter()
+    default_roles = tuple(default_roles)
+    role_ids = load_role_ids()
+    unknown = [role for role in default_roles if role not in role_ids]
+    if unknown:
+        raise ValueError(f"Unknown role: {', '.join(unknown)}")
+    batch_size = batch_size or settings.bulk_import_batch_size
+    workers = workers or settings.bulk_import_hash_workers or os.cpu_count() or 1
+    report = ImportReport(max_errors=settings.bulk_import_max_errors)
+
+    # spawn, not fork: the API calls this from a threaded server process
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        for batch in _batches(_valid_rows(stream, fmt, default_roles, role_ids, report), batch_size):
+            _import_batch(batch, role_ids, pool, workers, report)
+
+    report.seconds = time.perf_counter() - start
+    logger.info(
+        "Bulk user import finished",
+        created=report.created, failed=report.failed,
+        roles_assigned=report.roles_assigned, seconds=round(report.seconds, 2),
+    )
+    return report
@@ -1,6 +1,14 @@
 import os
+import re
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
 from typing import Optional
 
+import structlog
+from sqlalchemy import delete, select, update
+
 try:
     import boto3
     from botocore.exceptions import ClientError
@@ -9,6 +17,53 @@ except Exception:  # pragma: no cover - boto3 may not be installed in all envs
     ClientError = Exception
 
 from ..config import settings
+from ..database import get_async_db_session
+from ..database.models import EmailOutbox
+
+logger = structlog.get_logger("app")
+
+
+class SesTransport:
+    """Send through Amazon SES; raises on failure so the dispatcher can retry"""
+
+    def __init__(self, client, from_email: str):
+        self._client = client
+        self.from_email = from_email
+
+    def send(self, to_email: str, subject: str, html_body: str) -> None:
+        self._client.send_email(
+            Source=self.from_email,
+            Destination={'ToAddresses': [to_email]},
+            Message={
+                'Subject': {'Data': subject},
+                'Body': {'Html': {'Data': html_body}},
+            },
+        )
+
+
+class ConsoleTransport:
+    """Dev transport used when SES is not configured; prints the links so flows can be followed"""
+
+    _LINK = re.compile(r'href="([^"]+)"')
+
+    def send(self, to_email: str, subject: str, html_body: str) -> None:
+        print(f"[email] Dev mode: would send '{subject}' to {to_email}")
+        for link in self._LINK.findall(html_body):
+            print(f"[email]   {link}")
+
+
+class FakeTransport:
+    """In-memory transport for tests; ``fail_times`` makes the next N sends raise"""
+
+    def __init__(self, fail_times: int = 0):
+        self.sent: list[dict] = []
+        self.fail_times = fail_times
+
+    def send(self, to_email: str, subject: str, html_body: str) -> None:
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise RuntimeError("fake transport failure")
+        self.sent.append({"to": to_email, "subject": subject, "html": html_body})
 
 
 class EmailService:
@@ -23,6 +78,10 @@ class EmailService:
                 aws_secret_access_key=settings.aws_secret_access_key,
                 region_name=settings.aws_default_region or 'us-east-1',
             )
+        if self._enabled and self._client is not None:
+            self.transport = SesTransport(self._client, self.from_email)
+        else:
+            self.transport = ConsoleTransport()
 
     def _build_reset_html(self, reset_url: str) -> str:
         return f"""
@@ -32,25 +91,23 @@ class EmailService:
         <p>This link will expire in 1 hour.</p>
         """
 
-    def send_password_reset(self, to_email: str, reset_token: str) -> bool:
+    def password_reset_message(self, to_email: str, reset_token: str) -> EmailOutbox:
+        """Outbox row for a password reset email (add it to the caller's session)"""
         reset_url = f"{settings.frontend_url.rstrip('/')}/auth/reset?token={reset_token}"
-        subject = "Password Reset Request"
-        html_body = self._build_reset_html(reset_url)
-
-        # In non-configured environments, log and succeed to avoid blocking dev
-        if not self._enabled or self._client is None:
-            print(f"[email] Dev mode: would send password reset to {to_email}: {reset_url}")
-            return True
+        return EmailOutbox(
+            to_email=to_email,
+            subject="Password Reset Request",
+            html_body=self._build_reset_html(reset_url),
+            status="pending",
+            attempts=0,
+            next_attempt_at=datetime.utcnow(),
+        )
 
+    def send_password_reset(self, to_email: str, reset_token: str) -> bool:
+        """Send a reset email synchronously (scripts); handlers use the outbox"""
+        message = self.password_reset_message(to_email, reset_token)
         try:
-            self._client.send_email(
-                Source=self.from_email,
-                Destination={'ToAddresses': [to_email]},
-                Message={
-                    'Subject': {'Data': subject},
-                    'Body': {'Html': {'Data': html_body}},
-                },
-            )
+            self.transport.send(message.to_email, message.subject, message.html_body)
             return True
         except ClientError as e:  # pragma: no cover
             print(f"Email sending failed: {e}")
@@ -59,3 +116,174 @@ class EmailService:
 
 email_service = EmailService()
 
+
+class RateLimiter:
+    """Token bucket limiting sends to ``rate`` per second"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class EmailDispatcher:
+    """Background sender for the email outbox.
+
+    Rows are claimed with a conditional UPDATE so several workers can run a
+    dispatcher without double-sending. Failures are retried with exponential
+    backoff; after ``email_max_attempts`` a message is dead-lettered. Bodies
+    carry live reset links, so they are blanked once a message is sent or
+    dead, and ``prune`` deletes those rows after ``email_outbox_retention_hours``.
+    """
+
+    def __init__(self, service: EmailService):
+        self.service = service
+        # Every worker process runs a dispatcher, so each gets an equal share
+        # of the account-wide SES rate
+        self.limiter = RateLimiter(settings.ses_max_send_rate / settings.resolved_web_workers)
+        self._semaphore = asyncio.Semaphore(settings.email_dispatch_concurrency)
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"sent": 0, "retried": 0, "dead": 0}
+
+    def notify(self) -> None:
+        """Wake the dispatcher after enqueueing so delivery is not delayed by polling"""
+        self._wake.set()
+
+    def _backoff(self, attempts: int) -> float:
+        delay = settings.email_retry_base_seconds * (2 ** (attempts - 1))
+        return delay * random.uniform(0.8, 1.2)
+
+    async def _claim_due(self) -> list[EmailOutbox]:
+        now = datetime.utcnow()
+        stale = now - timedelta(seconds=settings.email_claim_timeout_seconds)
+        claimed = []
+        async with get_async_db_session() as db:
+            # Messages stuck in 'sending' belonged to a worker that died mid-send
+            await db.execute(
+                update(EmailOutbox)
+                .where(EmailOutbox.status == "sending", EmailOutbox.updated_at < stale)
+                .values(status="pending")
+            )
+            result = await db.execute(
+                select(EmailOutbox)
+                .where(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now)
+                .order_by(EmailOutbox.next_attempt_at)
+                .limit(settings.email_batch_size)
+            )
+            for message in result.scalars().all():
+                claim = await db.execute(
+                    update(EmailOutbox)
+                    .where(EmailOutbox.id == message.id, EmailOutbox.status == "pending")
+                    .values(status="sending", updated_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+                if claim.rowcount:
+                    claimed.append(message)
+            await db.commit()
+        return claimed
+
+    async def _record(self, message_id: int, **values) -> None:
+        async with get_async_db_session() as db:
+            await db.execute(
+                update(EmailOutbox).where(EmailOutbox.id == message_id).values(**values)
+            )
+            await db.commit()
+
+    async def _deliver(self, message: EmailOutbox) -> None:
+        async with self._semaphore:
+            await self.limiter.acquire()
+            try:
+                await asyncio.to_thread(
+                    self.service.transport.send, message.to_email, message.subject, message.html_body
+                )
+            except Exception as e:
+                attempts = message.attempts + 1
+                if attempts >= settings.email_max_attempts:
+                    self.stats["dead"] += 1
+                    logger.error("Email dead-lettered", email_id=message.id, attempts=attempts, error=str(e))
+                    await self._record(
+                        message.id, status="dead", attempts=attempts, last_error=str(e), html_body=""
+                    )
+                else:
+                    self.stats["retried"] += 1
+                    await self._record(
+                        message.id,
+                        status="pending",
+                        attempts=attempts,
+                        last_error=str(e),
+                        next_attempt_at=datetime.utcnow() + timedelta(seconds=self._backoff(attempts)),
+                    )
+                return
+            self.stats["sent"] += 1
+            await self._record(
+                message.id,
+                status="sent",
+                attempts=message.attempts + 1,
+                sent_at=datetime.utcnow(),
+                html_body="",
+            )
+
+    async def dispatch_once(self) -> int:
+        """Claim and deliver one batch of due messages; returns how many were claimed"""
+        messages = await self._claim_due()
+        if messages:
+            await asyncio.gather(*(self._deliver(m) for m in messages))
+        return len(messages)
+
+    async def prune(self) -> int:
+        """Delete sent and dead messages past the retention window"""
+        cutoff = datetime.utcnow() - timedelta(hours=settings.email_outbox_retention_hours)
+        async with get_async_db_session() as db:
+            result = await db.execute(
+                delete(EmailOutbox).where(
+                    EmailOutbox.status.in_(("sent", "dead")), EmailOutbox.updated_at < cutoff
+                )
+            )
+            await db.commit()
+        return result.rowcount
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                claimed = await self.dispatch_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Email dispatch failed", error=str(e))
+                claimed = 0
+            if claimed >= settings.email_batch_size:
+                continue
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=settings.email_poll_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="email-dispatcher")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+email_dispatcher = EmailDispatcher(email_service)
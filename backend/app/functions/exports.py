@@ -0,0 +1,60 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Sequence
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+# Rows are buffered into chunks of about this size before being sent
+CHUNK_BYTES = 64 * 1024
+
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+async def ndjson_chunks(rows: AsyncIterator, fields: Sequence[str]) -> AsyncIterator[bytes]:
+    buffer = []
+    size = 0
+    async for row in rows:
+        line = json.dumps({f: _plain(getattr(row, f)) for f in fields}, separators=(",", ":")) + "\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            yield "".join(buffer).encode()
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+async def csv_chunks(rows: AsyncIterator, fields: Sequence[str]) -> AsyncIterator[bytes]:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(fields)
+    async for row in rows:
+        writer.writerow([_plain(getattr(row, f)) for f in fields])
+        if out.tell() >= CHUNK_BYTES:
+            yield out.getvalue().encode()
+            out.seek(0)
+            out.truncate()
+    if out.tell():
+        yield out.getvalue().encode()
+
+
+def export_response(rows: AsyncIterator, fields: Sequence[str], fmt: str, name: str) -> StreamingResponse:
+    """Stream rows as NDJSON or CSV without materialising the result set"""
+    if fmt not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be ndjson or csv")
+    chunks = ndjson_chunks(rows, fields) if fmt == "ndjson" else csv_chunks(rows, fields)
+    filename = f"{name}-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}"
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,102 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from fastapi import HTTPException
+
+from ..config import settings
+
+
+class HashingBusyError(HTTPException):
+    """Raised when the password hashing queue is full"""
+
+    def __init__(self):
+        super().__init__(status_code=503, detail="Server busy, please retry shortly")
+
+
+class PasswordHashExecutor:
+    """Bounded worker pool for bcrypt so hashing never runs on the event loop.
+
+    bcrypt releases the GIL while it works, so a small thread pool gives real
+    parallelism. Submissions beyond ``workers + max_queue`` in flight are
+    rejected immediately with a 503 rather than queueing without bound.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = max(1, workers)
+        self.capacity = self.workers + max(0, max_queue)
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.stats = {
+            "calls": 0,
+            "rejected": 0,
+            "total_seconds": 0.0,
+            "max_seconds": 0.0,
+        }
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self._in_flight - self.workers)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="pwhash"
+            )
+        return self._executor
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self.stats["rejected"] += 1
+                raise HashingBusyError()
+            self._in_flight += 1
+
+    def _release(self, elapsed: float) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self.stats["calls"] += 1
+            self.stats["total_seconds"] += elapsed
+            if elapsed > self.stats["max_seconds"]:
+                self.stats["max_seconds"] = elapsed
+
+    async def run(self, func: Callable, *args):
+        """Run a hashing function in the pool, rejecting when saturated"""
+        self._acquire()
+        start = time.perf_counter()
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BaseException:
+            self._release(time.perf_counter() - start)
+            raise
+        # Released when the thread finishes, not when the caller stops
+        # waiting: a cancelled request must not free a slot bcrypt still uses
+        future.add_done_callback(lambda _: self._release(time.perf_counter() - start))
+        return await asyncio.wrap_future(future)
+
+    def snapshot(self) -> dict:
+        """Current counters for diagnostics and metrics export"""
+        with self._lock:
+            data = dict(self.stats)
+            data["in_flight"] = self._in_flight
+        data["queue_depth"] = max(0, data["in_flight"] - self.workers)
+        data["avg_seconds"] = data["total_seconds"] / data["calls"] if data["calls"] else 0.0
+        return data
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHashExecutor(
+    workers=settings.password_hash_workers,
+    max_queue=settings.password_hash_max_queue,
+)
@@ -0,0 +1,378 @@
+import os
+import gzip
+import json
+import shutil
+import sqlite3
+import struct
+import hashlib
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+import structlog
+
+from .backups import (
+    BackupError,
+    _copy_online,
+    database_path,
+    local_backup,
+    r2_uploader,
+    upload_to_r2,
+    verify_backup,
+)
+from ..config import settings
+
+logger = structlog.get_logger("app")
+
+# An incremental chain lives in <backups_dir>/incremental/chain-<ts>/ and is
+# anchored on the full backup service-<ts>.db.gz. Each capture reads the live
+# database file once under a pinned read snapshot, compares per-page digests
+# against the previous capture and writes only the changed pages as a gzip'd
+# delta. Restoring replays the deltas over the base in order, up to a chosen
+# point in time, and verifies the result.
+
+INCREMENTAL_DIR = "incremental"
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+HASHES_FILE = "pages.hashes"
+DIGEST_SIZE = 16
+_PAGE_HEADER = struct.Struct(">I")
+PIN_ATTEMPTS = 5
+
+incremental_stats = {
+    "captures": 0,
+    "failures": 0,
+    "last_path": None,
+    "last_finished_at": None,
+    "last_duration_seconds": None,
+    "last_changed_pages": None,
+    "last_delta_bytes": None,
+}
+
+
+def _root(backups_dir: str | None) -> str:
+    return os.path.join(backups_dir or settings.backups_dir, INCREMENTAL_DIR)
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    with open(path + ".tmp", "wb") as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+
+
+def _page_size(db_file: str) -> int:
+    conn = sqlite3.connect(f"file:{quote(db_file)}?mode=ro", uri=True)
+    try:
+        return conn.execute("PRAGMA page_size").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _iter_pages(db_file: str, page_size: int, page_count: int | None = None):
+    with open(db_file, "rb") as f:
+        index = 0
+        while page_count is None or index < page_count:
+            page = f.read(page_size)
+            if not page:
+                return
+            if index == 0:
+                # Header bytes 18-19 are 2 for WAL files; record the rollback
+                # journal values the base snapshot has, so restores match it
+                page = page[:18] + b"\x01\x01" + page[20:]
+            yield page
+            index += 1
+
+
+def _wal_backfilled(db_path: str) -> bool:
+    """Run a passive checkpoint; True if every WAL frame is now in the main file"""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        busy, log, checkpointed = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+    finally:
+        conn.close()
+    return busy == 0 and log == checkpointed
+
+
+@contextmanager
+def _consistent_source(db_path: str, snapshot: str):
+    """Yield ``(path, page_size, page_count)`` for a file holding one committed state.
+
+    Under WAL the live file is used directly: inside a read transaction, once a
+    passive checkpoint has copied every frame, the main file holds exactly this
+    transaction's snapshot, and later checkpoints cannot write past it until
+    the transaction ends. Writers are never blocked. If they keep the WAL
+    ahead (or the database is not in WAL mode), one online copy is taken
+    instead. ``page_count`` is None when the whole file is to be read.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        if conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+            for attempt in range(PIN_ATTEMPTS):
+                conn.execute("BEGIN")
+                conn.execute("SELECT count(*) FROM sqlite_master").fetchone()
+                if _wal_backfilled(db_path):
+                    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+                    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+                    yield db_path, page_size, page_count
+                    return
+                conn.execute("COMMIT")
+                time.sleep(0.01 * (attempt + 1))
+    finally:
+        conn.close()
+    _copy_online(db_path, snapshot)
+    yield snapshot, _page_size(snapshot), None
+
+
+def _digest(page: bytes) -> bytes:
+    return hashlib.blake2b(page, digest_size=DIGEST_SIZE).digest()
+
+
+def load_manifest(chain_dir: str) -> dict:
+    with open(os.path.join(chain_dir, MANIFEST_FILE), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_manifest(chain_dir: str, manifest: dict) -> None:
+    _write_atomic(os.path.join(chain_dir, MANIFEST_FILE), json.dumps(manifest, indent=2).encode())
+
+
+def current_chain(backups_dir: str | None = None) -> str | None:
+    """Directory of the chain new deltas are appended to, if any"""
+    root = _root(backups_dir)
+    try:
+        with open(os.path.join(root, CURRENT_FILE), encoding="utf-8") as f:
+            chain_dir = os.path.join(root, f.read().strip())
+    except FileNotFoundError:
+        return None
+    if not os.path.exists(os.path.join(chain_dir, MANIFEST_FILE)):
+        return None
+    return chain_dir
+
+
+def start_chain(snapshot: str, base_backup: str, backups_dir: str | None = None) -> str:
+    """Anchor a new chain on a full backup, using its verified uncompressed snapshot"""
+    root = _root(backups_dir)
+    name = "chain-" + os.path.basename(base_backup).removeprefix("service-").removesuffix(".db.gz")
+    chain_dir = os.path.join(root, name)
+    os.makedirs(chain_dir, exist_ok=True)
+
+    page_size = _page_size(snapshot)
+    hashes = b"".join(_digest(page) for page in _iter_pages(snapshot, page_size))
+    manifest = {
+        "chain": name,
+        "page_size": page_size,
+        "base": {
+            "file": os.path.relpath(base_backup, chain_dir),
+            "created_at": datetime.utcnow().isoformat(),
+            "page_count": len(hashes) // DIGEST_SIZE,
+        },
+        "deltas": [],
+    }
+    _save_manifest(chain_dir, manifest)
+    _write_atomic(os.path.join(chain_dir, HASHES_FILE), hashes)
+    _write_atomic(os.path.join(root, CURRENT_FILE), name.encode())
+    return chain_dir
+
+
+def _full_backup_with_chain(db_path: str | None, backups_dir: str | None) -> str:
+    return local_backup(
+        db_path,
+        backups_dir,
+        on_snapshot=lambda snapshot, dest: start_chain(snapshot, dest, backups_dir),
+    )
+
+
+def capture_incremental(db_path: str | None = None, backups_dir: str | None = None) -> str | None:
+    """Write the pages changed since the last capture as a delta on the current chain.
+
+    Starts a new chain (with a full backup) when there is none, when the chain
+    reached ``backup_incremental_max_deltas`` or when the page size changed.
+    Returns the new file, or None when nothing changed.
+    """
+    db_path = db_path or database_path()
+    chain_dir = current_chain(backups_dir)
+    if chain_dir is None:
+        return _full_backup_with_chain(db_path, backups_dir)
+    manifest = load_manifest(chain_dir)
+    if len(manifest["deltas"]) >= settings.backup_incremental_max_deltas:
+        return _full_backup_with_chain(db_path, backups_dir)
+
+    start = time.perf_counter()
+    incremental_stats["captures"] += 1
+    snapshot = os.path.join(chain_dir, "capture.tmp")
+    seq = len(manifest["deltas"]) + 1
+    delta_name = f"delta-{seq:06d}.bin.gz"
+    delta_path = os.path.join(chain_dir, delta_name)
+    delta_tmp = delta_path + ".tmp"
+    try:
+        with _consistent_source(db_path, snapshot) as (source, page_size, page_count):
+            if page_size != manifest["page_size"]:
+                page_size = None
+            else:
+                with open(os.path.join(chain_dir, HASHES_FILE), "rb") as f:
+                    previous = f.read()
+                hashes = bytearray()
+                changed = 0
+                with gzip.open(delta_tmp, "wb", compresslevel=settings.backup_compression_level) as out:
+                    for index, page in enumerate(_iter_pages(source, page_size, page_count)):
+                        digest = _digest(page)
+                        hashes += digest
+                        offset = index * DIGEST_SIZE
+                        if previous[offset:offset + DIGEST_SIZE] != digest:
+                            out.write(_PAGE_HEADER.pack(index + 1))
+                            out.write(page)
+                            changed += 1
+        if page_size is None:
+            return _full_backup_with_chain(db_path, backups_dir)
+        page_count = len(hashes) // DIGEST_SIZE
+
+        if changed == 0 and page_count == len(previous) // DIGEST_SIZE:
+            os.remove(delta_tmp)
+            delta_path = None
+        else:
+            os.replace(delta_tmp, delta_path)
+            manifest["deltas"].append({
+                "file": delta_name,
+                "created_at": datetime.utcnow().isoformat(),
+                "page_count": page_count,
+                "changed_pages": changed,
+            })
+            # Manifest before digests: a crash in between only makes the next
+            # delta a superset, never loses a change.
+            _save_manifest(chain_dir, manifest)
+            _write_atomic(os.path.join(chain_dir, HASHES_FILE), bytes(hashes))
+    except Exception:
+        incremental_stats["failures"] += 1
+        if os.path.exists(delta_tmp):
+            os.remove(delta_tmp)
+        raise
+    finally:
+        if os.path.exists(snapshot):
+            os.remove(snapshot)
+
+    incremental_stats.update(
+        last_path=delta_path,
+        last_finished_at=datetime.utcnow().isoformat(),
+        last_duration_seconds=time.perf_counter() - start,
+        last_changed_pages=changed,
+        last_delta_bytes=os.path.getsize(delta_path) if delta_path else 0,
+    )
+    return delta_path
+
+
+def restore(output: str, backups_dir: str | None = None, chain: str | None = None,
+            until: datetime | None = None) -> dict:
+    """Rebuild a database file from a chain's base plus deltas up to ``until``"""
+    if until is not None and until.tzinfo is not None:
+        # Manifest times are naive UTC
+        until = until.astimezone(timezone.utc).replace(tzinfo=None)
+    chain_dir = os.path.join(_root(backups_dir), chain) if chain else current_chain(backups_dir)
+    if chain_dir is None or not os.path.exists(os.path.join(chain_dir, MANIFEST_FILE)):
+        raise BackupError("No incremental backup chain found")
+    manifest = load_manifest(chain_dir)
+    base_created = datetime.fromisoformat(manifest["base"]["created_at"])
+    if until is not None and until < base_created:
+        raise BackupError(f"Chain {manifest['chain']} starts at {base_created.isoformat()}, after the requested time")
+
+    page_size = manifest["page_size"]
+    base_path = os.path.normpath(os.path.join(chain_dir, manifest["base"]["file"]))
+    tmp = output + ".tmp"
+    with gzip.open(base_path, "rb") as src, open(tmp, "wb") as dst:
+        shutil.copyfileobj(src, dst, length=1024 * 1024)
+
+    applied = 0
+    restored_to = base_created
+    with open(tmp, "r+b") as f:
+        for delta in manifest["deltas"]:
+            created = datetime.fromisoformat(delta["created_at"])
+            if until is not None and created > until:
+                break
+            with gzip.open(os.path.join(chain_dir, delta["file"]), "rb") as d:
+                while header := d.read(_PAGE_HEADER.size):
+                    (pgno,) = _PAGE_HEADER.unpack(header)
+                    f.seek((pgno - 1) * page_size)
+                    f.write(d.read(page_size))
+            f.truncate(delta["page_count"] * page_size)
+            applied += 1
+            restored_to = created
+
+    try:
+        verify_backup(tmp)
+    except BackupError:
+        os.remove(tmp)
+        raise
+    os.replace(tmp, output)
+    return {
+        "chain": manifest["chain"],
+        "deltas_applied": applied,
+        "restored_to": restored_to.isoformat(),
+        "output": output,
+    }
+
+
+def prune_chains(backups_dir: str | None = None) -> list[str]:
+    """Remove chains whose base backup was deleted by retention"""
+    root = _root(backups_dir)
+    if not os.path.isdir(root):
+        return []
+    current = current_chain(backups_dir)
+    removed = []
+    for name in os.listdir(root):
+        chain_dir = os.path.join(root, name)
+        if not name.startswith("chain-") or not os.path.isdir(chain_dir):
+            continue
+        try:
+            manifest = load_manifest(chain_dir)
+            base_path = os.path.normpath(os.path.join(chain_dir, manifest["base"]["file"]))
+        except (OSError, ValueError, KeyError):
+            base_path = None
+        if base_path is None or not os.path.exists(base_path):
+            shutil.rmtree(chain_dir)
+            removed.append(chain_dir)
+            if current == chain_dir:
+                os.remove(os.path.join(root, CURRENT_FILE))
+    return removed
+
+
+def _ship(path: str) -> None:
+    """Upload a new full backup, or every unshipped delta of the chain plus its manifest, to R2.
+
+    Deltas are marked ``shipped`` in the manifest once uploaded, so a failed
+    run leaves them to the next one. Failures are logged and re-raised so
+    the scheduled job is recorded as failed.
+    """
+    if not settings.enable_r2_backup:
+        return
+    if path.endswith(".db.gz"):
+        upload_to_r2(path)
+        return
+    chain_dir = os.path.dirname(path)
+    chain = os.path.basename(chain_dir)
+    manifest = load_manifest(chain_dir)
+
+    def upload(name: str) -> None:
+        r2_uploader.upload(
+            os.path.join(chain_dir, name), key=f"{r2_uploader.prefix}{INCREMENTAL_DIR}/{chain}/{name}"
+        )
+
+    try:
+        for delta in manifest["deltas"]:
+            if not delta.get("shipped"):
+                upload(delta["file"])
+                delta["shipped"] = True
+        # Upload the manifest as it will be saved, with these deltas marked shipped
+        _save_manifest(chain_dir, manifest)
+        upload(MANIFEST_FILE)
+    except Exception as e:
+        _save_manifest(chain_dir, manifest)
+        logger.error("R2 incremental upload failed", chain=chain, path=path, error=str(e))
+        raise
+
+
+def run_incremental_backup() -> str | None:
+    """Capture and ship one incremental backup (one scheduler run)"""
+    path = capture_incremental()
+    if path:
+        _ship(path)
+    return path
@@ -0,0 +1,242 @@
+import threading
+from bisect import bisect_left
+from typing import Callable, Iterable
+
+# Prometheus-style metrics without locks on the hot path. Each thread writes
+# only to its own cell, and cells are summed when /metrics is scraped, so an
+# increment is a dict lookup plus a float add.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Cells:
+    """Per-thread float arrays; thread ids are reused only after a thread exits"""
+
+    __slots__ = ("size", "_cells")
+
+    def __init__(self, size: int):
+        self.size = size
+        self._cells: dict[int, list[float]] = {}
+
+    def cell(self) -> list[float]:
+        tid = threading.get_ident()
+        cell = self._cells.get(tid)
+        if cell is None:
+            cell = self._cells.setdefault(tid, [0.0] * self.size)
+        return cell
+
+    def totals(self) -> list[float]:
+        totals = [0.0] * self.size
+        for cell in list(self._cells.values()):
+            for i, value in enumerate(cell):
+                totals[i] += value
+        return totals
+
+
+class _CounterChild:
+    __slots__ = ("_cells",)
+
+    def __init__(self):
+        self._cells = _Cells(1)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._cells.cell()[0] += amount
+
+    def value(self) -> float:
+        return self._cells.totals()[0]
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._cells.cell()[0] -= amount
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "_cells")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        # one slot per bucket, one for +Inf, then the running sum
+        self._cells = _Cells(len(buckets) + 2)
+
+    def observe(self, value: float) -> None:
+        cell = self._cells.cell()
+        cell[bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple, object] = {}
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _label_text(self, values: tuple, extra: dict | None = None) -> str:
+        pairs = list(zip(self.labelnames, values))
+        if extra:
+            pairs.extend(extra.items())
+        if not pairs:
+            return ""
+        inner = ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs)
+        return "{" + inner + "}"
+
+    def samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.inc(amount)
+
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{self._label_text(values)} {_fmt(child.value())}"
+            for values, child in list(self._children.items())
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default.dec(amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+    def samples(self) -> list[str]:
+        lines = []
+        for values, child in list(self._children.items()):
+            totals = child._cells.totals()
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, totals):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{self._label_text(values, {'le': _fmt(bound)})} {_fmt(cumulative)}")
+            cumulative += totals[len(self.buckets)]
+            lines.append(f"{self.name}_bucket{self._label_text(values, {'le': '+Inf'})} {_fmt(cumulative)}")
+            lines.append(f"{self.name}_count{self._label_text(values)} {_fmt(cumulative)}")
+            lines.append(f"{self.name}_sum{self._label_text(values)} {_fmt(totals[-1])}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """Metric whose samples are read from existing state at scrape time"""
+
+    def __init__(self, name: str, help: str, kind: str, labelnames: Iterable[str],
+                 collect: Callable[[], Iterable[tuple[tuple, float]]]):
+        self.kind = kind
+        self.collect = collect
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+
+    def samples(self) -> list[str]:
+        try:
+            values = list(self.collect())
+        except Exception:
+            return []
+        return [f"{self.name}{self._label_text(labels)} {_fmt(value)}" for labels, value in values]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value: float) -> str:
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Iterable[str] = (),
+                  buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name: str, help: str, kind: str, labelnames: Iterable[str],
+                 collect: Callable[[], Iterable[tuple[tuple, float]]]) -> CallbackMetric:
+        return self.register(CallbackMetric(name, help, kind, labelnames, collect))
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in list(self._metrics.values())) + "\n"
+
+
+registry = Registry()
+
+http_requests_total = registry.counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+)
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route")
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served"
+)
+db_queries_total = registry.counter(
+    "db_queries_total", "SQL statements executed", ("engine",)
+)
+db_query_duration_seconds = registry.histogram(
+    "db_query_duration_seconds", "SQL statement latency", ("engine",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+job_duration_seconds = registry.histogram(
+    "job_duration_seconds", "Background job run time", ("job", "status"),
+    buckets=(0.01, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0),
+)
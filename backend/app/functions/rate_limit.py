@@ -0,0 +1,168 @@
+import math
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import case, delete
+from sqlalchemy.dialects.sqlite import insert
+
+from ..config import settings
+from ..database import get_db_session, get_async_db_session
+from ..database.models import RateLimitCounter
+
+
+class RateLimitExceeded(HTTPException):
+    """Raised when a caller is over a rate limit"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(
+            status_code=429,
+            detail="Too many requests, please retry later",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+
+@dataclass(frozen=True)
+class Rule:
+    """At most ``limit`` hits per ``window_seconds``, estimated over a sliding window"""
+    name: str
+    limit: int
+    window_seconds: float
+
+
+@dataclass(frozen=True)
+class Decision:
+    allowed: bool
+    retry_after: float
+
+
+class MemoryStore:
+    """Per-process counters: key -> [window index, hits, previous hits, expiry]"""
+
+    shared = False
+
+    def __init__(self):
+        self._counters: dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    async def hit(self, key: str, window: int, expires_at: float) -> tuple[int, int]:
+        with self._lock:
+            entry = self._counters.get(key)
+            if entry is None or entry[0] < window - 1:
+                entry = self._counters[key] = [window, 1, 0, expires_at]
+            elif entry[0] == window - 1:
+                entry[:] = [window, 1, entry[1], expires_at]
+            else:
+                entry[1] += 1
+            return entry[1], entry[2]
+
+    def evict(self, now: float) -> int:
+        with self._lock:
+            expired = [key for key, entry in self._counters.items() if entry[3] < now]
+            for key in expired:
+                del self._counters[key]
+        return len(expired)
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+
+class SqliteStore:
+    """Counters shared by every worker through one upsert per hit"""
+
+    shared = True
+    table = RateLimitCounter.__table__
+
+    async def hit(self, key: str, window: int, expires_at: float) -> tuple[int, int]:
+        t = self.table
+        stmt = insert(t).values(
+            key=key, window_index=window, hits=1, previous_hits=0,
+            expires_at=datetime.utcfromtimestamp(expires_at),
+        )
+        # Every SET expression sees the old row, so the window roll-over is atomic
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[t.c.key],
+            set_={
+                "previous_hits": case(
+                    (t.c.window_index == window, t.c.previous_hits),
+                    (t.c.window_index == window - 1, t.c.hits),
+                    else_=0,
+                ),
+                "hits": case((t.c.window_index == window, t.c.hits + 1), else_=1),
+                "window_index": window,
+                "expires_at": stmt.excluded.expires_at,
+            },
+        ).returning(t.c.hits, t.c.previous_hits)
+        async with get_async_db_session() as db:
+            count, previous = (await db.execute(stmt)).one()
+            await db.commit()
+        return count, previous
+
+    def evict(self, now: float) -> int:
+        with get_db_session() as db:
+            deleted = db.execute(
+                delete(self.table).where(self.table.c.expires_at < datetime.utcfromtimestamp(now))
+            ).rowcount
+            db.commit()
+        return deleted
+
+
+class RateLimiter:
+    """Sliding-window rate limiting over a pluggable counter store.
+
+    Each key keeps only the current and previous fixed-window counts; the
+    previous window is weighted by how much of it still overlaps the sliding
+    window. That is two integers per key instead of a timestamp per hit.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.stats = {"allowed": 0, "rejected": 0, "evicted": 0}
+
+    async def hit(self, rule: Rule, identity: str) -> Decision:
+        now = time.time()
+        window = int(now // rule.window_seconds)
+        elapsed = now - window * rule.window_seconds
+        expires_at = (window + 2) * rule.window_seconds
+        count, previous = await self.store.hit(f"{rule.name}:{identity}", window, expires_at)
+        weight = 1 - elapsed / rule.window_seconds
+        if previous * weight + count <= rule.limit:
+            self.stats["allowed"] += 1
+            return Decision(True, 0.0)
+        self.stats["rejected"] += 1
+        return Decision(False, rule.window_seconds - elapsed)
+
+    async def check(self, rule: Rule, identity: str) -> None:
+        """Count a hit and raise RateLimitExceeded when over the limit"""
+        if not settings.enable_rate_limiting:
+            return
+        decision = await self.hit(rule, identity)
+        if not decision.allowed:
+            raise RateLimitExceeded(decision.retry_after)
+
+    def evict(self) -> int:
+        """Drop counters whose windows can no longer affect a decision"""
+        evicted = self.store.evict(time.time())
+        self.stats["evicted"] += evicted
+        return evicted
+
+
+def _store_for(backend: str):
+    if backend == "auto":
+        # Per-process counters would multiply every limit by the worker count
+        backend = "memory" if settings.web_workers == 1 else "sqlite"
+    if backend == "sqlite":
+        return SqliteStore()
+    if backend == "memory":
+        return MemoryStore()
+    raise ValueError(f"Unknown rate limit backend {backend!r}")
+
+
+rate_limiter = RateLimiter(_store_for(settings.rate_limit_backend))
+
+login_ip_rule = Rule("login:ip", settings.rate_limit_login_ip_limit, settings.rate_limit_login_ip_window_seconds)
+login_email_rule = Rule("login:email", settings.rate_limit_login_email_limit, settings.rate_limit_login_email_window_seconds)
+reset_ip_rule = Rule("reset:ip", settings.rate_limit_reset_ip_limit, settings.rate_limit_reset_ip_window_seconds)
+reset_email_rule = Rule("reset:email", settings.rate_limit_reset_email_limit, settings.rate_limit_reset_email_window_seconds)
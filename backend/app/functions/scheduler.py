@@ -0,0 +1,360 @@
+import asyncio
+import os
+import random
+import socket
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable
+
+import structlog
+from sqlalchemy import select, update
+from sqlalchemy.dialects.sqlite import insert
+
+from ..config import settings
+from ..database import get_async_db_session
+from ..database.models import JobLease
+from .metrics import job_duration_seconds
+
+logger = structlog.get_logger("app")
+
+
+class CronSchedule:
+    """Minimal five-field cron expression (minute hour day-of-month month day-of-week).
+
+    Supports ``*``, ``*/n``, ``a-b``, ``a-b/n`` and comma lists. Day of week
+    uses 0-6 with 0 = Sunday (7 is also accepted as Sunday). Times are UTC.
+    """
+
+    _RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression: str):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+        self.expression = expression
+        fields = [self._parse(part, lo, hi) for part, (lo, hi) in zip(parts, self._RANGES)]
+        self.minutes, self.hours, self.days, self.months, weekdays = fields
+        self.weekdays = {0 if d == 7 else d for d in weekdays}
+        self._any_day = parts[2] == "*"
+        self._any_weekday = parts[4] == "*"
+
+    @staticmethod
+    def _parse(part: str, lo: int, hi: int) -> set[int]:
+        values = set()
+        for item in part.split(","):
+            step = 1
+            if "/" in item:
+                item, step_text = item.split("/", 1)
+                step = int(step_text)
+            if item == "*":
+                start, end = lo, hi
+            elif "-" in item:
+                start, end = (int(x) for x in item.split("-", 1))
+            else:
+                start = end = int(item)
+            if start < lo or end > hi or start > end or step < 1:
+                raise ValueError(f"Invalid cron field {part!r}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, dt: datetime) -> bool:
+        day_ok = dt.day in self.days
+        weekday_ok = (dt.isoweekday() % 7) in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day_ok and weekday_ok
+        # Standard cron: restricted day-of-month and day-of-week are OR'ed
+        return day_ok or weekday_ok
+
+    def next_after(self, after: datetime) -> datetime:
+        dt = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = dt + timedelta(days=366 * 5)
+        while dt < limit:
+            if dt.month not in self.months:
+                dt = (dt.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+                continue
+            if not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + timedelta(hours=1)
+                continue
+            if dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+                continue
+            return dt
+        raise ValueError(f"Cron expression never fires: {self.expression!r}")
+
+    def delay(self, now: datetime) -> float:
+        return (self.next_after(now) - now).total_seconds()
+
+
+@dataclass
+class Job:
+    """A scheduled unit of work.
+
+    ``interval`` (seconds) or ``cron`` sets the cadence. Blocking functions run
+    in the scheduler's thread pool (``long_running`` ones in a separate pool so
+    they cannot starve short jobs); coroutine functions run on the loop.
+    ``next_delay(result, current_delay)`` lets a job adapt its own interval.
+    Singleton jobs run on exactly one worker, coordinated by a DB lease that
+    also carries the adapted delay and next run time to the other workers.
+    """
+    name: str
+    func: Callable[[], Any]
+    interval: float | None = None
+    cron: str | None = None
+    blocking: bool = True
+    long_running: bool = False
+    singleton: bool = True
+    jitter: float = 0.0
+    run_on_start: bool = False
+    next_delay: Callable[[Any, float], float] | None = None
+    history: deque = field(default_factory=lambda: deque(maxlen=settings.scheduler_history_size))
+    stats: dict = field(default_factory=lambda: {
+        "runs": 0,
+        "failures": 0,
+        "skipped": 0,
+        "total_seconds": 0.0,
+        "last_seconds": None,
+        "last_status": None,
+    })
+
+    def __post_init__(self):
+        if (self.interval is None) == (self.cron is None):
+            raise ValueError(f"Job {self.name} needs exactly one of interval or cron")
+        self._cron = CronSchedule(self.cron) if self.cron else None
+        self._delay = self.interval
+        self._next_run_at: datetime | None = None
+
+    def base_delay(self) -> float:
+        if self._cron is not None:
+            return self._cron.delay(datetime.utcnow())
+        return self._delay
+
+    def wait_seconds(self) -> float:
+        """Time until the next run, following the lease holder's schedule if known"""
+        next_run_at, self._next_run_at = self._next_run_at, None
+        if next_run_at is not None:
+            remaining = (next_run_at - datetime.utcnow()).total_seconds()
+            if remaining > 0:
+                return remaining
+        return self.base_delay()
+
+    def adopt_delay(self, delay: float | None) -> None:
+        """Take over an interval adapted by whichever worker ran the job last"""
+        if delay is not None and self._cron is None:
+            self._delay = delay
+
+
+class Scheduler:
+    """Runs registered jobs as asyncio tasks with leases, jitter and history"""
+
+    def __init__(self):
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.jobs: dict[str, Job] = {}
+        self._tasks: list[asyncio.Task] = []
+        self._running: set[asyncio.Future] = set()
+        self._executor: ThreadPoolExecutor | None = None
+        self._long_executor: ThreadPoolExecutor | None = None
+
+    def add_job(self, job: Job) -> Job:
+        """Register a job, replacing one of the same name while the scheduler is stopped.
+
+        Startup registers on the module-level scheduler, so another lifespan in
+        the same process (test clients, benchmarks) must not trip over the first.
+        """
+        if job.name in self.jobs and self._tasks:
+            raise ValueError(f"Job {job.name} is already running")
+        self.jobs[job.name] = job
+        return job
+
+    # Leases
+    #
+    # Lease I/O goes through the async engine so it never waits behind jobs in
+    # the thread pools. While a job runs its lease is short and renewed every
+    # third of ``scheduler_lease_seconds``; once it finishes the lease is
+    # stretched to just before the next run and records that run time and the
+    # job's current delay for the other workers.
+
+    async def _acquire_lease(self, job: Job) -> bool:
+        now = datetime.utcnow()
+        table = JobLease.__table__
+        expires_at = now + timedelta(seconds=settings.scheduler_lease_seconds)
+        stmt = insert(table).values(name=job.name, owner=self.owner, expires_at=expires_at)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.name],
+            set_={"owner": stmt.excluded.owner, "expires_at": stmt.excluded.expires_at},
+            where=(table.c.expires_at < now) | (table.c.owner == self.owner),
+        )
+        async with get_async_db_session() as db:
+            acquired = (await db.execute(stmt)).rowcount > 0
+            await db.commit()
+            lease = (await db.execute(
+                select(JobLease.delay_seconds, JobLease.next_run_at).where(JobLease.name == job.name)
+            )).first()
+        if lease is not None:
+            job.adopt_delay(lease.delay_seconds)
+            if not acquired:
+                job._next_run_at = lease.next_run_at
+        return acquired
+
+    async def _update_lease(self, job: Job, **values) -> bool:
+        async with get_async_db_session() as db:
+            updated = (await db.execute(
+                update(JobLease)
+                .where(JobLease.name == job.name, JobLease.owner == self.owner)
+                .values(**values)
+            )).rowcount > 0
+            await db.commit()
+        return updated
+
+    async def _renew_lease(self, job: Job) -> None:
+        interval = settings.scheduler_lease_seconds / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                expires_at = datetime.utcnow() + timedelta(seconds=settings.scheduler_lease_seconds)
+                if not await self._update_lease(job, expires_at=expires_at):
+                    logger.warning("Job lease lost while running", job=job.name)
+                    return
+            except Exception as e:
+                logger.error("Renewing job lease failed", job=job.name, error=str(e))
+
+    async def _schedule_lease(self, job: Job) -> None:
+        """Hold the lease until shortly before the next run and publish that run"""
+        delay = job.base_delay()
+        now = datetime.utcnow()
+        await self._update_lease(
+            job,
+            expires_at=now + timedelta(seconds=max(1.0, delay * 0.9)),
+            next_run_at=now + timedelta(seconds=delay),
+            delay_seconds=job._delay,
+        )
+
+    async def _release_leases(self) -> None:
+        # Expired rather than deleted so the next holder keeps the schedule
+        async with get_async_db_session() as db:
+            await db.execute(
+                update(JobLease).where(JobLease.owner == self.owner).values(expires_at=datetime.utcnow())
+            )
+            await db.commit()
+
+    # Execution
+
+    async def _call(self, job: Job):
+        if not job.blocking:
+            return await job.func()
+        loop = asyncio.get_running_loop()
+        executor = self._long_executor if job.long_running else self._executor
+        future = loop.run_in_executor(executor, job.func)
+        # Tracked until the thread finishes, even if this task is cancelled,
+        # so stop() can wait for it
+        self._running.add(future)
+        future.add_done_callback(self._running.discard)
+        return await asyncio.shield(future)
+
+    async def run_job(self, job: Job) -> Any:
+        """Run a job once (if this worker holds its lease) and record the outcome"""
+        renewal = None
+        if job.singleton:
+            if not await self._acquire_lease(job):
+                job.stats["skipped"] += 1
+                return None
+            renewal = asyncio.create_task(self._renew_lease(job), name=f"lease:{job.name}")
+
+        started_at = datetime.utcnow()
+        start = time.perf_counter()
+        status, error, result = "ok", None, None
+        try:
+            result = await self._call(job)
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        except Exception as e:
+            status, error = "error", str(e)
+            job.stats["failures"] += 1
+            logger.error("Scheduled job failed", job=job.name, error=error)
+        finally:
+            if renewal is not None:
+                renewal.cancel()
+            elapsed = time.perf_counter() - start
+            job.stats["runs"] += 1
+            job.stats["total_seconds"] += elapsed
+            job.stats["last_seconds"] = elapsed
+            job.stats["last_status"] = status
+            job_duration_seconds.labels(job.name, status).observe(elapsed)
+            job.history.append({
+                "started_at": started_at.isoformat(),
+                "duration_seconds": elapsed,
+                "status": status,
+                "error": error,
+            })
+        if job.next_delay is not None and status == "ok":
+            job._delay = job.next_delay(result, job._delay)
+        if job.singleton:
+            try:
+                await self._schedule_lease(job)
+            except Exception as e:
+                logger.error("Scheduling job lease failed", job=job.name, error=str(e))
+        return result
+
+    async def _loop(self, job: Job) -> None:
+        first = True
+        while True:
+            delay = 0.0 if (first and job.run_on_start) else job.wait_seconds()
+            first = False
+            if job.jitter:
+                delay += random.uniform(0, job.jitter)
+            await asyncio.sleep(delay)
+            try:
+                await self.run_job(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Lease errors (e.g. DB locked) must not kill the loop
+                logger.error("Scheduler error", job=job.name, error=str(e))
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.scheduler_max_workers, thread_name_prefix="jobs"
+        )
+        self._long_executor = ThreadPoolExecutor(
+            max_workers=settings.scheduler_long_max_workers, thread_name_prefix="long-jobs"
+        )
+        for job in self.jobs.values():
+            self._tasks.append(asyncio.create_task(self._loop(job), name=f"job:{job.name}"))
+
+    async def stop(self) -> None:
+        """Cancel job loops, give in-flight blocking jobs time to finish, drop leases"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._running:
+            await asyncio.wait(self._running, timeout=settings.scheduler_shutdown_timeout_seconds)
+        if self._executor is not None:
+            try:
+                await self._release_leases()
+            except Exception as e:
+                logger.error("Releasing job leases failed", error=str(e))
+            for executor in (self._executor, self._long_executor):
+                executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = self._long_executor = None
+        # Registration belongs to one run; the next startup registers afresh
+        self.jobs = {}
+
+    def snapshot(self) -> dict:
+        """Per-job stats and recent run history"""
+        return {
+            name: {**job.stats, "history": list(job.history)}
+            for name, job in self.jobs.items()
+        }
+
+
+scheduler = Scheduler()
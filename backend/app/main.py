@@ -1,28 +1,51 @@
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 from pathlib import Path
-import asyncio
-from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from .middleware.cors import setup_cors
-from .middleware.logging import log_requests
+from .middleware.logging import log_requests, shutdown_logging, start_logging
 from .middleware.errors import global_exception_handler
+from .middleware.metrics import setup_metrics
+from .middleware.profiling import setup_profiling
+from .middleware.rate_limit import setup_rate_limiting
+from .middleware.static import StaticAssets
+from .middleware.responses import default_response_class, setup_compression
 from .pages.auth import login, register, refresh, logout, me, reset
-from .pages import dashboard
-from .functions.backups import daily_backup_loop, cleanup_expired_tokens
-from .database import get_db_session
+from .pages import dashboard, metrics
+from .pages.admin import users as admin_users, roles as admin_roles, tokens as admin_tokens
+from .functions.backups import run_daily_backup, cleanup_expired_tokens, next_cleanup_interval
+from .functions.incremental_backups import run_incremental_backup
+from .functions.scheduler import Job, scheduler
+from .functions.hashing import password_hasher
+from .functions.email import email_dispatcher
+from .functions.rate_limit import rate_limiter
+from .database.refresh_tokens import refresh_tokens
+from .database.invalidation import invalidation_bus
+from .database import get_db_session, dispose_engines
 from .config import settings
 
 app = FastAPI(
     title="Service Template",
     description="A comprehensive service template with authentication",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=default_response_class(),
 )
 
 setup_cors(app)
 
+if settings.enable_rate_limiting:
+    setup_rate_limiting(app)
+
 app.middleware("http")(log_requests)
 
+if settings.enable_metrics:
+    setup_metrics(app)
+
+if settings.enable_query_profiling:
+    setup_profiling(app)
+
+if settings.enable_response_compression:
+    setup_compression(app)
+
 app.add_exception_handler(Exception, global_exception_handler)
 
 app.include_router(login.router)
@@ -32,21 +55,14 @@ app.include_router(logout.router)
 app.include_router(me.router)
 app.include_router(reset.router)
 app.include_router(dashboard.router)
+app.include_router(metrics.router)
+app.include_router(admin_users.router)
+app.include_router(admin_roles.router)
+app.include_router(admin_tokens.router)
 
 static_dir = Path(__file__).parent / "static"
 if static_dir.exists():
-
-    class SPAStaticFiles(StaticFiles):
-        """Return SPA entrypoint when deep links miss static files."""
-        async def get_response(self, path, scope):
-            try:
-                return await super().get_response(path, scope)
-            except StarletteHTTPException as exc:
-                if exc.status_code == 404 and scope["method"] in {"GET", "HEAD"}:
-                    return await super().get_response("index.html", scope)
-                raise
-
-    app.mount("/", SPAStaticFiles(directory=static_dir, html=True), name="static")
+    app.mount("/", StaticAssets(static_dir), name="static")
 
 
 @app.get("/livez")
@@ -68,8 +84,83 @@ def readyz():
 
 @app.on_event("startup")
 async def startup_event():
-    """Start background tasks"""
+    """Start background jobs"""
+    start_logging()
     if settings.enable_backups:
-        asyncio.create_task(daily_backup_loop())
+        scheduler.add_job(Job(
+            "daily_backup", run_daily_backup, cron=settings.backup_cron, jitter=30, long_running=True
+        ))
+        if settings.enable_incremental_backups:
+            scheduler.add_job(Job(
+                "incremental_backup",
+                run_incremental_backup,
+                interval=settings.backup_incremental_interval_seconds,
+                jitter=5,
+                long_running=True,
+            ))
     
-    asyncio.create_task(cleanup_expired_tokens())
+    scheduler.add_job(Job(
+        "token_cleanup",
+        cleanup_expired_tokens,
+        interval=settings.token_cleanup_min_interval_seconds,
+        jitter=10,
+        run_on_start=True,
+        next_delay=next_cleanup_interval,
+    ))
+    scheduler.add_job(Job(
+        "refresh_token_prune",
+        refresh_tokens.prune,
+        interval=settings.refresh_token_prune_interval_seconds,
+        jitter=30,
+    ))
+    # Every worker keeps its own filter, so this one is not a singleton
+    scheduler.add_job(Job(
+        "refresh_token_filter",
+        refresh_tokens.rebuild_filter,
+        interval=settings.refresh_token_filter_rebuild_seconds,
+        singleton=False,
+        jitter=60,
+        run_on_start=True,
+    ))
+    scheduler.add_job(Job(
+        "email_outbox_prune",
+        email_dispatcher.prune,
+        interval=settings.email_outbox_prune_interval_seconds,
+        blocking=False,
+        jitter=60,
+    ))
+    if settings.enable_rate_limiting:
+        scheduler.add_job(Job(
+            "rate_limit_evict",
+            rate_limiter.evict,
+            interval=settings.rate_limit_eviction_seconds,
+            singleton=rate_limiter.store.shared,
+        ))
+    if invalidation_bus.enabled:
+        # Every worker applies the events; one of them trims the table
+        scheduler.add_job(Job(
+            "invalidation_poll",
+            invalidation_bus.poll,
+            interval=settings.invalidation_poll_seconds,
+            blocking=False,
+            singleton=False,
+            run_on_start=True,
+        ))
+        scheduler.add_job(Job(
+            "invalidation_prune",
+            invalidation_bus.prune,
+            interval=settings.invalidation_retention_seconds,
+            jitter=30,
+        ))
+    scheduler.start()
+    email_dispatcher.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background jobs and release worker pools and connections"""
+    await scheduler.stop()
+    await email_dispatcher.stop()
+    password_hasher.shutdown()
+    await dispose_engines()
+    shutdown_logging()
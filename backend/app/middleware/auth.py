@@ -1,17 +1,20 @@
 from fastapi import HTTPException, Request, Depends
-from jose import JWTError, jwt
+from sqlalchemy import select
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from typing import Optional
 from ..config import settings
-from ..database.models import User, Role, UserRole
-from ..database import get_db_session
-from ..database.shared import get_user_by_id
+from ..database.models import UserRole
+from ..database.roles import role_hierarchy
+from ..database import get_read_db_session, get_async_read_db_session
+from ..database.cache import UserSnapshot
+from ..database.revocations import token_revocations
+from ..database.shared import get_user_snapshot_async
+from ..functions.hashing import password_hasher
+from .tokens import token_service, TokenError
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-ALGORITHM = "HS256"
-
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
@@ -23,46 +26,105 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
-def create_access_token(user_id: int, expires_delta: Optional[timedelta] = None) -> str:
-    """Create an access token"""
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password in the hashing pool without blocking the event loop"""
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password in the hashing pool without blocking the event loop"""
+    return await password_hasher.run(get_password_hash, password)
+
+
+def create_access_token(
+    user_id: int,
+    expires_delta: Optional[timedelta] = None,
+    claims: Optional[dict] = None,
+) -> str:
+    """Create an access token, optionally carrying authorization claims"""
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.access_token_ttl_minutes)
     
-    to_encode = {"sub": str(user_id), "exp": expire}
-    return jwt.encode(to_encode, settings.jwt_secret, algorithm=ALGORITHM)
-
-
-def create_refresh_token(user_id: int) -> str:
-    """Create a refresh token"""
+    to_encode = {**(claims or {}), "sub": str(user_id), "exp": expire}
+    return token_service.encode(to_encode)
+
+
+async def access_token_claims(user) -> Optional[dict]:
+    """Claims that let requests be authorized from the token alone (stateless mode)"""
+    if not settings.enable_stateless_auth:
+        return None
+    roles = await get_user_roles_with_hierarchy_async(user.id)
+    return {
+        "act": bool(user.is_active),
+        "roles": sorted(roles),
+        "ver": user.token_version or 0,
+        "email": user.email,
+        "ca": user.created_at.isoformat(),
+    }
+
+
+def _snapshot_from_claims(user_id: int, payload: dict) -> UserSnapshot:
+    return UserSnapshot(
+        id=user_id,
+        email=payload["email"],
+        is_active=bool(payload["act"]),
+        created_at=datetime.fromisoformat(payload["ca"]),
+        token_version=int(payload["ver"]),
+        roles=frozenset(payload["roles"]),
+    )
+
+
+async def _ensure_revocations_fresh() -> None:
+    if token_revocations.needs_check():
+        async with get_async_read_db_session() as db:
+            await db.run_sync(token_revocations.ensure_fresh)
+
+
+def create_refresh_token(user_id: int, jti: str, family_id: str, token_version: int = 0) -> str:
+    """Create a refresh token for a row recorded in the refresh token store"""
     expire = datetime.utcnow() + timedelta(days=settings.refresh_token_ttl_days)
-    to_encode = {"sub": str(user_id), "exp": expire, "type": "refresh"}
-    return jwt.encode(to_encode, settings.jwt_secret, algorithm=ALGORITHM)
+    to_encode = {
+        "sub": str(user_id),
+        "exp": expire,
+        "type": "refresh",
+        "ver": token_version,
+        "jti": jti,
+        "fam": family_id,
+    }
+    return token_service.encode(to_encode)
 
 
 def verify_token(token: str) -> bool:
     """Verify if a token is valid"""
     try:
-        jwt.decode(token, settings.jwt_secret, algorithms=[ALGORITHM])
+        token_service.decode(token)
         return True
-    except JWTError:
+    except TokenError:
         return False
 
 
-def get_current_user(request: Request) -> User:
-    """Validate access token from HttpOnly cookie and load user from DB"""
-    token = request.cookies.get("access_token")
-    if not token:
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    
+async def get_current_user(request: Request) -> UserSnapshot:
+    """Validate access token from HttpOnly cookie and load user (cached)"""
     try:
-        payload = jwt.decode(token, settings.jwt_secret, algorithms=[ALGORITHM])
-        user_id: int = int(payload["sub"])
-    except JWTError:
+        payload = token_service.from_request(request, "access_token")
+    except TokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
+    if payload is None:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if payload.get("type") == "refresh":
+        raise HTTPException(status_code=401, detail="Invalid token type")
+    user_id: int = int(payload["sub"])
     
-    user = get_user_by_id(user_id)
+    if settings.enable_stateless_auth and "ver" in payload:
+        # Fast path: the signed claims are authoritative for the token's short TTL
+        await _ensure_revocations_fresh()
+        if not token_revocations.is_current(user_id, payload["ver"]):
+            raise HTTPException(status_code=401, detail="Token revoked")
+        return _snapshot_from_claims(user_id, payload)
+    
+    user = await get_user_snapshot_async(user_id)
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
     
@@ -71,18 +133,26 @@ def get_current_user(request: Request) -> User:
 
 def get_user_roles_with_hierarchy(user_id: int) -> set[str]:
     """Get all roles for a user, including inherited roles from hierarchy"""
-    with get_db_session() as db:
-        user_roles = db.query(Role).join(UserRole).filter(UserRole.user_id == user_id).all()
-        
-        all_roles = set()
-        for role in user_roles:
-            all_roles.add(role.name)
-            current = role
-            while current.parent:
-                current = current.parent
-                all_roles.add(current.name)
-        
-        return all_roles
+    with get_read_db_session() as db:
+        role_hierarchy.ensure_fresh(db)
+        role_ids = [
+            role_id for (role_id,) in
+            db.query(UserRole.role_id).filter(UserRole.user_id == user_id)
+        ]
+    
+    return role_hierarchy.expand(role_ids)
+
+
+async def get_user_roles_with_hierarchy_async(user_id: int) -> set[str]:
+    """Get all roles for a user, including inherited roles from hierarchy"""
+    async with get_async_read_db_session() as db:
+        await db.run_sync(role_hierarchy.ensure_fresh)
+        result = await db.execute(
+            select(UserRole.role_id).where(UserRole.user_id == user_id)
+        )
+        role_ids = result.scalars().all()
+    
+    return role_hierarchy.expand(role_ids)
 
 
 def has_permission(user_id: int, required_role: str) -> bool:
@@ -91,18 +161,28 @@ def has_permission(user_id: int, required_role: str) -> bool:
     return required_role in roles
 
 
+async def has_permission_async(user_id: int, required_role: str) -> bool:
+    """Check role via user_roles with hierarchy support; 'admin' overrides"""
+    roles = await get_user_roles_with_hierarchy_async(user_id)
+    return required_role in roles
+
+
 def require_role(required_role: str):
     """Decorator for role-based authorization with hierarchy support"""
-    def role_checker(current_user: User = Depends(get_current_user)):
-        if not has_permission(current_user.id, required_role):
+    async def role_checker(current_user: UserSnapshot = Depends(get_current_user)):
+        if current_user.roles is not None:
+            allowed = required_role in current_user.roles
+        else:
+            allowed = await has_permission_async(current_user.id, required_role)
+        if not allowed:
             raise HTTPException(status_code=403, detail="Insufficient permissions")
         return current_user
     return role_checker
 
 
-def optional_user(request: Request) -> Optional[User]:
+async def optional_user(request: Request) -> Optional[UserSnapshot]:
     """Get current user if authenticated, None otherwise"""
     try:
-        return get_current_user(request)
+        return await get_current_user(request)
     except HTTPException:
         return None
\ No newline at end of file
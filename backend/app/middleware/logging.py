@@ -1,58 +1,228 @@
 import structlog
+import atexit
 import logging.config
+import logging.handlers
+import queue
+import random
+import secrets
+import sys
+import threading
 import time
-import uuid
+from datetime import datetime, timezone
 from fastapi import Request
+from ..config import settings
 
 
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Hand records to the writer thread; drop (and count) when the queue is full.
+
+    Records stay in-process, so they are enqueued as-is and formatting is
+    deferred to the writer thread instead of running on the event loop.
+    """
+
+    dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+
+class BatchLogWriter:
+    """Background thread that formats queued records and writes them in batches"""
+
+    _SENTINEL = object()
+
+    def __init__(self, log_queue: queue.Queue, formatter: logging.Formatter,
+                 stream=None, batch_size: int = 100, flush_interval: float = 0.5):
+        self.queue = log_queue
+        self.formatter = formatter
+        self.stream = stream or sys.stderr
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self.queue.put(self._SENTINEL)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _format(self, record) -> str:
+        try:
+            return self.formatter.format(record)
+        except Exception as e:
+            return f'{{"event": "log formatting failed", "error": "{e!r}"}}'
+
+    def _write(self, lines: list[str]) -> None:
+        if not lines:
+            return
+        try:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+        except Exception:
+            pass
+
+    def _run(self) -> None:
+        while True:
+            try:
+                item = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            stop = item is self._SENTINEL
+            lines = [] if stop else [self._format(item)]
+            deadline = time.monotonic() + self.flush_interval
+            while not stop and len(lines) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is self._SENTINEL:
+                    stop = True
+                else:
+                    lines.append(self._format(item))
+            if stop:
+                # Drain whatever is left so shutdown loses nothing
+                while True:
+                    try:
+                        item = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not self._SENTINEL:
+                        lines.append(self._format(item))
+            self._write(lines)
+            if stop:
+                return
+
+
+def _add_record_timestamp(logger, method_name, event_dict):
+    record = event_dict.get("_record")
+    if record is not None:
+        event_dict["timestamp"] = datetime.fromtimestamp(record.created, timezone.utc).isoformat()
+    return event_dict
+
+
+log_queue: queue.Queue = queue.Queue(maxsize=settings.log_queue_size)
+
+formatter = structlog.stdlib.ProcessorFormatter(
+    processors=[
+        _add_record_timestamp,
+        structlog.stdlib.add_log_level,
+        structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+        structlog.processors.JSONRenderer(),
+    ],
+    foreign_pre_chain=[structlog.stdlib.add_logger_name],
+)
+
+log_writer = BatchLogWriter(
+    log_queue,
+    formatter,
+    batch_size=settings.log_batch_size,
+    flush_interval=settings.log_flush_interval_seconds,
+)
+
 LOGGING_CONFIG = {
     "version": 1,
-    "formatters": {
-        "structured": {
-            "()": structlog.stdlib.ProcessorFormatter,
-            "processor": structlog.processors.JSONRenderer(),
-        },
-    },
+    "disable_existing_loggers": False,
     "handlers": {
-        "console": {
-            "class": "logging.StreamHandler",
-            "formatter": "structured",
+        "queue": {
+            "()": DroppingQueueHandler,
+            "queue": log_queue,
         },
     },
     "loggers": {
-        "app": {"handlers": ["console"], "level": "INFO"},
-        "uvicorn": {"handlers": ["console"], "level": "INFO"},
+        "app": {"handlers": ["queue"], "level": settings.log_level},
+        "uvicorn": {"handlers": ["queue"], "level": "INFO"},
     },
 }
 
 logging.config.dictConfig(LOGGING_CONFIG)
+structlog.configure(
+    processors=[structlog.stdlib.ProcessorFormatter.wrap_for_formatter],
+    logger_factory=structlog.stdlib.LoggerFactory(),
+    wrapper_class=structlog.stdlib.BoundLogger,
+    cache_logger_on_first_use=True,
+)
+log_writer.start()
+atexit.register(log_writer.stop)
+
 logger = structlog.get_logger("app")
 
 
+def start_logging() -> None:
+    """Start the writer thread again after a previous shutdown"""
+    log_writer.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued log records and stop the writer thread"""
+    log_writer.stop()
+
+
+def _should_log(status_code: int, process_time: float) -> bool:
+    """Errors and slow requests are always kept; the rest are sampled"""
+    if status_code >= 400 or process_time * 1000 >= settings.log_slow_request_ms:
+        return True
+    return settings.log_sample_rate >= 1.0 or random.random() < settings.log_sample_rate
+
+
+def _request_fields(request: Request, request_id: str) -> dict:
+    return {
+        "request_id": request_id,
+        "method": request.method,
+        "path": request.url.path,
+        "query_params": dict(request.query_params),
+        "user_id": getattr(request.state, 'user_id', None),
+        "user_agent": request.headers.get("user-agent"),
+        "ip_address": (request.client.host if request.client else None),
+    }
+
+
 async def log_requests(request: Request, call_next):
     """Log all incoming requests and outgoing responses for audit trail"""
-    start_time = time.time()
-    request_id = str(uuid.uuid4())
-    
-    logger.info(
-        "Incoming request",
-        request_id=request_id,
-        method=request.method,
-        path=request.url.path,
-        query_params=dict(request.query_params),
-        user_id=getattr(request.state, 'user_id', None),
-        user_agent=request.headers.get("user-agent"),
-        ip_address=(request.client.host if request.client else None),
-    )
-    
+    start_time = time.perf_counter()
+
+    if not settings.log_combined_records:
+        request_id = secrets.token_hex(8)
+        sampled = settings.log_sample_rate >= 1.0 or random.random() < settings.log_sample_rate
+        if sampled:
+            logger.info("Incoming request", **_request_fields(request, request_id))
+
+        response = await call_next(request)
+
+        process_time = time.perf_counter() - start_time
+        if sampled or _should_log(response.status_code, process_time):
+            # Unsampled errors/slow requests carry the request fields here
+            fields = {"request_id": request_id} if sampled else _request_fields(request, request_id)
+            logger.info(
+                "Outgoing response",
+                **fields,
+                status_code=response.status_code,
+                process_time=process_time,
+            )
+        return response
+
     response = await call_next(request)
-    
-    process_time = time.time() - start_time
-    logger.info(
-        "Outgoing response",
-        request_id=request_id,
-        status_code=response.status_code,
-        process_time=process_time,
-    )
-    
+
+    process_time = time.perf_counter() - start_time
+    if _should_log(response.status_code, process_time):
+        logger.info(
+            "Request completed",
+            **_request_fields(request, secrets.token_hex(8)),
+            status_code=response.status_code,
+            process_time=process_time,
+        )
+
     return response
@@ -0,0 +1,131 @@
+import time
+from fastapi import Request
+from sqlalchemy import event
+from ..functions.metrics import (
+    registry,
+    http_requests_total,
+    http_request_duration_seconds,
+    http_requests_in_flight,
+    db_queries_total,
+    db_query_duration_seconds,
+)
+
+
+async def track_requests(request: Request, call_next):
+    """Count requests and record latency per route template"""
+    start = time.perf_counter()
+    http_requests_in_flight.inc()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        http_requests_in_flight.dec()
+        route = request.scope.get("route")
+        # Use the route template, not the raw path, to keep label cardinality bounded
+        path = getattr(route, "path", None) or "unmatched"
+        http_requests_total.labels(request.method, path, str(status)).inc()
+        http_request_duration_seconds.labels(request.method, path).observe(time.perf_counter() - start)
+
+
+def instrument_engine(sync_engine, name: str) -> None:
+    """Count and time every statement executed on an engine"""
+    queries = db_queries_total.labels(name)
+    durations = db_query_duration_seconds.labels(name)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("_metrics_query_start")
+        if starts:
+            durations.observe(time.perf_counter() - starts.pop())
+        queries.inc()
+
+
+def _pool_stats(engines: dict):
+    for name, eng in engines.items():
+        pool = eng.pool
+        for stat in ("size", "checkedout", "overflow", "checkedin"):
+            fn = getattr(pool, stat, None)
+            if callable(fn):
+                yield (name, stat), fn()
+
+
+def setup_metrics(app):
+    """Register the metrics middleware, DB hooks and scrape-time collectors"""
+    from ..database import sync_engines
+    from ..database.cache import user_cache
+    from ..database.refresh_tokens import refresh_tokens
+    from ..database.invalidation import invalidation_bus
+    from ..functions.hashing import password_hasher
+    from ..functions.scheduler import scheduler
+    from ..functions.email import email_dispatcher
+    from ..functions.rate_limit import rate_limiter
+    from .logging import DroppingQueueHandler
+    from .tokens import token_service
+
+    app.middleware("http")(track_requests)
+
+    engines = sync_engines()
+    for name, eng in engines.items():
+        instrument_engine(eng, name)
+
+    registry.callback(
+        "db_pool_connections", "Connection pool state", "gauge", ("engine", "state"),
+        lambda: _pool_stats(engines),
+    )
+    registry.callback(
+        "password_hash_queue", "Password hashing pool occupancy", "gauge", ("state",),
+        lambda: [(("in_flight",), password_hasher.in_flight), (("queued",), password_hasher.queue_depth)],
+    )
+    registry.callback(
+        "password_hash_calls_total", "Password hashing calls", "counter", ("outcome",),
+        lambda: [
+            (("completed",), password_hasher.stats["calls"]),
+            (("rejected",), password_hasher.stats["rejected"]),
+        ],
+    )
+    registry.callback(
+        "password_hash_seconds_total", "Time spent hashing passwords", "counter", (),
+        lambda: [((), password_hasher.stats["total_seconds"])],
+    )
+    registry.callback(
+        "user_cache_events_total", "Authenticated user cache lookups", "counter", ("event",),
+        lambda: [((event,), value) for event, value in user_cache.stats().items() if event != "size"],
+    )
+    registry.callback(
+        "token_cache_events_total", "Verified JWT payload cache lookups", "counter", ("event",),
+        lambda: [((event,), value) for event, value in token_service.stats().items() if event != "size"],
+    )
+    registry.callback(
+        "refresh_token_events_total", "Refresh token store events", "counter", ("event",),
+        lambda: [((event,), value) for event, value in refresh_tokens.stats.items()],
+    )
+    registry.callback(
+        "rate_limit_decisions_total", "Rate limiter outcomes", "counter", ("outcome",),
+        lambda: [((outcome,), value) for outcome, value in rate_limiter.stats.items()],
+    )
+    registry.callback(
+        "invalidation_events_total", "Cross-worker invalidation bus events", "counter", ("event",),
+        lambda: [((event,), value) for event, value in invalidation_bus.stats.items()],
+    )
+    registry.callback(
+        "job_runs_total", "Background job runs", "counter", ("job", "outcome"),
+        lambda: [
+            ((name, outcome), stats[outcome])
+            for name, stats in scheduler.snapshot().items()
+            for outcome in ("runs", "failures", "skipped")
+        ],
+    )
+    registry.callback(
+        "email_outbox_events_total", "Outbox deliveries", "counter", ("outcome",),
+        lambda: [((outcome,), value) for outcome, value in email_dispatcher.stats.items()],
+    )
+    registry.callback(
+        "log_records_dropped_total", "Log records dropped because the queue was full", "counter", (),
+        lambda: [((), DroppingQueueHandler.dropped)],
+    )
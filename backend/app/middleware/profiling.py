@@ -0,0 +1,101 @@
+import random
+import time
+from collections import Counter
+from contextvars import ContextVar
+from fastapi import Request
+from sqlalchemy import event
+import structlog
+from ..config import settings
+
+logger = structlog.get_logger("app")
+
+
+class QueryProfile:
+    """SQL statements executed while serving one request"""
+
+    __slots__ = ("count", "total_seconds", "statements", "_starts")
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.statements: Counter = Counter()
+        self._starts: list[float] = []
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Statements executed at least ``threshold`` times (likely N+1 patterns)"""
+        return [(stmt, n) for stmt, n in self.statements.most_common() if n >= threshold]
+
+
+_current_profile: ContextVar[QueryProfile | None] = ContextVar("query_profile", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+    if profile is not None:
+        profile._starts.append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+    if profile is not None and profile._starts:
+        profile.total_seconds += time.perf_counter() - profile._starts.pop()
+        profile.count += 1
+        profile.statements[statement] += 1
+
+
+def _server_timing(profile: QueryProfile, total_seconds: float) -> str:
+    db_ms = profile.total_seconds * 1000
+    return (
+        f'db;dur={db_ms:.2f};desc="{profile.count} queries", '
+        f'app;dur={max(0.0, total_seconds * 1000 - db_ms):.2f}, '
+        f'total;dur={total_seconds * 1000:.2f}'
+    )
+
+
+async def profile_queries(request: Request, call_next):
+    """Count and time SQL per request, flag N+1 patterns and add Server-Timing"""
+    if settings.query_profiling_sample_rate < 1.0 and random.random() >= settings.query_profiling_sample_rate:
+        return await call_next(request)
+
+    profile = QueryProfile()
+    token = _current_profile.set(profile)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        _current_profile.reset(token)
+    elapsed = time.perf_counter() - start
+
+    response.headers["Server-Timing"] = _server_timing(profile, elapsed)
+
+    repeated = profile.repeated(settings.query_profiling_n_plus_one_threshold)
+    if repeated:
+        logger.warning(
+            "Repeated SQL statements (possible N+1)",
+            path=request.url.path,
+            method=request.method,
+            statements=[{"sql": sql[:200], "count": n} for sql, n in repeated[:5]],
+        )
+    if elapsed * 1000 >= settings.query_profiling_slow_ms:
+        logger.warning(
+            "Slow request",
+            path=request.url.path,
+            method=request.method,
+            duration_ms=round(elapsed * 1000, 2),
+            db_ms=round(profile.total_seconds * 1000, 2),
+            query_count=profile.count,
+            top_statements=[
+                {"sql": sql[:200], "count": n} for sql, n in profile.statements.most_common(5)
+            ],
+        )
+    return response
+
+
+def setup_profiling(app):
+    """Install the per-request query profiler (opt-in via ENABLE_QUERY_PROFILING)"""
+    from ..database import sync_engines
+
+    for eng in sync_engines().values():
+        event.listen(eng, "before_cursor_execute", _before_cursor_execute)
+        event.listen(eng, "after_cursor_execute", _after_cursor_execute)
+    app.middleware("http")(profile_queries)
@@ -0,0 +1,62 @@
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from ..config import settings
+from ..functions.rate_limit import (
+    RateLimitExceeded,
+    rate_limiter,
+    login_ip_rule,
+    login_email_rule,
+    reset_ip_rule,
+    reset_email_rule,
+)
+
+# Per-IP limits applied before the request body is even read
+ROUTE_RULES = {
+    ("POST", "/auth/login/onsubmit"): login_ip_rule,
+    ("POST", "/auth/reset/onsubmit/request"): reset_ip_rule,
+}
+
+
+def client_ip(request: Request) -> str:
+    """Caller address, honouring X-Forwarded-For only behind trusted proxies.
+
+    Entries left of those appended by our own proxies are whatever the client
+    sent, so the address is taken ``rate_limit_trusted_proxy_hops`` from the
+    right: the peer that the outermost trusted proxy saw.
+    """
+    if settings.rate_limit_trust_forwarded:
+        forwarded = request.headers.get("x-forwarded-for")
+        hops = [hop.strip() for hop in forwarded.split(",")] if forwarded else []
+        if hops:
+            return hops[-min(len(hops), max(1, settings.rate_limit_trusted_proxy_hops))]
+    return request.client.host if request.client else "unknown"
+
+
+async def limit_requests(request: Request, call_next):
+    """Reject over-limit callers before any hashing or DB work happens"""
+    rule = ROUTE_RULES.get((request.method, request.url.path))
+    if rule is not None:
+        try:
+            await rate_limiter.check(rule, client_ip(request))
+        except RateLimitExceeded as exc:
+            return JSONResponse(
+                status_code=exc.status_code,
+                content={"detail": exc.detail},
+                headers=exc.headers,
+            )
+    return await call_next(request)
+
+
+async def limit_login_email(email: str) -> None:
+    """Per-account login throttle; raises RateLimitExceeded"""
+    await rate_limiter.check(login_email_rule, email.strip().lower())
+
+
+async def limit_reset_email(email: str) -> None:
+    """Per-account password reset throttle; raises RateLimitExceeded"""
+    await rate_limiter.check(reset_email_rule, email.strip().lower())
+
+
+def setup_rate_limiting(app):
+    """Install the per-IP rate limiting middleware"""
+    app.middleware("http")(limit_requests)
@@ -0,0 +1,161 @@
+import gzip
+import zlib
+
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except Exception:  # pragma: no cover - brotli is an optional extra
+    brotli = None
+
+from ..config import settings
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def default_response_class():
+    """ORJSONResponse when orjson is installed and enabled, else FastAPI's JSONResponse"""
+    if settings.json_backend in ("auto", "orjson"):
+        try:
+            import orjson  # noqa: F401
+            from fastapi.responses import ORJSONResponse
+            return ORJSONResponse
+        except ImportError:
+            if settings.json_backend == "orjson":
+                raise
+    return JSONResponse
+
+
+def _choose_encoding(accept_encoding: str) -> str | None:
+    accepted = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip().lower())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    """Incremental br/gzip encoder for streamed bodies"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._impl = brotli.Compressor(quality=settings.compression_brotli_quality)
+        else:
+            self._impl = zlib.compressobj(settings.compression_gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._impl.process(data) + self._impl.flush()
+        return self._impl.compress(data) + self._impl.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._impl.finish() if self.encoding == "br" else self._impl.flush()
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.compression_brotli_quality)
+    return gzip.compress(body, compresslevel=settings.compression_gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    """br/gzip compression for API responses above a size threshold.
+
+    Bodies are compressed only when they reach ``minimum_size``. Streamed
+    bodies, which include every response passing through the
+    ``@app.middleware("http")`` layers, are buffered up to that size before
+    deciding: a short stream is sent as-is with a Content-Length, a longer one
+    is compressed incrementally. Responses that already carry a
+    Content-Encoding, such as precompressed static assets, and non-text types
+    pass through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = _choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor: _Compressor | None = None
+        passthrough = False
+        buffered = bytearray()
+
+        async def wrapped_send(message) -> None:
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                passthrough = (
+                    "content-encoding" in headers
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            headers = MutableHeaders(raw=start_message["headers"])
+            if compressor is None:
+                buffered.extend(body)
+                if not more_body:
+                    # The whole body is known: compress only above the threshold
+                    body = bytes(buffered)
+                    if len(body) >= self.minimum_size:
+                        body = compress_body(body, encoding)
+                        headers["content-encoding"] = encoding
+                        headers["content-length"] = str(len(body))
+                        headers.add_vary_header("Accept-Encoding")
+                    elif "content-length" not in headers:
+                        # Streamed without a length, but now complete
+                        headers["content-length"] = str(len(body))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                if len(buffered) < self.minimum_size:
+                    return
+                compressor = _Compressor(encoding)
+                headers["content-encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if "content-length" in headers:
+                    del headers["content-length"]
+                await send(start_message)
+                body = bytes(buffered)
+            chunk = compressor.compress(body)
+            if not more_body:
+                chunk += compressor.finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, wrapped_send)
+
+
+def setup_compression(app):
+    """Compress API responses larger than COMPRESSION_MIN_BYTES"""
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_min_bytes)
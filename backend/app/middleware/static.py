@@ -0,0 +1,249 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import structlog
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, PlainTextResponse, Response
+
+try:
+    import brotli
+except Exception:  # pragma: no cover - brotli is an optional extra
+    brotli = None
+
+from ..config import settings
+
+logger = structlog.get_logger("app")
+
+COMPRESSIBLE_SUFFIXES = {
+    ".html", ".js", ".mjs", ".css", ".json", ".map", ".svg", ".txt", ".xml",
+    ".webmanifest", ".wasm", ".ico",
+}
+# Vite emits fingerprinted names such as assets/index-BdQ3x9aF.js
+FINGERPRINT = re.compile(r"[.-][A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$")
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+
+@dataclass
+class Variant:
+    """One encoding of an asset, held in memory or served from disk"""
+    encoding: str | None
+    path: Path
+    size: int
+    etag: str
+    stat: os.stat_result | None = None
+    body: bytes | None = None
+
+
+@dataclass
+class Asset:
+    content_type: str
+    cache_control: str
+    variants: dict[str | None, Variant] = field(default_factory=dict)
+
+
+def _compressible(path: Path) -> bool:
+    return path.suffix.lower() in COMPRESSIBLE_SUFFIXES
+
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _encodings() -> list[str]:
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def precompress(directory: Path, min_size: int | None = None) -> int:
+    """Write .br/.gz siblings for compressible files that lack an up-to-date one"""
+    min_size = settings.static_compress_min_bytes if min_size is None else min_size
+    written = 0
+    for path in Path(directory).rglob("*"):
+        if not path.is_file() or path.suffix in (".br", ".gz") or not _compressible(path):
+            continue
+        stat = path.stat()
+        if stat.st_size < min_size:
+            continue
+        data = None
+        for encoding in _encodings():
+            target = path.with_name(path.name + ENCODING_SUFFIXES[encoding])
+            if target.exists() and target.stat().st_mtime >= stat.st_mtime:
+                continue
+            data = data if data is not None else path.read_bytes()
+            compressed = _compress(data, encoding)
+            if len(compressed) < stat.st_size:
+                target.write_bytes(compressed)
+                written += 1
+    return written
+
+
+def _accepted_encodings(header: str) -> set[str]:
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        params = params.strip().replace(" ", "")
+        if params.startswith("q=") and params[2:] in ("0", "0.0", "0.00", "0.000"):
+            continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+class StaticAssets:
+    """ASGI app serving the built SPA from a file index computed at startup.
+
+    Each file gets a strong ETag from its content, precompressed ``br`` and
+    ``gzip`` variants (from disk when the build produced them, otherwise
+    compressed in memory for small files) and long-lived immutable caching
+    when its name is fingerprinted. Extension-less paths that match no file
+    resolve to ``index.html`` straight from the index, so deep links never
+    go through a 404.
+    """
+
+    def __init__(self, directory: Path, fallback: str = "index.html"):
+        self.directory = Path(directory)
+        self.fallback = "/" + fallback
+        self.files: dict[str, Asset] = {}
+        self.memory_bytes = 0
+        if settings.static_precompress_on_startup:
+            try:
+                precompress(self.directory)
+            except OSError as e:
+                logger.warning("Precompressing static assets failed", error=str(e))
+        self.build()
+
+    # Index
+
+    def build(self) -> None:
+        files: dict[str, Asset] = {}
+        self.memory_bytes = 0
+        for path in sorted(self.directory.rglob("*")):
+            if not path.is_file() or path.suffix in (".br", ".gz"):
+                continue
+            url = "/" + path.relative_to(self.directory).as_posix()
+            files[url] = self._load(path)
+        # Directory URLs resolve to their index.html, as StaticFiles(html=True) did
+        for url in [u for u in files if u.endswith("/index.html")]:
+            directory_url = url[: -len("index.html")]
+            files.setdefault(directory_url, files[url])
+            if directory_url != "/":
+                files.setdefault(directory_url.rstrip("/"), files[url])
+        self.files = files
+        logger.info(
+            "Static asset index built",
+            files=len(files), memory_bytes=self.memory_bytes, brotli=brotli is not None,
+        )
+
+    def _load(self, path: Path) -> Asset:
+        stat = path.stat()
+        content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type in ("application/javascript", "image/svg+xml"):
+            content_type += "; charset=utf-8"
+        immutable = bool(FINGERPRINT.search(path.name)) and path.name != self.fallback.lstrip("/")
+        asset = Asset(content_type, IMMUTABLE_CACHE if immutable else REVALIDATE_CACHE)
+
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()[:20]
+        in_memory = (
+            stat.st_size <= settings.static_memory_max_file_bytes
+            and self.memory_bytes + stat.st_size <= settings.static_memory_budget_bytes
+        )
+        asset.variants[None] = Variant(
+            None, path, stat.st_size, f'"{digest}"', stat, data if in_memory else None
+        )
+        if in_memory:
+            self.memory_bytes += stat.st_size
+
+        if not _compressible(path) or stat.st_size < settings.static_compress_min_bytes:
+            return asset
+        for encoding in _encodings():
+            variant = self._encoded(path, stat, data, digest, encoding, in_memory)
+            if variant is not None:
+                asset.variants[encoding] = variant
+                if variant.body is not None:
+                    self.memory_bytes += variant.size
+        return asset
+
+    @staticmethod
+    def _encoded(path: Path, stat, data: bytes, digest: str, encoding: str, in_memory: bool) -> Variant | None:
+        """Prefer a precompressed sibling from the build; compress small files in memory"""
+        etag = f'"{digest}-{encoding}"'
+        sibling = path.with_name(path.name + ENCODING_SUFFIXES[encoding])
+        if sibling.exists():
+            sibling_stat = sibling.stat()
+            if sibling_stat.st_mtime >= stat.st_mtime:
+                body = sibling.read_bytes() if in_memory else None
+                return Variant(encoding, sibling, sibling_stat.st_size, etag, sibling_stat, body)
+        if in_memory:
+            compressed = _compress(data, encoding)
+            if len(compressed) < stat.st_size:
+                return Variant(encoding, path, len(compressed), etag, None, compressed)
+        return None
+
+    def lookup(self, path: str) -> Asset | None:
+        asset = self.files.get(path)
+        if asset is not None:
+            return asset
+        last_segment = path.rsplit("/", 1)[-1]
+        if "." in last_segment:
+            # Missing files with an extension are real 404s, not client routes
+            return None
+        return self.files.get(self.fallback)
+
+    # Serving
+
+    def _response(self, asset: Asset, headers: Headers, method: str) -> Response:
+        variant = asset.variants[None]
+        if len(asset.variants) > 1:
+            accepted = _accepted_encodings(headers.get("accept-encoding", ""))
+            for encoding in ("br", "gzip"):
+                if encoding in accepted and encoding in asset.variants:
+                    variant = asset.variants[encoding]
+                    break
+
+        response_headers = {
+            "cache-control": asset.cache_control,
+            "etag": variant.etag,
+        }
+        if len(asset.variants) > 1:
+            response_headers["vary"] = "Accept-Encoding"
+        if variant.encoding:
+            response_headers["content-encoding"] = variant.encoding
+
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or variant.etag in if_none_match):
+            return Response(status_code=304, headers=response_headers)
+
+        if variant.body is not None:
+            response_headers["content-length"] = str(variant.size)
+            body = b"" if method == "HEAD" else variant.body
+            return Response(body, headers=response_headers, media_type=asset.content_type)
+        return FileResponse(
+            variant.path,
+            headers=response_headers,
+            media_type=asset.content_type,
+            stat_result=variant.stat,
+            method=method,
+        )
+
+    async def __call__(self, scope, receive, send) -> None:
+        assert scope["type"] == "http"
+        method = scope["method"]
+        if method not in ("GET", "HEAD"):
+            response = PlainTextResponse("Method Not Allowed", status_code=405, headers={"allow": "GET, HEAD"})
+        else:
+            asset = self.lookup(scope["path"])
+            if asset is None:
+                response = PlainTextResponse("Not Found", status_code=404)
+            else:
+                response = self._response(asset, Headers(scope=scope), method)
+        await response(scope, receive, send)
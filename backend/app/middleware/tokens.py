@@ -0,0 +1,146 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from fastapi import Request
+
+from ..config import settings
+
+ALGORITHM = "HS256"
+
+
+class TokenError(Exception):
+    """The token is malformed, has a bad signature or has expired"""
+
+
+class JoseBackend:
+    name = "jose"
+
+    def __init__(self):
+        from jose import jwt, JWTError
+        self._jwt = jwt
+        self._error = JWTError
+
+    def encode(self, claims: dict, secret: str) -> str:
+        return self._jwt.encode(claims, secret, algorithm=ALGORITHM)
+
+    def decode(self, token: str, secret: str) -> dict:
+        try:
+            return self._jwt.decode(token, secret, algorithms=[ALGORITHM])
+        except self._error as e:
+            raise TokenError(str(e)) from e
+
+
+class PyJWTBackend:
+    """PyJWT skips python-jose's generic key handling, which shows up in profiles"""
+
+    name = "pyjwt"
+
+    def __init__(self):
+        import jwt
+        self._jwt = jwt
+        self._error = jwt.PyJWTError
+
+    def encode(self, claims: dict, secret: str) -> str:
+        return self._jwt.encode(claims, secret, algorithm=ALGORITHM)
+
+    def decode(self, token: str, secret: str) -> dict:
+        try:
+            return self._jwt.decode(token, secret, algorithms=[ALGORITHM])
+        except self._error as e:
+            raise TokenError(str(e)) from e
+
+
+def load_backend(name: str):
+    """Pick the JWT backend: 'jose', 'pyjwt', or 'auto' (PyJWT when installed)"""
+    if name == "jose":
+        return JoseBackend()
+    if name == "pyjwt":
+        return PyJWTBackend()
+    try:
+        return PyJWTBackend()
+    except Exception:
+        # PyJWT is optional; python-jose is always installed
+        return JoseBackend()
+
+
+class TokenService:
+    """Encodes and verifies JWTs, caching verified payloads until they expire.
+
+    The cache is keyed by a digest of the token, so a repeat request with the
+    same access token costs one short hash instead of an HMAC check and JSON
+    decode. Entries never outlive the token's ``exp``. Cached payloads are
+    shared and must not be mutated.
+    """
+
+    def __init__(self, backend, secret: str, cache_size: int):
+        self.backend = backend
+        self.secret = secret
+        self.cache_size = cache_size
+        self._cache: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def encode(self, claims: dict) -> str:
+        return self.backend.encode(claims, self.secret)
+
+    def decode(self, token: str, cache: bool = True) -> dict:
+        """Verified payload of ``token``; raises TokenError"""
+        if not cache or self.cache_size <= 0:
+            return self.backend.decode(token, self.secret)
+        key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+        now = time.time()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._cache.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._cache[key]
+            self.misses += 1
+        payload = self.backend.decode(token, self.secret)
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            with self._lock:
+                self._cache[key] = (float(exp), payload)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return payload
+
+    def from_request(self, request: Request, cookie: str, cache: bool = True) -> Optional[dict]:
+        """Decode a cookie token at most once per request; None when the cookie is absent.
+
+        The outcome, including a failure, is kept on ``request.state`` so
+        later dependencies in the same request reuse it.
+        """
+        decoded = getattr(request.state, "tokens", None)
+        if decoded is None:
+            decoded = request.state.tokens = {}
+        if cookie not in decoded:
+            token = request.cookies.get(cookie)
+            if not token:
+                decoded[cookie] = None
+            else:
+                try:
+                    decoded[cookie] = self.decode(token, cache=cache)
+                except TokenError as e:
+                    decoded[cookie] = e
+        result = decoded[cookie]
+        if isinstance(result, TokenError):
+            raise result
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+
+token_service = TokenService(
+    backend=load_backend(settings.jwt_backend),
+    secret=settings.jwt_secret,
+    cache_size=settings.token_cache_size,
+)
@@ -0,0 +1,12 @@
+from fastapi import Depends, HTTPException
+from ...middleware.auth import require_role
+from ...config import settings
+
+
+async def admin_panel_enabled():
+    """Hide the admin API entirely unless ENABLE_ADMIN_PANEL is on"""
+    if not settings.enable_admin_panel:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+admin_dependencies = [Depends(admin_panel_enabled), Depends(require_role("admin"))]
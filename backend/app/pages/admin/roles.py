@@ -0,0 +1,41 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+
+from .dependencies import admin_dependencies
+from ...database.admin import list_roles_page_async
+
+router = APIRouter(dependencies=admin_dependencies)
+
+
+class AdminRole(BaseModel):
+    id: int
+    name: str
+    parent_role_id: Optional[int]
+    created_at: datetime
+
+
+class AdminRolePage(BaseModel):
+    items: list[AdminRole]
+    next_cursor: Optional[str]
+
+
+@router.get("/admin/roles/onload", response_model=AdminRolePage)
+async def admin_roles_onload(
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+):
+    """List roles in id order"""
+    try:
+        rows, next_cursor = await list_roles_page_async(limit, cursor)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return AdminRolePage(
+        items=[
+            AdminRole(id=row.id, name=row.name, parent_role_id=row.parent_role_id, created_at=row.created_at)
+            for row in rows
+        ],
+        next_cursor=next_cursor,
+    )
@@ -0,0 +1,55 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+
+from .dependencies import admin_dependencies
+from ...database.admin import list_reset_tokens_page_async, iter_reset_tokens_async
+from ...functions.exports import export_response
+
+router = APIRouter(dependencies=admin_dependencies)
+
+TOKEN_FIELDS = ("id", "user_id", "expires_at", "used", "active", "created_at")
+
+
+class AdminResetToken(BaseModel):
+    id: int
+    user_id: Optional[int]
+    expires_at: Optional[datetime]
+    used: Optional[bool]
+    active: Optional[bool]
+    created_at: datetime
+
+
+class AdminResetTokenPage(BaseModel):
+    items: list[AdminResetToken]
+    next_cursor: Optional[str]
+
+
+@router.get("/admin/tokens/onload", response_model=AdminResetTokenPage)
+async def admin_tokens_onload(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    user_id: Optional[int] = None,
+    active: Optional[bool] = None,
+):
+    """List password reset tokens newest first (token values are never returned)"""
+    try:
+        rows, next_cursor = await list_reset_tokens_page_async(limit, cursor, user_id, active)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return AdminResetTokenPage(
+        items=[AdminResetToken(**{f: getattr(row, f) for f in TOKEN_FIELDS}) for row in rows],
+        next_cursor=next_cursor,
+    )
+
+
+@router.get("/admin/tokens/export")
+async def admin_tokens_export(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    user_id: Optional[int] = None,
+    active: Optional[bool] = None,
+):
+    """Stream every matching reset token as NDJSON or CSV"""
+    return export_response(iter_reset_tokens_async(user_id, active), TOKEN_FIELDS, format, "reset-tokens")
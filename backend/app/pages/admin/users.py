@@ -0,0 +1,118 @@
+import asyncio
+import io
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, File, HTTPException, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+
+from .dependencies import admin_dependencies
+from ...config import settings
+from ...database.admin import list_users_page_async, iter_users_async
+from ...database.shared import deactivate_user_async
+from ...functions.bulk_import import format_for, import_users
+from ...functions.exports import export_response
+
+router = APIRouter(dependencies=admin_dependencies)
+
+USER_FIELDS = ("id", "email", "is_active", "created_at")
+
+# Each import starts its own hashing process pool, so one runs at a time
+_import_lock = asyncio.Lock()
+
+
+class AdminUser(BaseModel):
+    id: int
+    email: str
+    is_active: bool
+    created_at: datetime
+
+
+class AdminUserPage(BaseModel):
+    items: list[AdminUser]
+    next_cursor: Optional[str]
+
+
+class ImportRowError(BaseModel):
+    line: int
+    email: Optional[str]
+    error: str
+
+
+class ImportResult(BaseModel):
+    created: int
+    failed: int
+    roles_assigned: int
+    seconds: float
+    errors: list[ImportRowError]
+    errors_truncated: bool
+
+
+@router.get("/admin/users/onload", response_model=AdminUserPage)
+async def admin_users_onload(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    email_prefix: Optional[str] = Query(None, min_length=1),
+    is_active: Optional[bool] = None,
+):
+    """List users newest first, or by email when searching by prefix"""
+    try:
+        rows, next_cursor = await list_users_page_async(limit, cursor, email_prefix, is_active)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return AdminUserPage(
+        items=[AdminUser(**{f: getattr(row, f) for f in USER_FIELDS}) for row in rows],
+        next_cursor=next_cursor,
+    )
+
+
+@router.post("/admin/users/{user_id}/deactivate/onsubmit")
+async def admin_users_deactivate_onsubmit(user_id: int):
+    """Deactivate an account and end its existing sessions"""
+    if not await deactivate_user_async(user_id):
+        raise HTTPException(status_code=404, detail="User not found or already inactive")
+    return {"success": True}
+
+
+@router.get("/admin/users/export")
+async def admin_users_export(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    email_prefix: Optional[str] = Query(None, min_length=1),
+    is_active: Optional[bool] = None,
+):
+    """Stream every matching user as NDJSON or CSV"""
+    return export_response(iter_users_async(email_prefix, is_active), USER_FIELDS, format, "users")
+
+
+@router.post("/admin/users/import/onsubmit", response_model=ImportResult)
+async def admin_users_import_onsubmit(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$"),
+    role: list[str] = Query([]),
+):
+    """Bulk-create users from an uploaded CSV or NDJSON file"""
+    fmt = format or format_for(file.filename)
+    if fmt is None:
+        raise HTTPException(status_code=400, detail="format must be ndjson or csv")
+    if _import_lock.locked():
+        raise HTTPException(status_code=503, detail="Another import is running, please retry later")
+    async with _import_lock:
+        # The upload is spooled to disk, so the importer streams it from there
+        stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+        try:
+            report = await run_in_threadpool(
+                import_users, stream, fmt, role, workers=settings.bulk_import_api_workers
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        finally:
+            stream.detach()
+    return ImportResult(
+        created=report.created,
+        failed=report.failed,
+        roles_assigned=report.roles_assigned,
+        seconds=round(report.seconds, 3),
+        errors=[ImportRowError(line=e.line, email=e.email, error=e.error) for e in report.errors],
+        errors_truncated=report.errors_truncated,
+    )
@@ -1,7 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, Response
 from pydantic import BaseModel
-from ...middleware.auth import verify_password, create_access_token, create_refresh_token
-from ...database.shared import get_user_by_email
+from ...middleware.auth import (
+    verify_password_async,
+    create_access_token,
+    create_refresh_token,
+    access_token_claims,
+)
+from ...database.shared import get_user_by_email_async
+from ...database.refresh_tokens import refresh_tokens
+from ...middleware.rate_limit import limit_login_email
 from ...config import settings
 
 router = APIRouter()
@@ -20,15 +27,17 @@ class LoginResponse(BaseModel):
 @router.post("/auth/login/onsubmit", response_model=LoginResponse)
 async def login_onsubmit(credentials: LoginRequest, response: Response):
     """Handle user login"""
-    user = get_user_by_email(credentials.email)
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    await limit_login_email(credentials.email)
+    user = await get_user_by_email_async(credentials.email)
+    if not user or not await verify_password_async(credentials.password, user.hashed_password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     if not user.is_active:
         raise HTTPException(status_code=401, detail="Account is disabled")
     
-    access_token = create_access_token(user.id)
-    refresh_token = create_refresh_token(user.id)
+    access_token = create_access_token(user.id, claims=await access_token_claims(user))
+    jti, family_id = await refresh_tokens.issue(user.id)
+    refresh_token = create_refresh_token(user.id, jti, family_id, user.token_version or 0)
     
     response.set_cookie(
         "access_token",
@@ -1,11 +1,20 @@
-from fastapi import APIRouter, Response
+from fastapi import APIRouter, Request, Response
+from ...database.refresh_tokens import refresh_tokens
+from ...middleware.tokens import token_service, TokenError
 
 router = APIRouter()
 
 
 @router.post("/auth/logout/onsubmit")
-async def logout(response: Response):
-    """Logout user by clearing cookies"""
+async def logout(request: Request, response: Response):
+    """Logout user by revoking the refresh token family and clearing cookies"""
+    try:
+        payload = token_service.from_request(request, "refresh_token", cache=False) or {}
+    except TokenError:
+        payload = {}
+    if payload.get("type") == "refresh" and "fam" in payload:
+        await refresh_tokens.revoke_family(payload["fam"])
+    
     response.delete_cookie("access_token")
     response.delete_cookie("refresh_token")
     return {"message": "Logged out successfully"}
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
-from ...middleware.auth import get_current_user, get_user_roles_with_hierarchy
-from ...database.models import User
+from ...middleware.auth import get_current_user, get_user_roles_with_hierarchy_async
+from ...database.cache import UserSnapshot
 
 router = APIRouter()
 
@@ -14,9 +14,12 @@ class UserResponse(BaseModel):
 
 
 @router.get("/auth/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: UserSnapshot = Depends(get_current_user)):
     """Get current user information"""
-    roles = list(get_user_roles_with_hierarchy(current_user.id))
+    if current_user.roles is not None:
+        roles = sorted(current_user.roles)
+    else:
+        roles = list(await get_user_roles_with_hierarchy_async(current_user.id))
     
     return UserResponse(
         id=current_user.id,
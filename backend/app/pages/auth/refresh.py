@@ -1,6 +1,12 @@
 from fastapi import APIRouter, Request, Response, HTTPException
-from jose import jwt, JWTError
-from ...middleware.auth import create_access_token, verify_token
+from ...middleware.auth import (
+    create_access_token,
+    create_refresh_token,
+    access_token_claims,
+)
+from ...middleware.tokens import token_service, TokenError
+from ...database.shared import get_user_snapshot_async
+from ...database.refresh_tokens import refresh_tokens, InvalidRefreshToken, RefreshTokenReuse
 from ...config import settings
 
 router = APIRouter()
@@ -9,22 +15,32 @@ router = APIRouter()
 @router.post("/auth/refresh")
 async def refresh_token(request: Request, response: Response):
     """Refresh access token using refresh token from cookie"""
-    refresh_token = request.cookies.get("refresh_token")
-    if not refresh_token or not verify_token(refresh_token):
+    try:
+        # Refresh tokens are single use, so there is no point caching them
+        payload = token_service.from_request(request, "refresh_token", cache=False)
+    except TokenError:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    if payload is None:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    if payload.get("type") != "refresh":
+        raise HTTPException(status_code=401, detail="Invalid token type")
+    user_id = int(payload["sub"])
+    
+    # Refresh tokens issued before a password reset or deactivation are rejected
+    user = await get_user_snapshot_async(user_id)
+    if user is None or not user.is_active or payload.get("ver", 0) != user.token_version:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
     
+    # Single use: the presented token is consumed and replaced by its successor
+    if "jti" not in payload or "fam" not in payload:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
     try:
-        payload = jwt.decode(refresh_token, settings.jwt_secret, algorithms=["HS256"])
-        user_id = int(payload["sub"])
-        token_type = payload.get("type")
-        
-        if token_type != "refresh":
-            raise HTTPException(status_code=401, detail="Invalid token type")
-        
-    except JWTError:
+        new_jti = await refresh_tokens.rotate(payload["jti"], payload["fam"], user_id)
+    except (InvalidRefreshToken, RefreshTokenReuse):
         raise HTTPException(status_code=401, detail="Invalid refresh token")
     
-    new_access_token = create_access_token(user_id)
+    new_access_token = create_access_token(user_id, claims=await access_token_claims(user))
+    new_refresh_token = create_refresh_token(user_id, new_jti, payload["fam"], user.token_version)
     response.set_cookie(
         "access_token", 
         new_access_token, 
@@ -32,5 +48,12 @@ async def refresh_token(request: Request, response: Response):
         max_age=settings.access_token_ttl_minutes * 60,
         samesite="lax"
     )
+    response.set_cookie(
+        "refresh_token",
+        new_refresh_token,
+        httponly=True,
+        max_age=settings.refresh_token_ttl_days * 24 * 60 * 60,
+        samesite="lax"
+    )
     
     return {"success": True}
\ No newline at end of file
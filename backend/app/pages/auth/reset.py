@@ -3,11 +3,17 @@ from pydantic import BaseModel, EmailStr
 from datetime import datetime, timedelta
 from secrets import token_urlsafe
 
-from ...database import get_db_session
+from sqlalchemy import select, update
+
+from ...database import get_async_db_session, get_async_read_db_session
 from ...database.models import User, PasswordResetToken
-from ...database.shared import get_user_by_email
-from ...middleware.auth import get_password_hash
-from ...functions.email import email_service
+from ...database.shared import get_user_by_email_async
+from ...database.cache import user_cache
+from ...database.counters import dashboard_counters
+from ...database.revocations import token_revocations, bump_token_version
+from ...middleware.auth import get_password_hash_async
+from ...middleware.rate_limit import limit_reset_email
+from ...functions.email import email_service, email_dispatcher
 from ...config import settings
 
 
@@ -28,7 +34,8 @@ async def request_password_reset(payload: ResetRequest):
     if not settings.enable_password_reset:
         raise HTTPException(status_code=403, detail="Password reset is disabled")
 
-    user = get_user_by_email(payload.email)
+    await limit_reset_email(payload.email)
+    user = await get_user_by_email_async(payload.email)
 
     # Always respond success to avoid user enumeration
     if not user:
@@ -37,7 +44,7 @@ async def request_password_reset(payload: ResetRequest):
     token = token_urlsafe(32)
     expires_at = datetime.utcnow() + timedelta(hours=1)
 
-    with get_db_session() as db:
+    async with get_async_db_session() as db:
         prt = PasswordResetToken(
             user_id=user.id,
             token=token,
@@ -46,30 +53,60 @@ async def request_password_reset(payload: ResetRequest):
             active=True,
         )
         db.add(prt)
-        db.commit()
+        # Queued in the same transaction; the dispatcher delivers it in the background
+        db.add(email_service.password_reset_message(user.email, token))
+        await db.commit()
+        dashboard_counters.reset_token_created(prt.id, expires_at)
 
-    email_service.send_password_reset(user.email, token)
+    email_dispatcher.notify()
     return {"success": True, "message": "If an account exists, a reset email has been sent"}
 
 
+def _valid_token(token: str):
+    prt = PasswordResetToken
+    return (
+        prt.token == token,
+        prt.active == True,
+        prt.used == False,
+        prt.expires_at > datetime.utcnow(),
+    )
+
+
 @router.post("/auth/reset/onsubmit/confirm")
 async def confirm_password_reset(payload: ResetConfirm):
     if len(payload.new_password) < 8:
         raise HTTPException(status_code=400, detail="Password must be at least 8 characters")
 
-    with get_db_session() as db:
-        prt = db.query(PasswordResetToken).filter(PasswordResetToken.token == payload.token).first()
-        if not prt or not prt.active or prt.used or (prt.expires_at and prt.expires_at < datetime.utcnow()):
+    # Check the token with a cheap read first so bogus tokens never cost a bcrypt hash
+    async with get_async_read_db_session() as db:
+        found = await db.scalar(select(PasswordResetToken.id).where(*_valid_token(payload.token)))
+    if found is None:
+        raise HTTPException(status_code=400, detail="Invalid or expired token")
+
+    # Hash outside any session so no DB connection is held during bcrypt
+    hashed_password = await get_password_hash_async(payload.new_password)
+
+    async with get_async_db_session() as db:
+        # Re-check and consume in one statement; a concurrent confirm gets no row
+        claimed = (await db.execute(
+            update(PasswordResetToken)
+            .where(*_valid_token(payload.token))
+            .values(used=True, active=False)
+            .returning(PasswordResetToken.id, PasswordResetToken.user_id)
+        )).first()
+        if claimed is None:
             raise HTTPException(status_code=400, detail="Invalid or expired token")
 
-        user = db.query(User).filter(User.id == prt.user_id).first()
+        user = await db.get(User, claimed.user_id)
         if not user:
             raise HTTPException(status_code=400, detail="Invalid token")
 
-        user.hashed_password = get_password_hash(payload.new_password)
-        prt.used = True
-        prt.active = False
-        db.commit()
+        user.hashed_password = hashed_password
+        # Sessions opened with the old password stop working
+        token_version = await db.run_sync(bump_token_version, user.id)
+        await db.commit()
+        user_cache.invalidate(user.id)
+        token_revocations.revoke(user.id, token_version)
+        dashboard_counters.reset_token_used(claimed.id)
 
     return {"success": True, "message": "Password has been reset"}
-
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
-from ..database.models import User
-from ..database.shared import get_dashboard_metrics
+from ..database.cache import UserSnapshot
+from ..database.counters import dashboard_counters
 from ..middleware.auth import get_current_user
 
 router = APIRouter()
@@ -13,12 +13,12 @@ class DashboardData(BaseModel):
 
 
 @router.get("/dashboard/onload", response_model=DashboardData)
-async def dashboard_onload(current_user: User = Depends(get_current_user)):
+async def dashboard_onload(current_user: UserSnapshot = Depends(get_current_user)):
     """
     Gather all data needed for dashboard display.
     Single endpoint to minimize frontend API calls.
     """
-    system_metrics = get_dashboard_metrics()
+    system_metrics = await dashboard_counters.get()
     user_stats = {
         "user_id": current_user.id,
         "email": current_user.email,
@@ -34,7 +34,7 @@ async def dashboard_onload(current_user: User = Depends(get_current_user)):
 @router.post("/dashboard/onsubmit")
 async def dashboard_onsubmit(
     action_data: dict,
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
 ):
     """Handle dashboard actions (e.g., updating preferences)"""
     return {"success": True, "message": "Dashboard action completed"}
\ No newline at end of file
@@ -0,0 +1,20 @@
+from secrets import compare_digest
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from ..functions.metrics import registry
+from ..config import settings
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics(request: Request):
+    """Prometheus text exposition of application metrics"""
+    if not settings.enable_metrics:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if settings.metrics_token:
+        supplied = request.headers.get("authorization", "")
+        if not compare_digest(supplied.encode(), f"Bearer {settings.metrics_token}".encode()):
+            raise HTTPException(status_code=401, detail="Not authenticated")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
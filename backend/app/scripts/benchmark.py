@@ -0,0 +1,278 @@
+"""Benchmark the auth and dashboard endpoints against a seeded SQLite database.
+
+Migrates a fresh database with Alembic and boots ``app.main:app`` in-process,
+startup and shutdown included, behind an httpx ASGI client, so numbers
+measure the application and database rather than the network stack.
+
+    python -m app.scripts.benchmark --output bench/baseline.json
+    python -m app.scripts.benchmark --compare bench/baseline.json --output bench/current.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+SCENARIOS = ("login", "refresh", "me", "dashboard")
+PASSWORD = "benchmark-password"
+
+
+def configure_environment(db_path: Path) -> None:
+    """Point the app at the benchmark database before it is imported"""
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("JWT_SECRET", "benchmark-secret")
+    # Background jobs and outbound email would add noise to the measurements
+    os.environ["ENABLE_BACKUPS"] = "false"
+    # Every request comes from one client address, which the login limiter would throttle
+    os.environ["ENABLE_RATE_LIMITING"] = "false"
+    os.environ.setdefault("ENABLE_QUERY_PROFILING", "false")
+    os.environ.setdefault("LOG_SAMPLE_RATE", "0")
+
+
+def seed(users: int, roles: int, tokens: int) -> list[str]:
+    """Migrate the schema and bulk-insert users, a role chain and reset tokens"""
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import insert
+    from app.database import engine
+    from app.database.models import User, Role, UserRole, PasswordResetToken
+    from app.middleware.auth import get_password_hash
+
+    # The same migrations as production, so migration-only indexes are measured.
+    # No ini file: its logging config would duplicate the app's log output.
+    config = Config()
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    command.upgrade(config, "head")
+    now = datetime.utcnow()
+    # One bcrypt hash shared by every user; hashing per user would dominate seeding
+    hashed = get_password_hash(PASSWORD)
+    emails = [f"user{i}@bench.local" for i in range(users)]
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i + 1, "email": email, "hashed_password": hashed, "is_active": True,
+             "created_at": now, "updated_at": now}
+            for i, email in enumerate(emails)
+        ])
+        # A single chain exercises the deepest hierarchy expansion
+        conn.execute(insert(Role), [
+            {"id": i + 1, "name": f"role{i}", "parent_role_id": i if i else None,
+             "created_at": now, "updated_at": now}
+            for i in range(roles)
+        ])
+        if roles:
+            conn.execute(insert(UserRole), [
+                {"user_id": i + 1, "role_id": random.randint(1, roles), "created_at": now}
+                for i in range(users)
+            ])
+        if tokens:
+            conn.execute(insert(PasswordResetToken), [
+                {"user_id": random.randint(1, users), "token": f"bench-{i}",
+                 "expires_at": now + timedelta(hours=random.choice((-2, 1))),
+                 "used": False, "active": True, "created_at": now}
+                for i in range(tokens)
+            ])
+    return emails
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+    ordered = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "duration_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": ms(statistics.fmean(ordered)) if ordered else 0.0,
+        "p50_ms": ms(percentile(ordered, 50)),
+        "p95_ms": ms(percentile(ordered, 95)),
+        "p99_ms": ms(percentile(ordered, 99)),
+    }
+
+
+async def run_scenario(client, make_request, total: int, concurrency: int) -> dict:
+    """Issue ``total`` requests from ``concurrency`` workers and time each one"""
+    latencies: list[float] = []
+    errors = 0
+    remaining = total
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            response = await make_request(client)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+async def login(client, email: str):
+    return await client.post("/auth/login/onsubmit", json={"email": email, "password": PASSWORD})
+
+
+async def run_benchmarks(emails: list[str], args) -> dict:
+    import httpx
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    # Startup and shutdown hooks run as in production; shutdown releases the
+    # hashing pool and database engines
+    async with app.router.lifespan_context(app), \
+            httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Log in a pool of users up front so the cookie-based scenarios skip bcrypt
+        access_tokens = []
+        refresh_pool: asyncio.Queue = asyncio.Queue()
+        for email in emails[:max(1, args.sessions, args.concurrency)]:
+            response = await login(client, email)
+            response.raise_for_status()
+            access_tokens.append(response.cookies["access_token"])
+            refresh_pool.put_nowait(response.cookies["refresh_token"])
+        client.cookies.clear()
+
+        def with_access_token(method: str, path: str):
+            async def request(c):
+                cookie = random.choice(access_tokens)
+                return await c.request(method, path, headers={"Cookie": f"access_token={cookie}"})
+            return request
+
+        async def refresh(c):
+            # Refresh tokens are single use: check one out and return its successor
+            cookie = await refresh_pool.get()
+            response = await c.post("/auth/refresh", headers={"Cookie": f"refresh_token={cookie}"})
+            refresh_pool.put_nowait(response.cookies.get("refresh_token", cookie))
+            return response
+
+        scenarios = {
+            "login": lambda c: login(c, random.choice(emails)),
+            "refresh": refresh,
+            "me": with_access_token("GET", "/auth/me"),
+            "dashboard": with_access_token("GET", "/dashboard/onload"),
+        }
+        for name in args.scenarios:
+            make_request = scenarios[name]
+            if args.warmup:
+                await run_scenario(client, make_request, args.warmup, args.concurrency)
+            # Login is bounded by bcrypt, so it gets fewer requests
+            total = args.login_requests if name == "login" else args.requests
+            results[name] = await run_scenario(client, make_request, total, args.concurrency)
+            print(
+                f"{name:<10} {results[name]['throughput_rps']:>9.1f} req/s  "
+                f"p50 {results[name]['p50_ms']:>8.2f} ms  p95 {results[name]['p95_ms']:>8.2f} ms  "
+                f"p99 {results[name]['p99_ms']:>8.2f} ms  errors {results[name]['errors']}"
+            )
+
+    return results
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list[str]:
+    """Regressions beyond ``tolerance`` (a fraction) in p95 latency or throughput"""
+    regressions = []
+    for name, now in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        if before["p95_ms"] and now["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']} ms -> {now['p95_ms']} ms")
+        if before["throughput_rps"] and now["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {before['throughput_rps']} -> {now['throughput_rps']} req/s"
+            )
+        if now["errors"] > before["errors"]:
+            regressions.append(f"{name}: errors {before['errors']} -> {now['errors']}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark auth and dashboard endpoints")
+    parser.add_argument("--users", type=int, default=1000, help="Users to seed")
+    parser.add_argument("--roles", type=int, default=10, help="Roles to seed (one parent chain)")
+    parser.add_argument("--tokens", type=int, default=5000, help="Password reset tokens to seed")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent in-flight requests")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per scenario")
+    parser.add_argument("--login-requests", type=int, default=200, help="Requests for the login scenario")
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured requests before each scenario")
+    parser.add_argument("--sessions", type=int, default=50, help="Logged-in users shared by cookie scenarios (at least --concurrency)")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for reproducible runs")
+    parser.add_argument("--db", help="SQLite file to create (defaults to a temporary file)")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--compare", help="Baseline JSON to compare against; exits 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed regression as a fraction")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    workdir = tempfile.TemporaryDirectory(prefix="bench-")
+    db_path = Path(args.db) if args.db else Path(workdir.name) / "bench.db"
+    if db_path.exists():
+        sys.exit(f"Refusing to overwrite existing database {db_path}")
+    configure_environment(db_path)
+
+    emails = seed(args.users, args.roles, args.tokens)
+    scenarios = asyncio.run(run_benchmarks(emails, args))
+    workdir.cleanup()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": {
+                key: getattr(args, key)
+                for key in ("users", "roles", "tokens", "concurrency", "requests",
+                            "login_requests", "warmup", "sessions", "seed")
+            },
+        },
+        "scenarios": scenarios,
+    }
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"Wrote {args.output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        if baseline.get("meta", {}).get("params") != report["meta"]["params"]:
+            print("Warning: baseline was recorded with different parameters")
+        regressions = compare(baseline, report, args.tolerance)
+        if regressions:
+            print("Regressions:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Compare JSON encode time and response size across serializers and encodings.
+
+Renders the real response models of the API endpoints the way FastAPI does
+(``model_dump(mode="json")`` then the response class) with the stdlib
+JSONResponse and ORJSONResponse, and reports bytes on the wire raw, gzipped
+and brotli-compressed at the configured levels. Each body is also streamed
+through CompressionMiddleware, as the app's HTTP middleware layers deliver it,
+to report the encoding a client would actually receive.
+
+    python -m app.scripts.benchmark_encoding --output bench/encoding.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import timeit
+from datetime import datetime
+from pathlib import Path
+
+
+def payloads(list_size: int) -> dict:
+    from app.pages.auth.login import LoginResponse
+    from app.pages.auth.me import UserResponse
+    from app.pages.dashboard import DashboardData
+
+    now = datetime.utcnow()
+    return {
+        "POST /auth/login/onsubmit": LoginResponse(
+            success=True, user={"id": 42, "email": "user42@example.com", "is_active": True}
+        ),
+        "GET /auth/me": UserResponse(
+            id=42, email="user42@example.com", is_active=True,
+            roles=[f"role{i}" for i in range(10)],
+        ),
+        "GET /dashboard/onload": DashboardData(
+            user_stats={"user_id": 42, "email": "user42@example.com", "account_created": now.isoformat()},
+            system_metrics={"total_users": 125000, "active_users": 119876, "pending_resets": 312},
+        ),
+        # Shape of a paginated list response, where compression starts to matter
+        f"list of {list_size} users": [
+            UserResponse(id=i, email=f"user{i}@example.com", is_active=i % 7 != 0, roles=["member"])
+            for i in range(list_size)
+        ],
+    }
+
+
+def renderers() -> dict:
+    from fastapi.responses import JSONResponse
+    result = {"stdlib": JSONResponse}
+    try:
+        import orjson  # noqa: F401
+        from fastapi.responses import ORJSONResponse
+        result["orjson"] = ORJSONResponse
+    except ImportError:
+        print("orjson is not installed; only the stdlib encoder is measured")
+    return result
+
+
+def encode(response_class, payload) -> bytes:
+    if isinstance(payload, list):
+        content = [item.model_dump(mode="json") for item in payload]
+    else:
+        content = payload.model_dump(mode="json")
+    return response_class(content=content).body
+
+
+async def _middleware_encoding(body: bytes, encoding: str) -> str | None:
+    """Content-Encoding CompressionMiddleware picks for a streamed JSON body"""
+    from app.config import settings
+    from app.middleware.responses import CompressionMiddleware
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": body, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    headers = {}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            headers.update((k.decode(), v.decode()) for k, v in message["headers"])
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", encoding.encode())]}
+    await CompressionMiddleware(app, settings.compression_min_bytes)(scope, None, send)
+    return headers.get("content-encoding")
+
+
+def measure(name: str, payload, classes: dict, number: int) -> dict:
+    from app.config import settings
+    from app.middleware.responses import brotli, compress_body
+
+    row = {"endpoint": name, "encode_us": {}}
+    body = b""
+    for label, response_class in classes.items():
+        seconds = min(timeit.repeat(lambda: encode(response_class, payload), number=number, repeat=5))
+        row["encode_us"][label] = round(seconds / number * 1e6, 2)
+        body = encode(response_class, payload)
+    row["bytes"] = {"raw": len(body), "gzip": len(compress_body(body, "gzip"))}
+    if brotli is not None:
+        row["bytes"]["br"] = len(compress_body(body, "br"))
+    row["middleware_encoding"] = asyncio.run(
+        _middleware_encoding(body, "br" if brotli is not None else "gzip")
+    )
+    return row
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark JSON encoding and response compression")
+    parser.add_argument("--number", type=int, default=2000, help="Encodes per timing sample")
+    parser.add_argument("--list-size", type=int, default=200, help="Items in the list payload")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    os.environ.setdefault("JWT_SECRET", "benchmark-secret")
+    classes = renderers()
+    rows = [
+        measure(name, payload, classes, max(1, args.number // (args.list_size if isinstance(payload, list) else 1)))
+        for name, payload in payloads(args.list_size).items()
+    ]
+
+    for row in rows:
+        timings = "  ".join(f"{label} {us:>9.2f} us" for label, us in row["encode_us"].items())
+        sizes = "  ".join(f"{label} {size:>7}" for label, size in row["bytes"].items())
+        flag = f"sent as {row['middleware_encoding']}" if row["middleware_encoding"] else "sent uncompressed"
+        print(f"{row['endpoint']:<28} {timings}  |  bytes {sizes}  ({flag})")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps({"timestamp": datetime.utcnow().isoformat(), "results": rows}, indent=2))
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
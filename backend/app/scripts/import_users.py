@@ -0,0 +1,51 @@
+import argparse
+import io
+import json
+import sys
+
+from app.functions.bulk_import import format_for, import_users
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk-create users from a CSV or NDJSON file")
+    parser.add_argument("input", help="CSV (email,password[,roles,is_active]) or NDJSON file; - for stdin")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="Input format (defaults to the file extension)")
+    parser.add_argument("--role", action="append", default=[], help="Role given to every imported user (repeatable)")
+    parser.add_argument("--batch-size", type=int, help="Rows per transaction (defaults to BULK_IMPORT_BATCH_SIZE)")
+    parser.add_argument("--workers", type=int, help="Hashing processes (defaults to BULK_IMPORT_HASH_WORKERS)")
+    parser.add_argument("--errors", help="Write per-row errors as NDJSON to this path")
+    args = parser.parse_args()
+
+    fmt = args.format or format_for(args.input)
+    if fmt is None:
+        parser.error("cannot tell the input format from the file name; pass --format")
+
+    if args.input == "-":
+        stream = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8-sig", newline="")
+    else:
+        stream = open(args.input, encoding="utf-8-sig", newline="")
+    with stream:
+        report = import_users(stream, fmt, args.role, batch_size=args.batch_size, workers=args.workers)
+
+    print(
+        f"Created {report.created} users ({report.roles_assigned} role assignments), "
+        f"{report.failed} rows failed in {report.seconds:.1f}s"
+    )
+    if args.errors:
+        with open(args.errors, "w") as out:
+            for error in report.errors:
+                out.write(json.dumps({"line": error.line, "email": error.email, "error": error.error}) + "\n")
+        print(f"Wrote {len(report.errors)} errors to {args.errors}")
+    else:
+        for error in report.errors[:20]:
+            print(f"  line {error.line}: {error.email or '-'}: {error.error}")
+        if len(report.errors) > 20:
+            print(f"  ... {len(report.errors) - 20} more; pass --errors to save them all")
+    if report.errors_truncated:
+        print(f"  ... only the first {len(report.errors)} errors were kept")
+    if report.failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+import argparse
+from pathlib import Path
+
+from app.middleware.static import precompress
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write .br/.gz variants of the built frontend")
+    parser.add_argument("directory", nargs="?", default="app/static", help="Static directory (default app/static)")
+    parser.add_argument("--min-size", type=int, help="Skip files smaller than this many bytes")
+    args = parser.parse_args()
+
+    written = precompress(Path(args.directory), args.min_size)
+    print(f"Wrote {written} compressed variants under {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import argparse
+import gzip
+import shutil
+from datetime import datetime
+
+from app.functions.backups import verify_backup
+from app.functions.incremental_backups import restore
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Restore the SQLite database from backups")
+    parser.add_argument("output", help="Path of the database file to write")
+    parser.add_argument("--full", help="Restore a single full backup (service-<ts>.db.gz) instead of a chain")
+    parser.add_argument("--backups-dir", help="Backups directory (defaults to BACKUPS_DIR)")
+    parser.add_argument("--chain", help="Incremental chain name (defaults to the current chain)")
+    parser.add_argument("--until", help="Point in time to restore to, ISO format; UTC unless an offset is given (defaults to latest)")
+    args = parser.parse_args()
+
+    if args.full:
+        with gzip.open(args.full, "rb") as src, open(args.output, "wb") as dst:
+            shutil.copyfileobj(src, dst, length=1024 * 1024)
+        verify_backup(args.output)
+        print(f"Restored {args.full} to {args.output}")
+        return
+
+    until = datetime.fromisoformat(args.until) if args.until else None
+    result = restore(args.output, backups_dir=args.backups_dir, chain=args.chain, until=until)
+    print(
+        f"Restored chain {result['chain']} to {result['output']} "
+        f"({result['deltas_applied']} deltas, as of {result['restored_to']})"
+    )
+
+
+if __name__ == "__main__":
+    main()
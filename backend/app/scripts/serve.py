@@ -0,0 +1,24 @@
+import argparse
+
+import uvicorn
+
+from app.config import settings
+from app.database import is_memory_sqlite
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the API with WEB_WORKERS uvicorn worker processes")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5656)
+    args = parser.parse_args()
+
+    workers = settings.resolved_web_workers
+    if workers > 1 and is_memory_sqlite(settings.database_url):
+        parser.error("an in-memory database cannot be shared between workers; set WEB_WORKERS=1")
+    # Each worker imports the app itself; caches stay coherent through the
+    # invalidation bus and singleton jobs through scheduler leases
+    uvicorn.run("app.main:app", host=args.host, port=args.port, workers=workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import asyncio
+import os
+import tempfile
+from pathlib import Path
+
+# Settings and engines are module-level singletons, so the environment must be
+# in place before anything from app is imported.
+_tmp = tempfile.mkdtemp(prefix="service-tests-")
+os.environ.setdefault("JWT_SECRET", "test-secret-that-is-long-enough-for-hs256")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/test.db")
+os.environ.setdefault("BACKUPS_DIR", f"{_tmp}/backups")
+os.environ.setdefault("ENABLE_BACKUPS", "false")
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import insert, select
+
+from app.database import engine, dispose_engines
+from app.database.cache import user_cache
+from app.database.models import Base, Role, User, UserRole
+from app.database.revocations import token_revocations
+from app.database.roles import role_hierarchy
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    """Migrate a throwaway database to head, as deployments do"""
+    config = Config()
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    command.upgrade(config, "head")
+    yield
+    asyncio.run(dispose_engines())
+
+
+@pytest.fixture
+async def client():
+    """HTTP client driving the app in-process (lifespan not run)"""
+    import httpx
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        yield http
+
+
+def create_user(email: str, roles: tuple[str, ...] = (), is_active: bool = True) -> int:
+    """Insert a user (and any missing roles) directly; returns the user id"""
+    with engine.begin() as conn:
+        user_id = conn.execute(
+            insert(User).values(email=email, hashed_password="x", is_active=is_active)
+        ).inserted_primary_key[0]
+        for name in roles:
+            role_id = conn.scalar(select(Role.id).where(Role.name == name))
+            if role_id is None:
+                role_id = conn.execute(insert(Role).values(name=name)).inserted_primary_key[0]
+            conn.execute(insert(UserRole).values(user_id=user_id, role_id=role_id))
+    role_hierarchy.invalidate()
+    return user_id
+
+
+def auth_headers(user_id: int, claims: dict | None = None) -> dict:
+    from app.middleware.auth import create_access_token
+
+    return {"Cookie": f"access_token={create_access_token(user_id, claims=claims)}"}
+
+
+@pytest.fixture
+def admin_headers() -> dict:
+    """Cookie header for a freshly created admin"""
+    return auth_headers(create_user("admin@example.com", roles=("admin",)))
+
+
+@pytest.fixture(autouse=True)
+def clean_tables():
+    yield
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    # Ids are reused once the tables are empty, so drop per-id state too
+    user_cache.clear()
+    token_revocations.clear()
+    role_hierarchy.invalidate()
+
@@ -0,0 +1,142 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert, update
+
+from app.database import engine
+from app.database.admin import (
+    encode_cursor,
+    iter_reset_tokens_async,
+    iter_users_async,
+    list_reset_tokens_page_async,
+)
+from app.database.models import PasswordResetToken, User
+
+from conftest import auth_headers, create_user
+
+SAME_TIME = datetime(2025, 1, 1, 12, 0, 0)
+
+
+def create_users_at_same_time(count: int) -> list[int]:
+    ids = [create_user(f"user{n}@example.com") for n in range(count)]
+    with engine.begin() as conn:
+        conn.execute(update(User).where(User.id.in_(ids)).values(created_at=SAME_TIME))
+    return ids
+
+
+async def collect_pages(client, headers, **params) -> list[dict]:
+    items, cursor = [], None
+    while True:
+        query = {**params, **({"cursor": cursor} if cursor else {})}
+        response = await client.get("/admin/users/onload", params=query, headers=headers)
+        assert response.status_code == 200
+        page = response.json()
+        items.extend(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return items
+
+
+async def test_pages_through_equal_created_at_without_gaps_or_duplicates(client, admin_headers):
+    ids = create_users_at_same_time(7)
+    items = await collect_pages(client, admin_headers, limit=3)
+    listed = [item["id"] for item in items]
+    # The admin was created just now, so it comes first; the ties follow by id
+    assert listed[1:] == sorted(ids, reverse=True)
+    assert len(set(listed)) == len(listed) == 8
+
+
+async def test_export_iteration_crosses_batches_of_equal_created_at():
+    ids = create_users_at_same_time(5)
+    rows = [row async for row in iter_users_async(batch_size=2)]
+    assert [row.id for row in rows] == sorted(ids, reverse=True)
+
+
+async def test_email_prefix_pages_in_email_order(client, admin_headers):
+    for email in ("ann@example.com", "amy@example.com", "bob@example.com", "al@example.com"):
+        create_user(email)
+    items = await collect_pages(client, admin_headers, limit=1, email_prefix="a")
+    assert [item["email"] for item in items] == [
+        "admin@example.com", "al@example.com", "amy@example.com", "ann@example.com"
+    ]
+
+    rows = [row async for row in iter_users_async(email_prefix="a", batch_size=2)]
+    assert [row.email for row in rows] == [item["email"] for item in items]
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    encode_cursor(["only-one-value"]),
+    encode_cursor(["not-a-date", 1]),
+    encode_cursor([None, 1]),
+    encode_cursor([SAME_TIME, "not-an-id"]),
+])
+async def test_malformed_cursor_is_rejected(client, admin_headers, cursor):
+    response = await client.get("/admin/users/onload", params={"cursor": cursor}, headers=admin_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+async def test_cursor_for_the_other_ordering_is_rejected(client, admin_headers):
+    cursor = encode_cursor([SAME_TIME, 1])
+    response = await client.get(
+        "/admin/users/onload", params={"cursor": cursor, "email_prefix": "a"}, headers=admin_headers
+    )
+    assert response.status_code == 400
+
+
+async def test_ndjson_export_streams_every_user(client, admin_headers):
+    ids = create_users_at_same_time(3)
+    response = await client.get("/admin/users/export", params={"format": "ndjson"}, headers=admin_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"].endswith('.ndjson"')
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows][1:] == sorted(ids, reverse=True)
+    assert rows[-1] == {
+        "id": min(ids), "email": "user0@example.com", "is_active": True,
+        "created_at": SAME_TIME.isoformat(),
+    }
+
+
+async def test_csv_export_honours_filters(client, admin_headers):
+    create_user("active@example.com")
+    inactive_id = create_user("inactive@example.com", is_active=False)
+    response = await client.get(
+        "/admin/users/export", params={"format": "csv", "is_active": "false"}, headers=admin_headers
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == ["id", "email", "is_active", "created_at"]
+    assert [(int(row[0]), row[1], row[2]) for row in rows[1:]] == [
+        (inactive_id, "inactive@example.com", "False")
+    ]
+
+
+async def test_export_requires_admin(client):
+    response = await client.get("/admin/users/export", headers=auth_headers(create_user("member@example.com")))
+    assert response.status_code == 403
+
+
+async def test_reset_tokens_page_through_equal_created_at():
+    user_id = create_user("member@example.com")
+    with engine.begin() as conn:
+        for n in range(5):
+            conn.execute(insert(PasswordResetToken).values(
+                user_id=user_id, token=f"token-{n}", expires_at=SAME_TIME, created_at=SAME_TIME
+            ))
+
+    listed, cursor = [], None
+    while True:
+        rows, cursor = await list_reset_tokens_page_async(2, cursor, user_id=user_id)
+        listed.extend(row.id for row in rows)
+        if cursor is None:
+            break
+    assert listed == sorted(listed, reverse=True) and len(set(listed)) == 5
+
+    iterated = [row.id async for row in iter_reset_tokens_async(user_id=user_id, batch_size=2)]
+    assert iterated == listed
@@ -0,0 +1,38 @@
+from app.config import settings
+from app.database.counters import dashboard_counters
+
+from conftest import auth_headers, create_user
+
+
+async def test_deactivate_ends_existing_sessions(client, admin_headers):
+    user_id = create_user("member@example.com")
+    headers = auth_headers(user_id)
+    assert (await client.get("/auth/me", headers=headers)).json()["is_active"] is True
+    active_before = dashboard_counters.active_users
+
+    response = await client.post(f"/admin/users/{user_id}/deactivate/onsubmit", headers=admin_headers)
+    assert response.status_code == 200
+    assert (await client.get("/auth/me", headers=headers)).json()["is_active"] is False
+    assert dashboard_counters.active_users == max(0, active_before - 1)
+
+    again = await client.post(f"/admin/users/{user_id}/deactivate/onsubmit", headers=admin_headers)
+    assert again.status_code == 404
+
+
+async def test_deactivate_revokes_stateless_tokens(client, admin_headers, monkeypatch):
+    monkeypatch.setattr(settings, "enable_stateless_auth", True)
+    user_id = create_user("member@example.com")
+    claims = {"act": True, "roles": [], "ver": 0, "email": "member@example.com",
+              "ca": "2025-01-01T00:00:00"}
+    headers = auth_headers(user_id, claims)
+    assert (await client.get("/auth/me", headers=headers)).status_code == 200
+
+    await client.post(f"/admin/users/{user_id}/deactivate/onsubmit", headers=admin_headers)
+    response = await client.get("/auth/me", headers=headers)
+    assert response.status_code == 401
+
+
+async def test_deactivate_requires_admin(client):
+    user_id = create_user("member@example.com")
+    response = await client.post(f"/admin/users/{user_id}/deactivate/onsubmit", headers=auth_headers(user_id))
+    assert response.status_code == 403
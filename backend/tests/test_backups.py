@@ -0,0 +1,210 @@
+import gzip
+import json
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config import settings
+from app.functions import backups, incremental_backups
+from app.functions.backups import R2Uploader, _expired_by_policy, prune_local_backups, upload_to_r2
+
+
+class StubS3:
+    """In-memory stand-in for the boto3 S3 client used by R2Uploader"""
+
+    def __init__(self, fail_uploads: int = 0):
+        self.objects: dict[str, dict] = {}
+        self.delete_calls = 0
+        self.uploads = 0
+        self.fail_uploads = fail_uploads
+
+    def upload_fileobj(self, fileobj, bucket, key, **kwargs):
+        if self.fail_uploads > 0:
+            self.fail_uploads -= 1
+            raise RuntimeError("upload failed")
+        self.uploads += 1
+        self.objects[key] = {
+            "Key": key,
+            "Body": fileobj.read(),
+            "LastModified": datetime.utcnow().replace(tzinfo=None),
+            "Bucket": bucket,
+        }
+
+    def get_paginator(self, name):
+        assert name == "list_objects_v2"
+        stub = self
+
+        class Paginator:
+            def paginate(self, Bucket, Prefix):
+                keys = sorted(k for k in stub.objects if k.startswith(Prefix))
+                # Two pages, to exercise pagination
+                half = len(keys) // 2
+                for chunk in (keys[:half], keys[half:]):
+                    yield {"Contents": [stub.objects[k] for k in chunk]}
+
+        return Paginator()
+
+    def delete_objects(self, Bucket, Delete):
+        self.delete_calls += 1
+        for obj in Delete["Objects"]:
+            self.objects.pop(obj["Key"], None)
+
+
+def _write_backup(directory, name, age_days=0):
+    path = os.path.join(directory, name)
+    with gzip.open(path, "wb") as f:
+        f.write(b"backup")
+    mtime = (datetime.utcnow() - timedelta(days=age_days)).timestamp()
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_policy_always_keeps_newest():
+    old = datetime.utcnow() - timedelta(days=365)
+    assert not _expired_by_policy(0, old, keep=1, max_age_days=1)
+    assert _expired_by_policy(1, datetime.utcnow(), keep=1, max_age_days=0)
+    assert _expired_by_policy(1, old, keep=0, max_age_days=30)
+    assert not _expired_by_policy(5, old, keep=0, max_age_days=0)
+
+
+def test_prune_local_backups_by_count_and_age(tmp_path):
+    directory = str(tmp_path)
+    names = [f"service-20250101-00000{i}.db.gz" for i in range(5)]
+    for i, name in enumerate(names):
+        _write_backup(directory, name, age_days=0 if i >= 2 else 40)
+    unrelated = _write_backup(directory, "notes.gz", age_days=400)
+
+    # names[0] is past the count limit, names[1] only past the age limit
+    removed = prune_local_backups(directory, keep=4, max_age_days=30)
+
+    assert sorted(os.path.basename(p) for p in removed) == names[:2]
+    assert sorted(os.listdir(directory)) == sorted(names[2:] + ["notes.gz"])
+    assert os.path.exists(unrelated)
+
+
+def test_r2_upload_uses_prefix_and_streams_file(tmp_path):
+    client = StubS3()
+    uploader = R2Uploader(client=client, bucket="backups", prefix="prod/")
+    path = _write_backup(str(tmp_path), "service-20250101-000000.db.gz")
+
+    key = uploader.upload(path)
+
+    assert key == "prod/service-20250101-000000.db.gz"
+    assert client.objects[key]["Bucket"] == "backups"
+    with open(path, "rb") as f:
+        assert client.objects[key]["Body"] == f.read()
+
+
+def test_r2_prune_applies_retention_across_pages(tmp_path):
+    client = StubS3()
+    uploader = R2Uploader(client=client, bucket="backups", prefix="prod/")
+    for day in range(1, 8):
+        path = _write_backup(str(tmp_path), f"service-2025010{day}-000000.db.gz")
+        uploader.upload(path)
+    client.objects["prod/other-file"] = {"Key": "prod/other-file", "LastModified": datetime(2000, 1, 1)}
+    # The oldest survivor is also past the age limit
+    client.objects["prod/service-20250105-000000.db.gz"]["LastModified"] = datetime.utcnow() - timedelta(days=60)
+
+    removed = uploader.prune(keep=3, max_age_days=30)
+
+    assert sorted(removed) == [f"prod/service-2025010{day}-000000.db.gz" for day in range(1, 6)]
+    assert sorted(client.objects) == [
+        "prod/other-file",
+        "prod/service-20250106-000000.db.gz",
+        "prod/service-20250107-000000.db.gz",
+    ]
+    assert client.delete_calls == 1
+
+
+@pytest.fixture
+def r2(monkeypatch):
+    """R2 enabled, with the shared uploader pointed at a stub client"""
+    client = StubS3()
+    uploader = R2Uploader(client=client, bucket="backups", prefix="prod/")
+    monkeypatch.setattr(settings, "enable_r2_backup", True)
+    monkeypatch.setattr(backups, "r2_uploader", uploader)
+    monkeypatch.setattr(incremental_backups, "r2_uploader", uploader)
+    return client
+
+
+def test_r2_upload_failure_reaches_the_job(tmp_path, r2):
+    r2.fail_uploads = 1
+    path = _write_backup(str(tmp_path), "service-20250101-000000.db.gz")
+    with pytest.raises(RuntimeError):
+        upload_to_r2(path)
+
+
+def test_failed_incremental_upload_is_retried_by_the_next_ship(tmp_path, r2):
+    chain_dir = tmp_path / "chain-20250101-000000"
+    chain_dir.mkdir()
+    deltas = []
+    for seq in (1, 2):
+        name = f"delta-{seq:06d}.bin.gz"
+        (chain_dir / name).write_bytes(b"delta")
+        deltas.append({"file": name, "created_at": "2025-01-01T00:00:00", "page_count": 1, "changed_pages": 1})
+    (chain_dir / "manifest.json").write_text(json.dumps({"chain": chain_dir.name, "deltas": deltas[:1]}))
+
+    r2.fail_uploads = 1
+    with pytest.raises(RuntimeError):
+        incremental_backups._ship(str(chain_dir / deltas[0]["file"]))
+
+    # The next capture's ship also uploads the delta that failed
+    (chain_dir / "manifest.json").write_text(json.dumps({"chain": chain_dir.name, "deltas": deltas}))
+    incremental_backups._ship(str(chain_dir / deltas[1]["file"]))
+    prefix = f"prod/incremental/{chain_dir.name}/"
+    assert sorted(r2.objects) == [prefix + "delta-000001.bin.gz", prefix + "delta-000002.bin.gz", prefix + "manifest.json"]
+    manifest = json.loads((chain_dir / "manifest.json").read_text())
+    assert all(delta["shipped"] for delta in manifest["deltas"])
+
+    # Shipped deltas are not uploaded again
+    uploads = r2.uploads
+    incremental_backups._ship(str(chain_dir / deltas[1]["file"]))
+    assert r2.uploads == uploads + 1
+
+
+def _rows(path) -> list:
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT id, body FROM items ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+def test_incremental_chain_restores_writes_still_in_the_wal(tmp_path, monkeypatch):
+    copies = []
+    copy_online = incremental_backups._copy_online
+    monkeypatch.setattr(incremental_backups, "_copy_online", lambda *a: copies.append(a) or copy_online(*a))
+    db_path = str(tmp_path / "live.db")
+    backups_dir = str(tmp_path / "backups")
+    writer = sqlite3.connect(db_path, isolation_level=None)
+    writer.execute("PRAGMA journal_mode = WAL")
+    writer.execute("PRAGMA wal_autocheckpoint = 0")
+    writer.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, body TEXT)")
+    writer.executemany("INSERT INTO items (body) VALUES (?)", [("x" * 500,)] * 200)
+
+    incremental_backups.capture_incremental(db_path, backups_dir)  # starts the chain
+    writer.executemany("INSERT INTO items (body) VALUES (?)", [("y" * 500,)] * 50)
+    delta = incremental_backups.capture_incremental(db_path, backups_dir)
+    assert delta is not None and delta.endswith(".bin.gz")
+    # Read from the live file, no copy
+    assert copies == []
+
+    # A reader pinned on an older snapshot keeps the WAL ahead of the main
+    # file, so this capture has to fall back to a copy
+    reader = sqlite3.connect(db_path, isolation_level=None)
+    reader.execute("BEGIN")
+    reader.execute("SELECT count(*) FROM items").fetchone()
+    writer.execute("UPDATE items SET body = 'z' WHERE id % 3 = 0")
+    assert incremental_backups.capture_incremental(db_path, backups_dir) is not None
+    assert len(copies) == 1
+    reader.execute("COMMIT")
+    reader.close()
+
+    output = str(tmp_path / "restored.db")
+    result = incremental_backups.restore(output, backups_dir)
+    assert result["deltas_applied"] == 2
+    assert _rows(output) == _rows(db_path)
+    assert os.listdir(os.path.dirname(delta)).count("capture.tmp") == 0
+    writer.close()
@@ -0,0 +1,226 @@
+import io
+import json
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.exc import OperationalError
+
+from app.config import settings
+from app.database import engine
+from app.database.models import Role, User, UserRole
+from app.functions import bulk_import
+from app.functions.bulk_import import import_users
+from app.pages.admin import users as admin_users
+
+from conftest import auth_headers, create_user
+
+PASSWORD = "long-enough-password"
+
+
+@pytest.fixture(autouse=True)
+def editor_role():
+    with engine.begin() as conn:
+        conn.execute(insert(Role).values(name="editor"))
+
+
+def run_import(text: str, fmt: str, default_roles=(), **kwargs):
+    return import_users(io.StringIO(text, newline=""), fmt, default_roles, workers=1, **kwargs)
+
+
+def ndjson(*records) -> str:
+    return "".join((r if isinstance(r, str) else json.dumps(r)) + "\n" for r in records)
+
+
+def errors_of(report) -> list[tuple]:
+    return [(e.line, e.email, e.error) for e in report.errors]
+
+
+def stored_users() -> dict[str, tuple[bool, list[str]]]:
+    with engine.connect() as conn:
+        users = {email: (bool(active), []) for email, active in conn.execute(select(User.email, User.is_active))}
+        for email, role in conn.execute(
+            select(User.email, Role.name).join(UserRole, UserRole.user_id == User.id).join(Role, Role.id == UserRole.role_id)
+        ):
+            users[email][1].append(role)
+    return users
+
+
+def test_csv_rows_are_validated_and_reported_per_line():
+    text = (
+        "email,password,roles,is_active\r\n"
+        f"one@example.com,{PASSWORD},editor,true\r\n"
+        f"not-an-email,{PASSWORD},,\r\n"
+        "two@example.com,short,,\r\n"
+        f"three@example.com,{PASSWORD},ghost,\r\n"
+        f"ONE@example.com,{PASSWORD},,maybe\r\n"
+        f"one@example.com,{PASSWORD},,false\r\n"
+        f"four@example.com,{PASSWORD},,no\r\n"
+    )
+    report = run_import(text, "csv")
+
+    assert (report.created, report.failed, report.roles_assigned) == (2, 5, 1)
+    assert errors_of(report) == [
+        (3, "not-an-email", "Invalid email address"),
+        (4, "two@example.com", "Password must be at least 8 characters"),
+        (5, "three@example.com", "Unknown role: ghost"),
+        (6, "ONE@example.com", "is_active must be true or false, got 'maybe'"),
+        (7, "one@example.com", "Duplicate email in input"),
+    ]
+    assert not report.errors_truncated
+    assert stored_users() == {"one@example.com": (True, ["editor"]), "four@example.com": (False, [])}
+
+
+def test_csv_without_an_email_column_is_rejected():
+    with pytest.raises(ValueError, match="header row"):
+        run_import("name,password\r\nx,y\r\n", "csv")
+
+
+def test_ndjson_parse_errors_and_default_roles():
+    text = ndjson(
+        {"email": "one@example.com", "password": PASSWORD, "roles": ["editor"]},
+        "{not json",
+        "",
+        "[1, 2]",
+        {"email": "two@example.com", "password": PASSWORD, "roles": "editor;ghost"},
+        {"email": "three@example.com", "password": PASSWORD, "roles": 5},
+        {"email": "four@example.com", "password": PASSWORD},
+    )
+    report = run_import(text, "ndjson", default_roles=("editor",))
+
+    assert (report.created, report.failed, report.roles_assigned) == (2, 4, 2)
+    assert [(line, email) for line, email, _ in errors_of(report)] == [
+        (2, None), (4, None), (5, "two@example.com"), (6, "three@example.com"),
+    ]
+    assert errors_of(report)[0][2].startswith("Invalid JSON:")
+    assert errors_of(report)[1][2] == "Expected a JSON object"
+    assert errors_of(report)[2][2] == "Unknown role: ghost"
+    assert stored_users() == {
+        "one@example.com": (True, ["editor"]), "four@example.com": (True, ["editor"]),
+    }
+
+
+def test_unknown_default_role_aborts_before_reading():
+    with pytest.raises(ValueError, match="Unknown role: ghost"):
+        run_import(ndjson({"email": "one@example.com", "password": PASSWORD}), "ndjson", default_roles=("ghost",))
+    assert stored_users() == {}
+
+
+def test_existing_and_racing_emails_are_skipped(monkeypatch):
+    create_user("existing@example.com")
+    real_insert = bulk_import._insert
+
+    def insert_after_a_concurrent_signup(rows, hashes, role_ids):
+        # Registered between the pre-check and the insert: ON CONFLICT skips it
+        create_user("racer@example.com")
+        return real_insert(rows, hashes, role_ids)
+
+    monkeypatch.setattr(bulk_import, "_insert", insert_after_a_concurrent_signup)
+    text = ndjson(*(
+        {"email": email, "password": PASSWORD, "roles": ["editor"]}
+        for email in ("existing@example.com", "racer@example.com", "new@example.com")
+    ))
+    report = run_import(text, "ndjson")
+
+    assert (report.created, report.failed, report.roles_assigned) == (1, 2, 1)
+    assert errors_of(report) == [
+        (1, "existing@example.com", "Email already registered"),
+        (2, "racer@example.com", "Email already registered"),
+    ]
+    # The racing account keeps its own (role-less) row
+    assert stored_users()["racer@example.com"] == (True, [])
+    assert stored_users()["new@example.com"] == (True, ["editor"])
+
+
+def test_failed_batch_is_retried_row_by_row(monkeypatch):
+    real_insert = bulk_import._insert
+    calls = []
+
+    def insert_failing_on_bad_rows(rows, hashes, role_ids):
+        calls.append(len(rows))
+        if any(row.email.startswith("bad") for row in rows):
+            raise OperationalError("INSERT", {}, Exception("disk I/O error"))
+        return real_insert(rows, hashes, role_ids)
+
+    monkeypatch.setattr(bulk_import, "_insert", insert_failing_on_bad_rows)
+    emails = ("a@example.com", "bad@example.com", "b@example.com", "c@example.com")
+    text = ndjson(*({"email": email, "password": PASSWORD, "roles": ["editor"]} for email in emails))
+    report = run_import(text, "ndjson", batch_size=3)
+
+    # First batch fails and is split; the second batch goes in whole
+    assert calls == [3, 1, 1, 1, 1]
+    assert (report.created, report.failed, report.roles_assigned) == (3, 1, 3)
+    assert errors_of(report) == [(2, "bad@example.com", "Database error: OperationalError")]
+    assert set(stored_users()) == {"a@example.com", "b@example.com", "c@example.com"}
+
+
+def test_error_list_is_truncated(monkeypatch):
+    monkeypatch.setattr(settings, "bulk_import_max_errors", 2)
+    report = run_import(ndjson(*(["x"] * 5)), "ndjson")
+    assert report.failed == 5 and len(report.errors) == 2 and report.errors_truncated
+
+
+# Admin endpoint
+
+async def test_import_endpoint_reports_counts_and_errors(client, admin_headers):
+    text = ndjson(
+        {"email": "one@example.com", "password": PASSWORD},
+        {"email": "one@example.com", "password": PASSWORD},
+        "{not json",
+    )
+    response = await client.post(
+        "/admin/users/import/onsubmit",
+        params={"role": "editor"},
+        files={"file": ("users.jsonl", text.encode(), "application/x-ndjson")},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["created"], body["failed"], body["roles_assigned"]) == (1, 2, 1)
+    assert body["errors"][0] == {"line": 2, "email": "one@example.com", "error": "Duplicate email in input"}
+    assert body["errors"][1]["line"] == 3 and body["errors"][1]["email"] is None
+    assert body["errors_truncated"] is False
+    assert stored_users()["one@example.com"] == (True, ["editor"])
+
+
+@pytest.mark.parametrize("filename, params, detail", [
+    ("users.txt", {}, "format must be ndjson or csv"),
+    ("users.csv", {"role": "ghost"}, "Unknown role: ghost"),
+])
+async def test_import_endpoint_rejects_bad_requests(client, admin_headers, filename, params, detail):
+    response = await client.post(
+        "/admin/users/import/onsubmit",
+        params=params,
+        files={"file": (filename, f"email,password\r\na@example.com,{PASSWORD}\r\n".encode())},
+        headers=admin_headers,
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == detail
+
+
+async def test_import_endpoint_runs_one_capped_import_at_a_time(client, admin_headers, monkeypatch):
+    seen = {}
+
+    def fake_import(stream, fmt, default_roles, workers=None):
+        seen["workers"] = workers
+        return bulk_import.ImportReport()
+
+    monkeypatch.setattr(admin_users, "import_users", fake_import)
+    monkeypatch.setattr(settings, "bulk_import_api_workers", 3)
+    upload = {"file": ("users.csv", b"email,password\r\n")}
+
+    response = await client.post("/admin/users/import/onsubmit", files=upload, headers=admin_headers)
+    assert response.status_code == 200
+    assert seen["workers"] == 3
+
+    async with admin_users._import_lock:
+        busy = await client.post("/admin/users/import/onsubmit", files=upload, headers=admin_headers)
+    assert busy.status_code == 503
+
+
+async def test_import_endpoint_requires_admin(client):
+    response = await client.post(
+        "/admin/users/import/onsubmit",
+        files={"file": ("users.csv", b"email,password\r\n")},
+        headers=auth_headers(create_user("member@example.com")),
+    )
+    assert response.status_code == 403
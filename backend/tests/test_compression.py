@@ -0,0 +1,50 @@
+import httpx
+
+from app.config import settings
+from app.middleware.responses import CompressionMiddleware
+
+
+async def test_small_response_is_sent_uncompressed_with_a_length(client):
+    response = await client.get("/livez", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    assert int(response.headers["content-length"]) == len(response.content) < settings.compression_min_bytes
+
+
+async def test_large_response_is_compressed(client):
+    response = await client.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert response.json()["info"]["title"] == "Service Template"
+
+
+def streaming_app(chunks: list[bytes]):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/json")]})
+        for chunk in chunks:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+    return app
+
+
+async def fetch(chunks: list[bytes]) -> httpx.Response:
+    app = CompressionMiddleware(streaming_app(chunks), minimum_size=1000)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+        return await http.get("/", headers={"Accept-Encoding": "gzip"})
+
+
+async def test_short_stream_is_buffered_and_sent_as_is():
+    response = await fetch([b"x" * 300] * 3)
+    assert "content-encoding" not in response.headers
+    assert response.headers["content-length"] == "900"
+    assert response.content == b"x" * 900
+
+
+async def test_long_stream_is_compressed_once_over_the_threshold():
+    chunks = [bytes([65 + i % 26]) * 300 for i in range(10)]
+    response = await fetch(chunks)
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.content == b"".join(chunks)
@@ -0,0 +1,32 @@
+import asyncio
+
+from structlog.testing import capture_logs
+
+from app.database.counters import DashboardCounters
+
+from conftest import create_user
+
+
+async def test_concurrent_cold_reads_share_one_reconcile():
+    create_user("a@example.com")
+    create_user("b@example.com", is_active=False)
+    counters = DashboardCounters(max_staleness=60)
+    results = await asyncio.gather(*(counters.get() for _ in range(20)))
+    assert counters.reconciliations == 1
+    assert results[0] == {"total_users": 2, "active_users": 1, "pending_resets": 0}
+
+
+async def test_reconcile_failure_is_logged():
+    counters = DashboardCounters(max_staleness=0)
+    await counters.get()
+
+    async def broken():
+        raise RuntimeError("database is locked")
+
+    counters.reconcile = broken
+    with capture_logs() as logs:
+        await counters.get()
+        await asyncio.gather(counters._reconcile_task, return_exceptions=True)
+        await asyncio.sleep(0)
+    assert {"event": "Dashboard counter reconciliation failed", "error": "database is locked",
+            "log_level": "error"} in logs
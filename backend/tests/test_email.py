@@ -0,0 +1,120 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from app.config import settings
+from app.database import get_async_db_session
+from app.database.models import EmailOutbox
+from app.functions.email import ConsoleTransport, EmailDispatcher, EmailService, FakeTransport
+
+
+@pytest.fixture
+def dispatcher():
+    service = EmailService()
+    service.transport = FakeTransport()
+    return EmailDispatcher(service)
+
+
+async def enqueue(dispatcher) -> int:
+    async with get_async_db_session() as db:
+        message = dispatcher.service.password_reset_message("user@example.com", "secret-token")
+        db.add(message)
+        await db.commit()
+        return message.id
+
+
+async def load(message_id: int) -> EmailOutbox:
+    async with get_async_db_session() as db:
+        return await db.scalar(select(EmailOutbox).where(EmailOutbox.id == message_id))
+
+
+async def make_due(message_id: int) -> None:
+    async with get_async_db_session() as db:
+        await db.execute(
+            update(EmailOutbox).where(EmailOutbox.id == message_id).values(next_attempt_at=datetime.utcnow())
+        )
+        await db.commit()
+
+
+async def test_failed_send_is_retried_with_backoff(dispatcher):
+    dispatcher.service.transport.fail_times = 1
+    message_id = await enqueue(dispatcher)
+
+    assert await dispatcher.dispatch_once() == 1
+    message = await load(message_id)
+    assert (message.status, message.attempts) == ("pending", 1)
+    assert message.last_error == "fake transport failure"
+    backoff = (message.next_attempt_at - datetime.utcnow()).total_seconds()
+    assert settings.email_retry_base_seconds * 0.7 < backoff <= settings.email_retry_base_seconds * 1.2
+    # Not due again until the backoff has passed
+    assert await dispatcher.dispatch_once() == 0
+
+    await make_due(message_id)
+    assert await dispatcher.dispatch_once() == 1
+    message = await load(message_id)
+    assert (message.status, message.attempts) == ("sent", 2)
+    assert "secret-token" in dispatcher.service.transport.sent[0]["html"]
+    # The stored copy of the reset link is dropped once delivered
+    assert message.html_body == ""
+    assert dispatcher.stats == {"sent": 1, "retried": 1, "dead": 0}
+
+
+async def test_backoff_doubles_per_attempt(dispatcher):
+    base = settings.email_retry_base_seconds
+    for attempts in (1, 2, 3):
+        assert base * 2 ** (attempts - 1) * 0.8 <= dispatcher._backoff(attempts) <= base * 2 ** (attempts - 1) * 1.2
+
+
+async def test_message_is_dead_lettered_after_max_attempts(dispatcher, monkeypatch):
+    monkeypatch.setattr(settings, "email_max_attempts", 2)
+    dispatcher.service.transport.fail_times = 5
+    message_id = await enqueue(dispatcher)
+
+    await dispatcher.dispatch_once()
+    await make_due(message_id)
+    await dispatcher.dispatch_once()
+    message = await load(message_id)
+    assert (message.status, message.attempts, message.html_body) == ("dead", 2, "")
+    assert dispatcher.stats["dead"] == 1
+
+
+async def test_prune_removes_only_finished_messages_past_retention(dispatcher):
+    sent_id = await enqueue(dispatcher)
+    await dispatcher.dispatch_once()
+    pending_id = await enqueue(dispatcher)
+    old = datetime.utcnow() - timedelta(hours=settings.email_outbox_retention_hours + 1)
+    async with get_async_db_session() as db:
+        await db.execute(update(EmailOutbox).values(updated_at=old))
+        await db.commit()
+
+    assert await dispatcher.prune() == 1
+    assert await load(sent_id) is None
+    assert await load(pending_id) is not None
+
+
+@pytest.mark.parametrize("web_workers, cpus, share", [(1, 8, 12.0), (4, 8, 3.0), (0, 6, 2.0)])
+def test_each_worker_gets_a_share_of_the_send_rate(monkeypatch, web_workers, cpus, share):
+    monkeypatch.setattr(settings, "ses_max_send_rate", 12.0)
+    monkeypatch.setattr(settings, "web_workers", web_workers)
+    monkeypatch.setattr(os, "cpu_count", lambda: cpus)
+    assert EmailDispatcher(EmailService()).limiter.rate == share
+
+
+async def test_workers_together_stay_within_the_send_rate(monkeypatch):
+    monkeypatch.setattr(settings, "ses_max_send_rate", 20.0)
+    monkeypatch.setattr(settings, "web_workers", 2)
+    workers = [EmailDispatcher(EmailService()) for _ in range(2)]
+    start = time.monotonic()
+    # Each bucket holds one second's worth (10 sends), then refills at 10/s
+    await asyncio.gather(*(worker.limiter.acquire() for worker in workers for _ in range(15)))
+    assert time.monotonic() - start >= 0.45
+
+
+def test_console_transport_prints_the_reset_link(capsys):
+    message = EmailService().password_reset_message("user@example.com", "secret-token")
+    ConsoleTransport().send(message.to_email, message.subject, message.html_body)
+    assert f"{settings.frontend_url.rstrip('/')}/auth/reset?token=secret-token" in capsys.readouterr().out
@@ -0,0 +1,29 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.functions.hashing import HashingBusyError, PasswordHashExecutor
+
+
+async def test_cancelled_caller_keeps_its_slot_until_the_thread_finishes():
+    hasher = PasswordHashExecutor(workers=1, max_queue=0)
+    release = threading.Event()
+    task = asyncio.create_task(hasher.run(release.wait, 5))
+    await asyncio.sleep(0.05)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    # The thread is still busy, so the pool is still full
+    assert hasher.in_flight == 1
+    with pytest.raises(HashingBusyError):
+        await hasher.run(lambda: None)
+
+    release.set()
+    for _ in range(100):
+        if hasher.in_flight == 0:
+            break
+        await asyncio.sleep(0.01)
+    assert hasher.in_flight == 0
+    assert await hasher.run(lambda: "hashed") == "hashed"
+    hasher.shutdown()
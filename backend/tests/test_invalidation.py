@@ -0,0 +1,19 @@
+from app.database import engine
+from app.database.invalidation import InvalidationBus
+
+
+async def test_poll_applies_events_published_after_the_baseline():
+    bus = InvalidationBus(enabled=True, retention_seconds=600)
+    received = []
+    bus.subscribe("users", received.append)
+    with engine.begin() as conn:
+        bus.publish(conn, "users", 1)
+
+    # The first poll only records where to start
+    assert await bus.poll() == 0
+    with engine.begin() as conn:
+        bus.publish(conn, "users", 2)
+        bus.publish(conn, "other", 3)
+    assert await bus.poll() == 2
+    assert received == ["2"]
+    assert await bus.poll() == 0
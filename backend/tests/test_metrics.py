@@ -0,0 +1,17 @@
+from app.config import settings
+
+
+async def test_metrics_are_disabled_by_default(client):
+    assert (await client.get("/metrics")).status_code == 404
+
+
+async def test_metrics_token_is_required_when_set(client, monkeypatch):
+    monkeypatch.setattr(settings, "enable_metrics", True)
+    monkeypatch.setattr(settings, "metrics_token", "scrape-secret")
+
+    assert (await client.get("/metrics")).status_code == 401
+    wrong = await client.get("/metrics", headers={"Authorization": "Bearer nope"})
+    assert wrong.status_code == 401
+    response = await client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
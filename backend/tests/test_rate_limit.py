@@ -0,0 +1,75 @@
+from types import SimpleNamespace
+
+import pytest
+from starlette.requests import Request
+
+from app.config import settings
+from app.functions import rate_limit
+from app.functions.rate_limit import MemoryStore, RateLimiter, Rule, SqliteStore
+from app.middleware.rate_limit import client_ip
+
+RULE = Rule("test", limit=3, window_seconds=10)
+
+
+@pytest.fixture(params=[MemoryStore, SqliteStore])
+def limiter(request):
+    return RateLimiter(request.param())
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Settable wall clock for the limiter; starts at the beginning of a window"""
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(time=lambda: now.value))
+    return now
+
+
+async def hits(limiter, count: int, identity: str = "client") -> list[bool]:
+    return [(await limiter.hit(RULE, identity)).allowed for _ in range(count)]
+
+
+async def test_limit_applies_within_a_window(limiter, clock):
+    assert await hits(limiter, 4) == [True, True, True, False]
+    clock.value = 1004.0
+    decision = await limiter.hit(RULE, "client")
+    assert not decision.allowed and decision.retry_after == pytest.approx(6.0)
+    # Identities are counted separately
+    assert await hits(limiter, 1, identity="other") == [True]
+
+
+async def test_previous_window_is_weighted_by_overlap(limiter, clock):
+    assert await hits(limiter, 3) == [True, True, True]
+    # Halfway through the next window the previous three hits count as 1.5
+    clock.value = 1015.0
+    assert await hits(limiter, 2) == [True, False]
+
+
+async def test_counts_reset_after_a_quiet_window(limiter, clock):
+    assert await hits(limiter, 4) == [True, True, True, False]
+    clock.value = 1030.0
+    assert await hits(limiter, 3) == [True, True, True]
+
+
+async def test_evict_drops_counters_that_cannot_affect_a_decision(limiter, clock):
+    await hits(limiter, 1)
+    assert limiter.store.evict(1019.0) == 0
+    assert limiter.store.evict(1021.0) == 1
+    assert limiter.stats["allowed"] == 1
+
+
+def request_from(peer: str, forwarded: str | None = None) -> Request:
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return Request({"type": "http", "headers": headers, "client": (peer, 4321)})
+
+
+def test_forwarded_header_is_ignored_unless_trusted():
+    assert client_ip(request_from("10.0.0.1", "1.2.3.4")) == "10.0.0.1"
+
+
+@pytest.mark.parametrize("hops, expected", [(1, "203.0.113.7"), (2, "198.51.100.2"), (5, "6.6.6.6")])
+def test_forwarded_client_is_counted_from_the_right(monkeypatch, hops, expected):
+    monkeypatch.setattr(settings, "rate_limit_trust_forwarded", True)
+    monkeypatch.setattr(settings, "rate_limit_trusted_proxy_hops", hops)
+    # The client spoofed 6.6.6.6; the proxies appended the rest
+    request = request_from("10.0.0.1", "6.6.6.6, 198.51.100.2, 203.0.113.7")
+    assert client_ip(request) == expected
@@ -0,0 +1,97 @@
+import pytest
+from sqlalchemy import insert
+
+from app.config import settings
+from app.database import engine
+from app.database.models import User
+from app.database.refresh_tokens import InvalidRefreshToken, RefreshTokenReuse, RefreshTokenStore
+
+
+@pytest.fixture
+def user_id():
+    with engine.begin() as conn:
+        return conn.execute(
+            insert(User).values(email="tokens@example.com", hashed_password="x", is_active=True)
+        ).inserted_primary_key[0]
+
+
+def new_store() -> RefreshTokenStore:
+    """A store with an empty in-memory front, as in a freshly started worker"""
+    return RefreshTokenStore(
+        capacity=1000,
+        error_rate=settings.refresh_token_filter_error_rate,
+        cache_size=settings.refresh_token_revoked_cache_size,
+    )
+
+
+async def test_rotation_issues_a_successor_in_the_same_family(user_id):
+    store = new_store()
+    jti, family = await store.issue(user_id)
+    successor = await store.rotate(jti, family, user_id)
+    assert successor != jti
+    # The successor is itself rotatable
+    await store.rotate(successor, family, user_id)
+    assert store.stats["rotated"] == 2
+
+
+async def test_unknown_token_is_invalid(user_id):
+    with pytest.raises(InvalidRefreshToken):
+        await new_store().rotate("missing", "family", user_id)
+
+
+async def test_reuse_revokes_the_family(user_id):
+    store = new_store()
+    jti, family = await store.issue(user_id)
+    successor = await store.rotate(jti, family, user_id)
+
+    with pytest.raises(RefreshTokenReuse):
+        await store.rotate(jti, family, user_id)
+    assert store.stats["reused"] == 1
+    # The thief's replay also locks out the legitimate successor
+    with pytest.raises(RefreshTokenReuse):
+        await store.rotate(successor, family, user_id)
+
+
+async def test_reuse_is_detected_by_a_worker_that_never_saw_the_rotation(user_id):
+    first = new_store()
+    jti, family = await first.issue(user_id)
+    successor = await first.rotate(jti, family, user_id)
+
+    other = new_store()
+    with pytest.raises(RefreshTokenReuse):
+        await other.rotate(jti, family, user_id)
+    with pytest.raises(RefreshTokenReuse):
+        await first.rotate(successor, family, user_id)
+
+
+async def test_revoked_family_is_rejected_from_memory(user_id):
+    store = new_store()
+    jti, family = await store.issue(user_id)
+    await store.revoke_family(family)
+    with pytest.raises(RefreshTokenReuse):
+        await store.rotate(jti, family, user_id)
+    assert store.stats["fast_rejects"] == 1
+
+
+async def test_rebuilt_filter_rejects_before_the_claim(user_id):
+    first = new_store()
+    jti, family = await first.issue(user_id)
+    await first.rotate(jti, family, user_id)
+
+    other = new_store()
+    assert other.rebuild_filter() == 1
+    with pytest.raises(RefreshTokenReuse):
+        await other.rotate(jti, family, user_id)
+    assert other.stats["filter_rejects"] == 1
+    # Confirmed keys go into the LRU, so the next replay needs no query
+    with pytest.raises(RefreshTokenReuse):
+        await other.rotate(jti, family, user_id)
+    assert other.stats["fast_rejects"] == 1
+
+
+async def test_filter_false_positive_still_rotates(user_id):
+    store = new_store()
+    jti, family = await store.issue(user_id)
+    store._bloom.add(f"j:{jti}")
+    assert await store.rotate(jti, family, user_id)
+    assert store.stats["filter_false_positives"] == 1
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.config import settings
+from app.functions.scheduler import Job, Scheduler
+
+
+@pytest.fixture
+async def workers():
+    """Two schedulers sharing the database, as two worker processes would"""
+    pair = (Scheduler(), Scheduler())
+    for worker in pair:
+        worker.start()
+    yield pair
+    for worker in pair:
+        await worker.stop()
+
+
+def counting_job(calls: list, **kwargs) -> Job:
+    return Job("counted", lambda: calls.append(1), interval=10, **kwargs)
+
+
+async def test_singleton_runs_on_one_worker(workers):
+    first, second = workers
+    calls = []
+    await first.run_job(counting_job(calls))
+    skipped = counting_job(calls)
+    await second.run_job(skipped)
+    assert calls == [1]
+    assert skipped.stats["skipped"] == 1
+
+
+async def test_adapted_delay_and_next_run_reach_other_workers(workers):
+    first, second = workers
+    calls = []
+    await first.run_job(counting_job(calls, next_delay=lambda result, delay: delay * 2))
+
+    other = counting_job(calls)
+    await second.run_job(other)
+    assert other._delay == 20
+    # Follows the holder's next run rather than its own timer
+    assert 19 < other.wait_seconds() <= 20
+    # Only until that run; afterwards it falls back to its (adopted) interval
+    assert other.wait_seconds() == 20
+
+
+async def test_lease_is_renewed_while_a_job_runs(workers, monkeypatch):
+    monkeypatch.setattr(settings, "scheduler_lease_seconds", 0.3)
+    first, second = workers
+    calls = []
+    running = asyncio.create_task(first.run_job(Job("slow", lambda: time.sleep(1.0), interval=10)))
+    await asyncio.sleep(0.7)
+    # Well past the unrenewed lease; the second worker must still be kept out
+    assert not await second._acquire_lease(Job("slow", lambda: calls.append(1), interval=10))
+    await running
+    assert calls == []
+
+
+async def test_stopping_hands_the_lease_over(workers):
+    first, second = workers
+    calls = []
+    await first.run_job(counting_job(calls))
+    await first.stop()
+    await second.run_job(counting_job(calls))
+    assert calls == [1, 1]
+
+
+async def test_long_running_jobs_use_their_own_pool(workers):
+    worker = workers[0]
+    release = threading.Event()
+    long_job = Job("backup", lambda: release.wait(5), interval=10, long_running=True, singleton=False)
+    running = [asyncio.create_task(worker.run_job(long_job)) for _ in range(2)]
+    # Both long runs queue on the long pool; short jobs still get a thread
+    name = await asyncio.wait_for(worker.run_job(Job(
+        "short", lambda: threading.current_thread().name, interval=10, singleton=False
+    )), timeout=2)
+    assert name.startswith("jobs")
+    release.set()
+    await asyncio.gather(*running)
+
+
+def test_registering_a_name_again_replaces_the_job():
+    scheduler = Scheduler()
+    scheduler.add_job(Job("cleanup", lambda: None, interval=10))
+    replacement = scheduler.add_job(Job("cleanup", lambda: None, interval=20))
+    assert scheduler.jobs == {"cleanup": replacement}
+
+
+async def test_app_lifespan_can_run_twice_in_one_process():
+    from app.main import app
+    from app.functions.scheduler import scheduler
+
+    for _ in range(2):
+        async with app.router.lifespan_context(app):
+            assert "token_cleanup" in scheduler.jobs
+        assert scheduler.jobs == {}